@@ -0,0 +1,54 @@
+"""Gunicorn configuration (picked up automatically from the working directory).
+
+The app is loaded once in the master (``preload_app``) and workers are
+forked from it, so imported code and settings are shared copy-on-write
+instead of being re-imported by every worker.
+"""
+import gc
+import importlib
+import os
+
+worker_class = 'uvicorn.workers.UvicornWorker'
+# Gunicorn's own default of one worker; scale with WEB_CONCURRENCY. Each
+# worker carries the preloaded modules, a LISTEN connection and its SSE
+# clients, and cpu_count() reports the host's cores inside a container
+workers = int(os.environ.get('WEB_CONCURRENCY', 1))
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+preload_app = True
+timeout = 60
+graceful_timeout = 30
+
+# Imported lazily by the app to keep single-process boots fast; with a
+# preloaded master they are imported once here and shared by all workers
+SHARED_MODULES = [
+    'numpy',
+    'google.oauth2.id_token',
+    'google.auth.transport.requests',
+]
+
+
+def when_ready(server):
+    for name in SHARED_MODULES:
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            server.log.info('Optional module %s not installed', name)
+
+    # Move everything loaded so far out of the collector's generations so
+    # GC passes in the workers don't touch (and un-share) those pages
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    # Never share database connections opened in the master
+    from django.db import connections
+    connections.close_all()
+
+
+def post_worker_init(worker):
+    # Account deletions run in worker threads; finish any whose worker died
+    from users.account_deletion import resume_stalled_deletions
+    try:
+        resume_stalled_deletions()
+    except Exception:
+        worker.log.exception('Could not resume stalled account deletions')
@@ -2,6 +2,8 @@
 ASGI config for minsoto_backend project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+The server-sent events stream (``/api/events/``) needs this entry point; under
+WSGI every open stream would pin a worker.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
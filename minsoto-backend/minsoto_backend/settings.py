@@ -37,6 +37,7 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',  # Add WhiteNoise
+    'users.middleware.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -65,6 +66,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'minsoto_backend.wsgi.application'
+ASGI_APPLICATION = 'minsoto_backend.asgi.application'
 
 # Database
 DATABASES = {
@@ -79,10 +81,103 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'users.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_THROTTLE_CLASSES': [
+        'users.throttling.TokenBucketThrottle',
+    ],
+    # Token buckets: '<burst>/<period>', refilled evenly over the period
+    'DEFAULT_THROTTLE_RATES': {
+        'user': '600/min',
+        'widget_data': '60/min',
+        'profile_detail': '120/min',
+    },
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20
 }
 
+# Redis holds state every worker must share: the cache, throttle buckets
+# and leaderboards. Required in production (see users.checks); without it
+# each process keeps its own copy, which is only correct for one process
+REDIS_URL = config('REDIS_URL', default='')
+REQUIRE_REDIS = not DEBUG
+
+# Cache: shared Redis when configured, otherwise per-process memory
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Batch profile cards
+PROFILE_BATCH_MAX = 50
+PROFILE_CARD_TTL = 60
+
+# Streak leaderboards: Redis sorted sets; the O(n) DB-index fallback is for development only
+LEADERBOARD_REDIS_URL = REDIS_URL
+LEADERBOARD_DEFAULT_LIMIT = 20
+LEADERBOARD_MAX_LIMIT = 100
+
+# Habit analytics results are also keyed on the latest log write
+ANALYTICS_CACHE_TTL = 60 * 60 * 24
+
+# Longest date window tasks_list will expand recurring series over
+RECURRENCE_MAX_WINDOW_DAYS = 400
+
+# Archival tiering (see the archive_data management command)
+ARCHIVE_TASK_DAYS = 90
+ARCHIVE_LOG_DAYS = 730
+SOFT_DELETE_RETENTION_DAYS = 30
+
+# Monthly HabitLog partitions (PostgreSQL) kept ready ahead of the current month
+HABITLOG_PARTITIONS_AHEAD = 3
+
+# Worker boot import-time budget, enforced by users.tests.test_startup
+STARTUP_IMPORT_BUDGET_MS = config('STARTUP_IMPORT_BUDGET_MS', default=800, cast=float)
+
+# Profile layout limits
+LAYOUT_MAX_WIDGETS = 100
+LAYOUT_MAX_BYTES = 64 * 1024
+WIDGET_CONFIG_MAX_BYTES = 2 * 1024
+
+# Per-process username -> user id cache used by profile URLs
+USERNAME_CACHE_SIZE = 10000
+
+# Admin changelists switch to the planner's row estimate above this many rows
+ADMIN_ESTIMATED_COUNT_THRESHOLD = 100000
+
+# Account deletion: rows per DELETE batch, and seconds without a heartbeat
+# after which a running deletion is considered abandoned and resumed
+ACCOUNT_DELETION_BATCH_SIZE = 1000
+ACCOUNT_DELETION_STALE_AFTER = 120
+
+# Idempotency-Key replays for mutating endpoints (seconds). A running
+# request refreshes its claim every third of the lock timeout, so the claim
+# is only taken over once the process holding it has died
+IDEMPOTENCY_KEY_TTL = 60 * 60 * 24
+IDEMPOTENCY_LOCK_TIMEOUT = 90
+
+# Single-flight coalescing of identical concurrent GETs: the longest a
+# request waits for an in-flight twin before running itself (seconds)
+COALESCE_WAIT_TIMEOUT = 10
+
+# Response compression (brotli when installed, otherwise gzip)
+COMPRESSION_MIN_SIZE = 1024
+COMPRESSION_BROTLI_QUALITY = 5
+# Responses carrying tokens are never compressed (BREACH); prefixes of request.path
+COMPRESSION_EXCLUDED_PATHS = ('/api/auth/',)
+COMPRESSION_GZIP_MAX_RANDOM_BYTES = 100
+
 # JWT Configuration
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
@@ -90,6 +185,10 @@ SIMPLE_JWT = {
     'ROTATE_REFRESH_TOKENS': True,
 }
 
+# Live updates (server-sent events, served by the ASGI application)
+EVENTS_KEEPALIVE_SECONDS = config('EVENTS_KEEPALIVE_SECONDS', default=15, cast=int)
+EVENTS_RETRY_MS = 5000
+
 # CORS Configuration - Updated for production
 CORS_ALLOWED_ORIGINS = [
     config('FRONTEND_URL', default='http://localhost:3000'),
@@ -99,18 +198,21 @@ CORS_ALLOWED_ORIGINS = [
 
 CORS_ALLOW_CREDENTIALS = True
 
-CORS_ALLOWED_HEADERS = [
+CORS_ALLOW_HEADERS = [
     'accept',
     'accept-encoding',
     'authorization',
     'content-type',
     'dnt',
+    'idempotency-key',
     'origin',
     'user-agent',
     'x-csrftoken',
     'x-requested-with',
 ]
 
+CORS_EXPOSE_HEADERS = ['idempotent-replayed']
+
 # Custom User Model
 AUTH_USER_MODEL = 'users.CustomUser'
 
@@ -125,12 +227,11 @@ EMAIL_PORT = 587
 EMAIL_USE_TLS = True
 EMAIL_HOST_USER = config('EMAIL_HOST_USER', default = '')
 EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD', default = '')
-DEFAULT_FROM_EMAIL = config('DEFAULT_FROM_EMAIL', default=config('EMAIL_HOST_USER'))
+DEFAULT_FROM_EMAIL = config('DEFAULT_FROM_EMAIL', default=EMAIL_HOST_USER)
 
 # For development or if email isn't configured, use console backend
 if not EMAIL_HOST_USER or not EMAIL_HOST_PASSWORD:
     EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
-    print("⚠️  Email not configured - using console backend")
 
 # Static files configuration for production
 STATIC_URL = '/static/'
@@ -0,0 +1,79 @@
+"""Settings for `manage.py test`: in-memory SQLite, no migrations, no services.
+
+Test databases are built straight from the current models (see
+users.testing.FastTestRunner) instead of replaying every migration, and
+nothing here needs Postgres, Redis or Google credentials. Every
+`--parallel` worker gets its own copy of the in-memory database and its own
+local-memory cache, so workers never share state.
+
+Test-only dependencies (fakeredis) are listed in requirements-test.txt.
+
+Set TEST_DATABASE_URL to run the suite against a Postgres server instead;
+that also runs the Postgres-only tests, such as the HabitLog partitioning
+migration.
+"""
+import os
+
+import dj_database_url
+
+# settings.py requires these; tests never talk to the real services
+for name, value in {
+    'SECRET_KEY': 'test-secret-key',
+    'DATABASE_URL': 'sqlite://:memory:',
+    'GOOGLE_CLIENT_ID': 'test-client-id',
+    'GOOGLE_CLIENT_SECRET': 'test-client-secret',
+    'REDIS_URL': '',
+}.items():
+    os.environ.setdefault(name, value)
+
+from .settings import *  # noqa: E402,F401,F403
+
+
+class DisableMigrations:
+    """MIGRATION_MODULES value that makes every app skip its migrations"""
+
+    def __contains__(self, app_label):
+        return True
+
+    def __getitem__(self, app_label):
+        return None
+
+
+DEBUG = False
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': ':memory:',
+    }
+}
+if os.environ.get('TEST_DATABASE_URL'):
+    DATABASES = {'default': dj_database_url.parse(os.environ['TEST_DATABASE_URL'])}
+
+MIGRATION_MODULES = DisableMigrations()
+TEST_RUNNER = 'users.testing.FastTestRunner'
+
+ALLOWED_HOSTS = ['testserver', 'localhost', '127.0.0.1']
+
+# No collected static files to serve in tests
+MIDDLEWARE = [name for name in MIDDLEWARE if not name.startswith('whitenoise.')]
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'minsoto-tests',
+    }
+}
+REDIS_URL = ''
+LEADERBOARD_REDIS_URL = ''
+# A single test process needs no shared store
+REQUIRE_REDIS = False
+
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'root': {'handlers': [], 'level': 'WARNING'},
+}
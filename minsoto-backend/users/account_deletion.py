@@ -0,0 +1,182 @@
+"""Background account deletion in ordered, bounded batches.
+
+Deleting a user through Django's collector loads every dependent row and
+sends a signal per row. Here the children go first, leaf tables before
+their parents, as batches of primary keys deleted with plain DELETE ... IN
+statements. Only one batch of ids is in memory at a time, and every batch
+commits on its own, so a crashed run resumes where it stopped. The side
+effects the skipped signals would have had are handled explicitly:
+leaderboard entries and cached profile cards are dropped. Change-log rows
+and live events are not needed for an account that is going away.
+
+Each deletion is an AccountDeletion row, so its progress is visible from
+every worker. The runner refreshes the row's heartbeat after every batch;
+a job whose heartbeat goes stale lost its worker and is resumed on the
+next worker boot, the next progress poll, or by ``delete_accounts``.
+"""
+import logging
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .leaderboard import DatabaseRanking, get_ranking
+from .models import (
+    AccountDeletion, ArchivedTask, ChangeCounter, ChangeLog, CustomUser, HabitLog,
+    HabitLogArchive, HabitStreak, IdempotencyKey, Profile, Task, UserInterest,
+)
+from .profile_cards import invalidate_card
+
+logger = logging.getLogger(__name__)
+
+
+def deletion_steps(user_id):
+    """(name, queryset) pairs in the order they are safe to delete"""
+    habits = HabitStreak.all_objects.filter(user_id=user_id)
+    tasks = Task.all_objects.filter(user_id=user_id)
+    return [
+        ('habit_logs', HabitLog.objects.filter(habit__in=habits.values('pk'))),
+        ('habit_log_archives', HabitLogArchive.objects.filter(habit__in=habits.values('pk'))),
+        ('habits', habits),
+        # Occurrences reference their series, so they go before it
+        ('task_occurrences', tasks.filter(recurrence_parent__isnull=False)),
+        ('tasks', tasks),
+        ('archived_tasks', ArchivedTask.objects.filter(user_id=user_id)),
+        ('interests', UserInterest.objects.filter(user_id=user_id)),
+        ('change_log', ChangeLog.objects.filter(user_id=user_id)),
+        ('change_counter', ChangeCounter.objects.filter(user_id=user_id)),
+        ('idempotency_keys', IdempotencyKey.objects.filter(user_id=user_id)),
+        ('profile', Profile.objects.filter(user_id=user_id)),
+    ]
+
+
+def stale_before():
+    return timezone.now() - timedelta(seconds=settings.ACCOUNT_DELETION_STALE_AFTER)
+
+
+def stalled_jobs():
+    """Jobs nobody is working on: never started, or whose runner went quiet"""
+    cutoff = stale_before()
+    return AccountDeletion.objects.filter(
+        Q(status=AccountDeletion.SCHEDULED, created_at__lt=cutoff)
+        | Q(status=AccountDeletion.RUNNING, heartbeat_at__lt=cutoff)
+    )
+
+
+def claim(job_id, retry_failed=False):
+    """Take a job unless a live runner has it; True when this caller won"""
+    claimable = Q(status=AccountDeletion.SCHEDULED) | Q(
+        status=AccountDeletion.RUNNING, heartbeat_at__lt=stale_before()
+    )
+    if retry_failed:
+        claimable |= Q(status=AccountDeletion.FAILED)
+    claimed = AccountDeletion.objects.filter(claimable, pk=job_id).update(
+        status=AccountDeletion.RUNNING, heartbeat_at=timezone.now()
+    )
+    return claimed == 1
+
+
+def save_progress(job, **fields):
+    for name, value in fields.items():
+        setattr(job, name, value)
+    job.heartbeat_at = timezone.now()
+    job.save(update_fields=[*fields, 'heartbeat_at'])
+
+
+def drop_rankings(user_id, habit_ids):
+    ranking = get_ranking()
+    if isinstance(ranking, DatabaseRanking) or not habit_ids:
+        return
+    interest_ids = list(
+        UserInterest.objects.filter(user_id=user_id).values_list('interest_id', flat=True)
+    )
+    for habit_id in habit_ids:
+        ranking.remove(habit_id, interest_ids)
+
+
+def delete_account(job, batch_size=None, on_progress=None):
+    """Delete the job's user and everything they own; returns per-table row counts"""
+    batch_size = batch_size or settings.ACCOUNT_DELETION_BATCH_SIZE
+    user_id = job.user_id
+
+    for name, queryset in deletion_steps(user_id):
+        deleted = job.deleted.get(name, 0)
+        while True:
+            with transaction.atomic():
+                ids = list(queryset.values_list('pk', flat=True)[:batch_size])
+                if not ids:
+                    break
+                if name == 'habits':
+                    drop_rankings(user_id, ids)
+                # _raw_delete issues one DELETE ... WHERE pk IN (...) with no
+                # collector and no per-row signals
+                count = queryset.model._base_manager.filter(pk__in=ids)._raw_delete(connection.alias)
+            deleted += count
+            save_progress(job, step=name, deleted={**job.deleted, name: deleted})
+            if on_progress is not None:
+                on_progress(name, deleted)
+
+    # Only the user row and small framework relations (groups, admin log)
+    # remain; a resumed run may find it already gone
+    user = CustomUser.objects.filter(pk=user_id).first()
+    if user is not None:
+        username = user.username
+        user.delete()
+        invalidate_card(username)
+
+    save_progress(job, status=AccountDeletion.DONE, step='', finished_at=timezone.now())
+    return job.deleted
+
+
+def run_deletion(job_id, batch_size=None, on_progress=None, retry_failed=False):
+    """Claim and run a job; None when another runner already has it"""
+    if not claim(job_id, retry_failed):
+        return None
+    job = AccountDeletion.objects.get(pk=job_id)
+    try:
+        return delete_account(job, batch_size, on_progress)
+    except Exception:
+        save_progress(job, status=AccountDeletion.FAILED)
+        raise
+
+
+def request_deletion(user):
+    """Lock the account now and delete its data in the background; returns the job"""
+    with transaction.atomic():
+        user.deletion_requested_at = timezone.now()
+        user.is_active = False
+        user.save(update_fields=['deletion_requested_at', 'is_active'])
+        job = AccountDeletion.objects.filter(
+            user_id=user.pk, status__in=[AccountDeletion.SCHEDULED, AccountDeletion.RUNNING]
+        ).first()
+        if job is None:
+            job = AccountDeletion.objects.create(user_id=user.pk)
+        transaction.on_commit(lambda: start_background_deletion(job.pk))
+    return job
+
+
+def start_background_deletion(job_id):
+    def run():
+        try:
+            run_deletion(job_id)
+        except Exception:
+            # The job is marked failed; `delete_accounts` retries it
+            logger.exception('Background account deletion %s failed', job_id)
+        finally:
+            connection.close()
+
+    threading.Thread(target=run, name=f'delete-account-{job_id}', daemon=True).start()
+
+
+def resume_if_stalled(job):
+    if stalled_jobs().filter(pk=job.pk).exists():
+        start_background_deletion(job.pk)
+
+
+def resume_stalled_deletions():
+    """Restart jobs whose worker died; safe to call from every worker"""
+    for job_id in stalled_jobs().values_list('pk', flat=True):
+        start_background_deletion(job_id)
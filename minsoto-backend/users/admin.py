@@ -1,25 +1,82 @@
-from django.contrib import admin
+import json
 
-# Register your models here.
+from django.conf import settings
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from .models import CustomUser, Profile, Interest, UserInterest, HabitStreak, HabitLog, Task
+from django.core.paginator import Paginator
+from django.db import connection
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+from .models import (
+    CustomUser, Profile, Interest, UserInterest, HabitStreak, HabitLog, Task,
+    ChangeLog, ArchivedTask, HabitLogArchive, IdempotencyKey, AccountDeletion,
+)
+from .task_queries import search_tasks
+
+
+class EstimatedCountPaginator(Paginator):
+    """Uses the planner's row estimate instead of COUNT(*) for huge results.
+
+    Exact counts are kept below ADMIN_ESTIMATED_COUNT_THRESHOLD rows, and on
+    databases without a usable estimate.
+    """
+
+    @cached_property
+    def count(self):
+        if connection.vendor == 'postgresql':
+            plan = json.loads(self.object_list.order_by().explain(format='json'))
+            estimate = int(plan[0]['Plan']['Plan Rows'])
+            if estimate >= settings.ADMIN_ESTIMATED_COUNT_THRESHOLD:
+                return estimate
+        return super().count
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """Changelist settings for tables that grow into the millions of rows"""
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+def matching_users(term):
+    """Users whose email or username equals ``term``, via the unique indexes"""
+    if '@' in term:
+        return CustomUser.objects.filter(email=term).values('pk')
+    return CustomUser.objects.filter(username__lower=term.lower()).values('pk')
+
+
+class UserSearchMixin:
+    """Admin search by exact username or email instead of LIKE '%term%' joins"""
+    user_path = 'user'
+    search_help_text = 'Exact username or email.'
+
+    def get_search_results(self, request, queryset, search_term):
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+        return queryset.filter(self.search_filter(term)), False
+
+    def search_filter(self, term):
+        return Q(**{f'{self.user_path}__in': matching_users(term)})
 
 
 @admin.register(CustomUser)
 class CustomUserAdmin(UserAdmin):
     list_display = ('username', 'email', 'first_name', 'last_name', 'is_setup_complete', 'is_staff')
     list_filter = ('is_setup_complete', 'is_staff', 'is_superuser')
+    search_fields = ('^username', '^email')
     fieldsets = UserAdmin.fieldsets + (
         ('Custom Fields', {'fields': ('google_id', 'is_setup_complete')}),
     )
 
 
 @admin.register(Profile)
-class ProfileAdmin(admin.ModelAdmin):
+class ProfileAdmin(UserSearchMixin, admin.ModelAdmin):
     list_display = ('user', 'theme', 'created_at')
-    search_fields = ('user__username', 'user__email')
-    readonly_fields = ('id', 'created_at', 'updated_at')
+    list_select_related = ('user',)
+    search_fields = ('=user__username', '=user__email')
+    autocomplete_fields = ('user',)
+    readonly_fields = ('id', 'public_layout', 'created_at', 'updated_at')
 
 
 @admin.register(Interest)
@@ -30,32 +87,100 @@ class InterestAdmin(admin.ModelAdmin):
 
 
 @admin.register(UserInterest)
-class UserInterestAdmin(admin.ModelAdmin):
+class UserInterestAdmin(UserSearchMixin, admin.ModelAdmin):
     list_display = ('user', 'interest', 'is_public', 'added_at')
     list_filter = ('is_public', 'added_at')
-    search_fields = ('user__username', 'interest__name')
+    list_select_related = ('user', 'interest')
+    search_fields = ('=user__username', '=user__email')
+    autocomplete_fields = ('user', 'interest')
     readonly_fields = ('id', 'added_at')
 
 
 @admin.register(HabitStreak)
-class HabitStreakAdmin(admin.ModelAdmin):
+class HabitStreakAdmin(UserSearchMixin, admin.ModelAdmin):
     list_display = ('user', 'name', 'current_streak', 'longest_streak', 'is_public')
     list_filter = ('is_public', 'created_at')
-    search_fields = ('user__username', 'name')
+    list_select_related = ('user',)
+    search_fields = ('=user__username', '=user__email')
+    autocomplete_fields = ('user',)
     readonly_fields = ('id', 'created_at', 'updated_at')
 
 
 @admin.register(HabitLog)
-class HabitLogAdmin(admin.ModelAdmin):
+class HabitLogAdmin(UserSearchMixin, LargeTableAdmin):
     list_display = ('habit', 'date', 'completed')
     list_filter = ('completed', 'date')
-    search_fields = ('habit__name', 'habit__user__username')
+    list_select_related = ('habit__user',)
+    search_fields = ('=habit__user__username', '=habit__user__email')
+    user_path = 'habit__user'
+    raw_id_fields = ('habit',)
     readonly_fields = ('id', 'created_at')
 
 
 @admin.register(Task)
-class TaskAdmin(admin.ModelAdmin):
+class TaskAdmin(UserSearchMixin, LargeTableAdmin):
     list_display = ('user', 'title', 'status', 'priority', 'due_date', 'is_public')
     list_filter = ('status', 'priority', 'is_public', 'created_at')
-    search_fields = ('user__username', 'title', 'description')
+    list_select_related = ('user',)
+    search_fields = ('=user__username', '=user__email', 'title', 'description')
+    search_help_text = 'Exact username or email, or words from the title or description.'
+    autocomplete_fields = ('user',)
+    raw_id_fields = ('recurrence_parent',)
     readonly_fields = ('id', 'created_at', 'updated_at')
+
+    def search_filter(self, term):
+        # Title/description words go through the full-text index
+        matches, _ = search_tasks(Task.all_objects.all(), term)
+        return super().search_filter(term) | Q(pk__in=matches.values('pk'))
+
+
+@admin.register(ArchivedTask)
+class ArchivedTaskAdmin(UserSearchMixin, LargeTableAdmin):
+    list_display = ('user', 'title', 'priority', 'completed_at', 'archived_at')
+    list_filter = ('priority',)
+    list_select_related = ('user',)
+    search_fields = ('=user__username', '=user__email')
+    raw_id_fields = ('user',)
+    readonly_fields = ('id', 'created_at', 'completed_at', 'archived_at')
+
+
+@admin.register(HabitLogArchive)
+class HabitLogArchiveAdmin(LargeTableAdmin):
+    list_display = ('habit', 'year', 'entries', 'updated_at')
+    list_select_related = ('habit',)
+    raw_id_fields = ('habit',)
+    exclude = ('data',)
+    readonly_fields = ('id', 'year', 'entries', 'updated_at')
+
+    def get_queryset(self, request):
+        # Compressed log blobs are never shown, so never load them
+        return super().get_queryset(request).defer('data')
+
+
+@admin.register(ChangeLog)
+class ChangeLogAdmin(UserSearchMixin, LargeTableAdmin):
+    list_display = ('id', 'user', 'version', 'model', 'object_id', 'action', 'created_at')
+    list_filter = ('model', 'action')
+    list_select_related = ('user',)
+    search_fields = ('=user__username', '=user__email')
+    raw_id_fields = ('user',)
+    readonly_fields = ('id', 'user', 'version', 'model', 'object_id', 'action', 'created_at')
+
+
+@admin.register(IdempotencyKey)
+class IdempotencyKeyAdmin(UserSearchMixin, LargeTableAdmin):
+    list_display = ('key', 'user', 'status_code', 'created_at', 'expires_at')
+    list_select_related = ('user',)
+    search_fields = ('=user__username', '=user__email')
+    raw_id_fields = ('user',)
+    readonly_fields = ('user', 'key', 'fingerprint', 'status_code', 'response',
+                       'locked_until', 'expires_at', 'created_at')
+
+
+@admin.register(AccountDeletion)
+class AccountDeletionAdmin(admin.ModelAdmin):
+    list_display = ('id', 'user_id', 'status', 'step', 'created_at', 'heartbeat_at', 'finished_at')
+    list_filter = ('status',)
+    search_fields = ('=user_id',)
+    readonly_fields = ('id', 'user_id', 'status', 'step', 'deleted', 'heartbeat_at',
+                       'created_at', 'finished_at')
@@ -0,0 +1,240 @@
+import functools
+import time
+from array import array
+from datetime import date
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .archive import archived_logs
+from .models import HabitLog
+
+
+@functools.cache
+def numpy_module():
+    """NumPy if installed; imported on first use to keep worker boot fast"""
+    try:
+        import numpy
+    except ImportError:  # pragma: no cover - numpy is optional
+        return None
+    return numpy
+
+
+WEEKDAYS = ('Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun')
+
+# date(1970, 1, 1).toordinal(); converts ordinals to numpy datetime64 days
+EPOCH_ORDINAL = 719163
+
+
+def load_logs(logs):
+    """Pack (date, completed) pairs into ordinal/flag arrays, oldest first"""
+    ordinals = array('l')
+    completed = array('b')
+    for day, done in logs.order_by('date').values_list('date', 'completed'):
+        ordinals.append(day.toordinal())
+        completed.append(done)
+    return ordinals, completed
+
+
+def summarize(total, done, end, first, weekday_logged, weekday_done,
+              last_7, last_30, best_month):
+    return {
+        'total_logs': total,
+        'completed_logs': done,
+        'completion_rate': round(done / total, 4) if total else 0.0,
+        'consistency': round(done / (end - first + 1), 4) if total else 0.0,
+        'rolling_7_day': round(last_7 / 7, 4),
+        'rolling_30_day': round(last_30 / 30, 4),
+        'weekdays': [
+            {
+                'weekday': WEEKDAYS[i],
+                'logged': int(weekday_logged[i]),
+                'completed': int(weekday_done[i]),
+                'rate': round(float(weekday_done[i] / weekday_logged[i]), 4) if weekday_logged[i] else 0.0,
+            }
+            for i in range(7)
+        ],
+        'best_month': best_month,
+    }
+
+
+def compute_numpy(ordinals, completed, end):
+    np = numpy_module()
+    dates = np.asarray(ordinals, dtype=np.int64)
+    done = np.asarray(completed, dtype=bool)
+    total = len(dates)
+    if not total:
+        return summarize(0, 0, end, end, [0] * 7, [0] * 7, 0, 0, None)
+
+    # Ordinal 1 (0001-01-01) is a Monday
+    weekday = (dates - 1) % 7
+    weekday_logged = np.bincount(weekday, minlength=7)
+    weekday_done = np.bincount(weekday[done], minlength=7)
+
+    months = (dates - EPOCH_ORDINAL).astype('datetime64[D]').astype('datetime64[M]')
+    unique_months, month_index = np.unique(months, return_inverse=True)
+    month_done = np.bincount(month_index, weights=done, minlength=len(unique_months))
+    month_logged = np.bincount(month_index, minlength=len(unique_months))
+    best = int(np.argmax(month_done))
+    best_month = None
+    if month_done[best] > 0:
+        best_month = {
+            'month': str(unique_months[best]),
+            'completed': int(month_done[best]),
+            'rate': round(float(month_done[best] / month_logged[best]), 4),
+        }
+
+    return summarize(
+        total,
+        int(done.sum()),
+        end,
+        int(dates[0]),
+        weekday_logged,
+        weekday_done,
+        int(np.count_nonzero(done & (dates > end - 7))),
+        int(np.count_nonzero(done & (dates > end - 30))),
+        best_month,
+    )
+
+
+def compute_python(ordinals, completed, end):
+    total = len(ordinals)
+    if not total:
+        return summarize(0, 0, end, end, [0] * 7, [0] * 7, 0, 0, None)
+
+    weekday_logged = [0] * 7
+    weekday_done = [0] * 7
+    month_logged = {}
+    month_done = {}
+    done_total = last_7 = last_30 = 0
+
+    for ordinal, done in zip(ordinals, completed):
+        weekday = (ordinal - 1) % 7
+        day = date.fromordinal(ordinal)
+        month = f'{day.year:04d}-{day.month:02d}'
+        weekday_logged[weekday] += 1
+        month_logged[month] = month_logged.get(month, 0) + 1
+        month_done.setdefault(month, 0)
+        if done:
+            done_total += 1
+            weekday_done[weekday] += 1
+            month_done[month] += 1
+            if ordinal > end - 7:
+                last_7 += 1
+            if ordinal > end - 30:
+                last_30 += 1
+
+    best_month = None
+    count = max(month_done.values())
+    if count > 0:
+        # Months were inserted oldest first, so the earliest month wins ties
+        month = next(m for m, c in month_done.items() if c == count)
+        best_month = {
+            'month': month,
+            'completed': count,
+            'rate': round(count / month_logged[month], 4),
+        }
+
+    return summarize(
+        total, done_total, end, ordinals[0], weekday_logged, weekday_done,
+        last_7, last_30, best_month,
+    )
+
+
+def compute(ordinals, completed, today=None):
+    end = (today or date.today()).toordinal()
+    if ordinals:
+        end = max(end, ordinals[-1])
+    if numpy_module() is not None:
+        return compute_numpy(ordinals, completed, end)
+    return compute_python(ordinals, completed, end)
+
+
+def written_key(habit_id):
+    return f'habit_logs_written:{habit_id}'
+
+
+def analytics_key(habit_id, stamp):
+    return f'habit_analytics:{habit_id}:{stamp}:{date.today().isoformat()}'
+
+
+def write_stamp(habit_id):
+    stamp = cache.get(written_key(habit_id))
+    if stamp is None:
+        stamp = time.time_ns()
+        cache.set(written_key(habit_id), stamp, None)
+    return stamp
+
+
+def logs_written(habit_ids):
+    """Invalidate analytics of habits whose logs changed without signals"""
+    stamp = time.time_ns()
+    cache.set_many({written_key(habit_id): stamp for habit_id in habit_ids}, None)
+
+
+def forget_habits(habit_ids):
+    """Drop the write stamps of purged habits; their cached results become unreachable"""
+    cache.delete_many([written_key(habit_id) for habit_id in habit_ids])
+
+
+@receiver(post_save, sender=HabitLog)
+@receiver(post_delete, sender=HabitLog)
+def mark_logs_written(sender, instance, **kwargs):
+    cache.set(written_key(instance.habit_id), time.time_ns(), None)
+
+
+def with_archived(habit, ordinals, completed):
+    """Prepend archived years to the packed hot-table arrays"""
+    old_ordinals = array('l')
+    old_completed = array('b')
+    for day, done, _ in archived_logs(habit):
+        old_ordinals.append(day.toordinal())
+        old_completed.append(done)
+    return old_ordinals + ordinals, old_completed + completed
+
+
+def habit_analytics(habit, include_archived=False):
+    """Analytics for one habit, cached until its logs change (or the day rolls over)"""
+    key = analytics_key(habit.id, write_stamp(habit.id))
+    if include_archived:
+        key += ':history'
+    result = cache.get(key)
+    if result is None:
+        packed = load_logs(habit.logs.all())
+        if include_archived:
+            packed = with_archived(habit, *packed)
+        result = compute(*packed)
+        cache.set(key, result, settings.ANALYTICS_CACHE_TTL)
+    return result
+
+
+def habits_analytics(habits):
+    """Analytics for many habits; cache misses share one log query"""
+    habits = list(habits)
+    keys = {habit.id: analytics_key(habit.id, write_stamp(habit.id)) for habit in habits}
+    cached = cache.get_many(keys.values())
+    results = {habit_id: cached[key] for habit_id, key in keys.items() if key in cached}
+
+    missing = [habit.id for habit in habits if habit.id not in results]
+    if missing:
+        packed = {habit_id: (array('l'), array('b')) for habit_id in missing}
+        logs = (
+            HabitLog.objects.filter(habit_id__in=missing)
+            .order_by('habit_id', 'date')
+            .values_list('habit_id', 'date', 'completed')
+        )
+        for habit_id, day, done in logs.iterator():
+            ordinals, completed = packed[habit_id]
+            ordinals.append(day.toordinal())
+            completed.append(done)
+
+        fresh = {habit_id: compute(*packed[habit_id]) for habit_id in missing}
+        cache.set_many({keys[habit_id]: value for habit_id, value in fresh.items()}, settings.ANALYTICS_CACHE_TTL)
+        results.update(fresh)
+
+    return [
+        {'habit_id': habit.id, 'name': habit.name, **results[habit.id]}
+        for habit in habits
+    ]
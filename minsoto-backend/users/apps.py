@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class UsersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'users'
+
+    def ready(self):
+        # Register change-event, change-log, cache and ranking signal handlers
+        from . import analytics, events, leaderboard, profile_cards, sync, usernames  # noqa: F401
+        # and the deployment checks
+        from . import checks  # noqa: F401
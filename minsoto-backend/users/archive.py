@@ -0,0 +1,169 @@
+import functools
+import json
+import zlib
+from collections import defaultdict
+from datetime import date
+
+from django.db import connection, transaction
+
+from .models import ArchivedTask, HabitLog, HabitLogArchive, HabitStreak, Task
+
+
+def pack_logs(entries):
+    """Compress {iso_date: [completed, notes]} into a blob"""
+    return zlib.compress(json.dumps(entries, separators=(',', ':'), sort_keys=True).encode(), 9)
+
+
+def unpack_logs(blob):
+    return json.loads(zlib.decompress(bytes(blob)))
+
+
+def raw_delete(model, pks):
+    """DELETE ... WHERE pk IN (...) without the collector or per-row signals.
+
+    Archived rows have not been deleted as far as users are concerned, so
+    sync clients and live streams must not be told they were.
+    """
+    return model._base_manager.filter(pk__in=pks)._raw_delete(connection.alias)
+
+
+def archive_tasks(cutoff, batch_size):
+    """Move completed one-off tasks untouched since ``cutoff`` to ArchivedTask"""
+    moved = 0
+    while True:
+        with transaction.atomic():
+            batch = list(
+                # Materialized occurrences stay: their row is what keeps the
+                # series from generating the slot again as an open task
+                Task.objects.filter(
+                    status='completed', recurrence='', recurrence_parent__isnull=True, updated_at__lt=cutoff
+                )
+                # A former series (recurrence cleared later) may still be
+                # the parent of materialized occurrences, live or deleted
+                .filter(occurrences__isnull=True)
+                .order_by('updated_at')[:batch_size]
+            )
+            if not batch:
+                return moved
+            ArchivedTask.objects.bulk_create([
+                ArchivedTask(
+                    id=task.id,
+                    user_id=task.user_id,
+                    title=task.title,
+                    description=task.description,
+                    priority=task.priority,
+                    due_date=task.due_date,
+                    is_public=task.is_public,
+                    created_at=task.created_at,
+                    completed_at=task.updated_at,
+                )
+                for task in batch
+            ], ignore_conflicts=True)
+            raw_delete(Task, [task.pk for task in batch])
+            moved += len(batch)
+
+
+def archive_habit_logs(cutoff, batch_size):
+    """Fold logs dated before ``cutoff`` into per-habit yearly compressed blobs"""
+    # analytics reads the archive, so it cannot be imported at module load
+    from .analytics import logs_written
+
+    moved = 0
+    while True:
+        with transaction.atomic():
+            logs = list(
+                HabitLog.objects.filter(date__lt=cutoff)
+                .order_by('habit_id', 'date')
+                .values_list('id', 'habit_id', 'date', 'completed', 'notes')[:batch_size]
+            )
+            if not logs:
+                return moved
+
+            groups = defaultdict(dict)
+            for _, habit_id, day, completed, notes in logs:
+                groups[(habit_id, day.year)][day.isoformat()] = [completed, notes]
+
+            existing = {
+                (archive.habit_id, archive.year): archive
+                for archive in HabitLogArchive.objects.select_for_update().filter(
+                    habit_id__in={habit_id for habit_id, _ in groups},
+                    year__in={year for _, year in groups},
+                )
+            }
+
+            for (habit_id, year), entries in groups.items():
+                archive = existing.get((habit_id, year))
+                if archive is None:
+                    archive = HabitLogArchive(habit_id=habit_id, year=year)
+                    merged = entries
+                else:
+                    merged = {**unpack_logs(archive.data), **entries}
+                archive.data = pack_logs(merged)
+                archive.entries = len(merged)
+                archive.save()
+
+            raw_delete(HabitLog, [log[0] for log in logs])
+            transaction.on_commit(functools.partial(logs_written, {habit_id for habit_id, _ in groups}))
+            moved += len(logs)
+
+
+def delete_in_batches(queryset, batch_size):
+    """Raw-delete ``queryset`` one batch of primary keys at a time; returns the count"""
+    deleted = 0
+    while True:
+        with transaction.atomic():
+            pks = list(queryset.values_list('pk', flat=True)[:batch_size])
+            if not pks:
+                return deleted
+            deleted += raw_delete(queryset.model, pks)
+
+
+def purge_soft_deleted(cutoff, batch_size):
+    """Hard-delete tasks and habits soft-deleted before ``cutoff``.
+
+    Children go first (occurrences before their series, logs and log
+    archives before their habit), in batches of primary keys, without the
+    collector or per-row signals: clients were told about the deletion when
+    the row was soft-deleted. Rankings and cached analytics of purged habits
+    are cleared explicitly. Returns (tasks, habits) purged.
+    """
+    from .analytics import forget_habits
+    from .leaderboard import remove_habits
+
+    tasks = Task.all_objects.filter(deleted_at__lt=cutoff)
+    purged_tasks = 0
+    while True:
+        with transaction.atomic():
+            pks = list(tasks.values_list('pk', flat=True)[:batch_size])
+            if not pks:
+                break
+            purged_tasks += delete_in_batches(Task.all_objects.filter(recurrence_parent__in=pks), batch_size)
+            purged_tasks += raw_delete(Task, pks)
+
+    habits = HabitStreak.all_objects.filter(deleted_at__lt=cutoff)
+    purged_habits = 0
+    while True:
+        with transaction.atomic():
+            batch = list(habits.values_list('pk', 'user_id')[:batch_size])
+            if not batch:
+                break
+            pks = [pk for pk, _ in batch]
+            delete_in_batches(HabitLog.objects.filter(habit_id__in=pks), batch_size)
+            delete_in_batches(HabitLogArchive.objects.filter(habit_id__in=pks), batch_size)
+            remove_habits(batch)
+            purged_habits += raw_delete(HabitStreak, pks)
+            transaction.on_commit(functools.partial(forget_habits, pks))
+
+    return purged_tasks, purged_habits
+
+
+def archived_logs(habit, year=None):
+    """Archived (date, completed, notes) rows for a habit, oldest first"""
+    archives = habit.log_archives.all()
+    if year is not None:
+        archives = archives.filter(year=year)
+    rows = []
+    for archive in archives.order_by('year'):
+        for day, (completed, notes) in sorted(unpack_logs(archive.data).items()):
+            rows.append((date.fromisoformat(day), completed, notes))
+    return rows
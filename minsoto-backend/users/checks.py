@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.core.checks import Error, register
+
+
+@register()
+def redis_configured(app_configs, **kwargs):
+    """Production runs several workers, which must share throttle and cache state"""
+    if not settings.REQUIRE_REDIS or settings.REDIS_URL:
+        return []
+    return [Error(
+        'REDIS_URL is not set.',
+        hint=(
+            'Every gunicorn worker would keep its own throttle buckets and cache, '
+            'multiplying rate limits by the worker count. Set REDIS_URL, or DEBUG '
+            'for a single-process development server.'
+        ),
+        id='users.E001',
+    )]
@@ -0,0 +1,223 @@
+import functools
+import hashlib
+import json
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.http.request import RawPostDataException
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+IDEMPOTENCY_HEADER = 'HTTP_IDEMPOTENCY_KEY'
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+
+
+class Flight:
+    """One in-flight GET; requests that arrive while it runs wait for it"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.data = None
+
+    def wait(self, timeout):
+        """The leader's response data, or None if it failed or took too long"""
+        self.done.wait(timeout)
+        return self.data
+
+
+_flights = {}
+_flights_lock = threading.Lock()
+
+
+def coalesce_get(view):
+    """Share one computed response between concurrent identical GETs.
+
+    The first request for a (user, full path) pair in this process runs the
+    view; requests arriving while it runs block on an event until it is done
+    and get its data instead of running the same queries. The result is
+    handed only to those waiters and is never kept afterwards, so a later
+    request always recomputes. Only successful responses are shared; a
+    waiter whose leader fails, or takes longer than ``COALESCE_WAIT_TIMEOUT``
+    seconds, runs the view itself.
+    """
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method != 'GET' or not request.user.is_authenticated:
+            return view(request, *args, **kwargs)
+
+        key = (request.user.pk, request.get_full_path())
+        with _flights_lock:
+            flight = _flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = _flights[key] = Flight()
+
+        if not leader:
+            data = flight.wait(settings.COALESCE_WAIT_TIMEOUT)
+            if data is not None:
+                return Response(data)
+            return view(request, *args, **kwargs)
+
+        try:
+            response = view(request, *args, **kwargs)
+            if response.status_code == 200:
+                flight.data = response.data
+            return response
+        finally:
+            with _flights_lock:
+                del _flights[key]
+            flight.done.set()
+
+    return wrapper
+
+
+def request_fingerprint(request):
+    digest = hashlib.sha256()
+    for part in (request.method, request.get_full_path(), request.content_type or ''):
+        digest.update(part.encode())
+        digest.update(b'\0')
+    try:
+        digest.update(request.body)
+    except RawPostDataException:
+        # The stream was already parsed; fingerprint the parsed data instead
+        digest.update(json.dumps(request.data, sort_keys=True, default=str).encode())
+    return digest.hexdigest()
+
+
+def claim_idempotency_key(user, idempotency_key, fingerprint):
+    """Claim a key for this request: (record, None), or (None, response to send).
+
+    The claim is committed before the view runs, so a retry arriving on any
+    worker sees it.
+    """
+    for _ in range(2):
+        now = timezone.now()
+        # Expired keys may be reused; clear this user's out of the way
+        IdempotencyKey.objects.filter(user=user, expires_at__lte=now).delete()
+        try:
+            with transaction.atomic():
+                record = IdempotencyKey.objects.create(
+                    user=user,
+                    key=idempotency_key,
+                    fingerprint=fingerprint,
+                    locked_until=now + timedelta(seconds=settings.IDEMPOTENCY_LOCK_TIMEOUT),
+                    expires_at=now + timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL),
+                )
+            return record, None
+        except IntegrityError:
+            pass
+
+        record = IdempotencyKey.objects.filter(user=user, key=idempotency_key).first()
+        if record is None:
+            # Released by a failed attempt in the meantime; claim it again
+            continue
+        if record.fingerprint != fingerprint:
+            return None, Response(
+                {'error': 'Idempotency-Key was already used for a different request'},
+                status=status.HTTP_422_UNPROCESSABLE_ENTITY
+            )
+        if record.status_code is not None:
+            response = Response(record.response, status=record.status_code)
+            response['Idempotent-Replayed'] = 'true'
+            return None, response
+        # Still running (its heartbeat keeps locked_until ahead), unless the
+        # worker holding the claim died
+        taken = IdempotencyKey.objects.filter(
+            pk=record.pk, status_code__isnull=True, locked_until__lt=now
+        ).update(locked_until=now + timedelta(seconds=settings.IDEMPOTENCY_LOCK_TIMEOUT))
+        if taken:
+            return record, None
+        break
+
+    return None, Response(
+        {'error': 'A request with this Idempotency-Key is still in progress'},
+        status=status.HTTP_409_CONFLICT
+    )
+
+
+class ClaimHeartbeat(threading.Thread):
+    """Pushes a claim's ``locked_until`` forward while its view is running.
+
+    Views run in threads the server never kills, so a slow request can
+    outlive any fixed lock timeout; without this its claim would be taken
+    over and the write run twice.
+    """
+
+    def __init__(self, record_pk):
+        super().__init__(name='idempotency-heartbeat', daemon=True)
+        self.record_pk = record_pk
+        self.stopped = threading.Event()
+
+    def run(self):
+        timeout = settings.IDEMPOTENCY_LOCK_TIMEOUT
+        try:
+            while not self.stopped.wait(timeout / 3):
+                IdempotencyKey.objects.filter(pk=self.record_pk, status_code__isnull=True).update(
+                    locked_until=timezone.now() + timedelta(seconds=timeout)
+                )
+        finally:
+            connection.close()
+
+    def stop(self):
+        self.stopped.set()
+
+
+def idempotent(view):
+    """Replay the stored response for a retried mutation with the same key.
+
+    Clients send an ``Idempotency-Key`` header on POST/PATCH/PUT/DELETE. The
+    first request claims the key in the IdempotencyKey table and runs
+    normally; its status and body are stored in the same transaction as the
+    view's writes and kept for ``IDEMPOTENCY_KEY_TTL`` seconds. Retries with
+    the same key and the same request get that response back without
+    re-running validation or writes. Reusing a key for a different request
+    is rejected with 422, and a retry that arrives while the first attempt
+    is still running gets 409. Server errors are not stored, so those
+    requests can be retried.
+    """
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        idempotency_key = request.META.get(IDEMPOTENCY_HEADER)
+        if (
+            not idempotency_key
+            or request.method in ('GET', 'HEAD', 'OPTIONS')
+            or not request.user.is_authenticated
+        ):
+            return view(request, *args, **kwargs)
+
+        if len(idempotency_key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+            return Response(
+                {'error': f'Idempotency-Key cannot exceed {IDEMPOTENCY_KEY_MAX_LENGTH} characters'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        record, response = claim_idempotency_key(request.user, idempotency_key, request_fingerprint(request))
+        if response is not None:
+            return response
+
+        heartbeat = ClaimHeartbeat(record.pk)
+        heartbeat.start()
+        try:
+            with transaction.atomic():
+                response = view(request, *args, **kwargs)
+                if response.status_code < 500:
+                    # A retry sees the writes and their response, or neither
+                    IdempotencyKey.objects.filter(pk=record.pk).update(
+                        status_code=response.status_code, response=response.data
+                    )
+        except Exception:
+            IdempotencyKey.objects.filter(pk=record.pk).delete()
+            raise
+        finally:
+            heartbeat.stop()
+
+        if response.status_code >= 500:
+            IdempotencyKey.objects.filter(pk=record.pk).delete()
+        return response
+
+    return wrapper
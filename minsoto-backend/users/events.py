@@ -0,0 +1,182 @@
+import asyncio
+import json
+import logging
+import select
+import threading
+from collections import defaultdict
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, connections, transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import HabitStreak, HabitLog, Task
+
+logger = logging.getLogger(__name__)
+
+# Postgres NOTIFY channel shared by every worker process
+NOTIFY_CHANNEL = 'minsoto_events'
+
+# Events buffered per connected client before the oldest ones are dropped
+CLIENT_QUEUE_SIZE = 100
+
+# Fields pushed in delta events; heavy fields (descriptions, notes) stay out
+EVENT_FIELDS = {
+    Task: ('title', 'status', 'priority', 'due_date', 'is_public', 'updated_at'),
+    HabitStreak: ('name', 'current_streak', 'longest_streak', 'is_public', 'updated_at'),
+    HabitLog: ('habit_id', 'date', 'completed'),
+}
+
+EVENT_NAMES = {
+    Task: 'task',
+    HabitStreak: 'habit',
+    HabitLog: 'habit_log',
+}
+
+
+class EventBroker:
+    """In-process pub/sub that fans change events out to SSE clients.
+
+    Subscribers are asyncio queues owned by the event loop serving the
+    stream. ``dispatch`` may be called from any thread (signal handlers,
+    the NOTIFY listener) and hands events over with ``call_soon_threadsafe``.
+    """
+
+    def __init__(self):
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+        self._listener = None
+
+    def subscribe(self, user_id):
+        queue = asyncio.Queue(maxsize=CLIENT_QUEUE_SIZE)
+        entry = (asyncio.get_running_loop(), queue)
+        with self._lock:
+            self._subscribers[str(user_id)].add(entry)
+        if uses_notify():
+            self._ensure_listener()
+        return entry
+
+    def unsubscribe(self, user_id, entry):
+        with self._lock:
+            subscribers = self._subscribers.get(str(user_id))
+            if subscribers is not None:
+                subscribers.discard(entry)
+                if not subscribers:
+                    del self._subscribers[str(user_id)]
+
+    def dispatch(self, user_id, event):
+        with self._lock:
+            targets = list(self._subscribers.get(str(user_id), ()))
+        for loop, queue in targets:
+            try:
+                loop.call_soon_threadsafe(self._put, queue, event)
+            except RuntimeError:
+                # Loop already closed; the stream's finally block cleans up
+                pass
+
+    @staticmethod
+    def _put(queue, event):
+        if queue.full():
+            queue.get_nowait()
+        queue.put_nowait(event)
+
+    def _ensure_listener(self):
+        with self._lock:
+            if self._listener is not None and self._listener.is_alive():
+                return
+            self._listener = threading.Thread(
+                target=self._listen, name='minsoto-events-listener', daemon=True
+            )
+            self._listener.start()
+
+    def _listen(self):
+        """Relay Postgres notifications from other workers to local clients."""
+        while True:
+            conn = connections.create_connection('default')
+            try:
+                conn.ensure_connection()
+                conn.set_autocommit(True)
+                raw = conn.connection
+                with raw.cursor() as cursor:
+                    cursor.execute(f'LISTEN {NOTIFY_CHANNEL}')
+                while True:
+                    if select.select([raw], [], [], 30) == ([], [], []):
+                        continue
+                    raw.poll()
+                    while raw.notifies:
+                        notify = raw.notifies.pop(0)
+                        message = json.loads(notify.payload)
+                        self.dispatch(message['user_id'], message['event'])
+            except Exception:
+                logger.exception('Event listener lost its connection, reconnecting')
+            finally:
+                conn.close()
+            threading.Event().wait(5)
+
+
+broker = EventBroker()
+
+
+def uses_notify():
+    return connection.vendor == 'postgresql'
+
+
+def publish(user_id, event):
+    """Deliver an event to the user's streams once the transaction commits."""
+    if uses_notify():
+        payload = json.dumps(
+            {'user_id': str(user_id), 'event': event}, cls=DjangoJSONEncoder
+        )
+
+        def notify():
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT pg_notify(%s, %s)', [NOTIFY_CHANNEL, payload])
+
+        transaction.on_commit(notify)
+    else:
+        event = json.loads(json.dumps(event, cls=DjangoJSONEncoder))
+        transaction.on_commit(lambda: broker.dispatch(user_id, event))
+
+
+def build_event(instance, action):
+    model = type(instance)
+    event = {
+        'type': f'{EVENT_NAMES[model]}.{action}',
+        'id': str(instance.pk),
+    }
+    if action != 'deleted':
+        event['data'] = {field: getattr(instance, field) for field in EVENT_FIELDS[model]}
+    elif model is HabitLog:
+        event['data'] = {'habit_id': instance.habit_id}
+    return event
+
+
+def owner_id(instance):
+    if isinstance(instance, HabitLog):
+        return HabitStreak.all_objects.filter(pk=instance.habit_id).values_list('user_id', flat=True).first()
+    return instance.user_id
+
+
+@receiver(post_save, sender=Task)
+@receiver(post_save, sender=HabitStreak)
+@receiver(post_save, sender=HabitLog)
+def publish_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    user_id = owner_id(instance)
+    if user_id is None:
+        return
+    if getattr(instance, 'deleted_at', None):
+        action = 'deleted'
+    else:
+        action = 'created' if created else 'updated'
+    publish(user_id, build_event(instance, action))
+
+
+@receiver(post_delete, sender=Task)
+@receiver(post_delete, sender=HabitStreak)
+@receiver(post_delete, sender=HabitLog)
+def publish_deleted(sender, instance, **kwargs):
+    user_id = owner_id(instance)
+    if user_id is not None:
+        publish(user_id, build_event(instance, 'deleted'))
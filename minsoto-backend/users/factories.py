@@ -0,0 +1,104 @@
+"""Bulk fixture builders for tests and benchmark commands.
+
+Every builder inserts with ``bulk_create``, so a whole fixture graph costs a
+handful of queries however large it is. Names and emails carry a random
+suffix rather than a shared counter, so graphs built concurrently (parallel
+test workers, benchmarks against a live database) never collide.
+
+``bulk_create`` skips signals: profiles are created here explicitly, and no
+change-log rows, events or leaderboard updates are produced for seeded rows.
+"""
+import uuid
+from datetime import date, timedelta
+
+from django.contrib.auth.hashers import make_password
+
+from .models import CustomUser, HabitLog, HabitStreak, Interest, Profile, Task, UserInterest
+
+# Computed once; hashing a password per seeded user would dominate seeding
+UNUSABLE_PASSWORD = make_password(None)
+
+
+def unique_suffix():
+    return uuid.uuid4().hex[:10]
+
+
+def make_users(count, prefix='user', **fields):
+    """``count`` users with profiles, setup complete unless overridden"""
+    users = [
+        CustomUser(
+            email=f'{prefix}-{suffix}@example.com',
+            username=f'{prefix}-{suffix}',
+            password=UNUSABLE_PASSWORD,
+            **{'is_setup_complete': True, **fields},
+        )
+        for suffix in (unique_suffix() for _ in range(count))
+    ]
+    CustomUser.objects.bulk_create(users)
+    Profile.objects.bulk_create([Profile(user=user) for user in users])
+    return users
+
+
+def make_user(prefix='user', **fields):
+    return make_users(1, prefix, **fields)[0]
+
+
+def make_interests(count, prefix='Interest'):
+    suffix = unique_suffix()
+    return Interest.objects.bulk_create([
+        Interest(name=f'{prefix} {suffix} {i}') for i in range(count)
+    ])
+
+
+def add_interests(user, interests, is_public=True):
+    return UserInterest.objects.bulk_create([
+        UserInterest(user=user, interest=interest, is_public=is_public) for interest in interests
+    ])
+
+
+def make_tasks(user, count, **fields):
+    """Tasks cycling through every status and priority"""
+    statuses = [choice for choice, _ in Task.STATUS_CHOICES]
+    priorities = [choice for choice, _ in Task.PRIORITY_CHOICES]
+    return Task.objects.bulk_create([
+        Task(**{
+            'user': user,
+            'title': f'Task {i}',
+            'description': 'Seeded task ' * 4,
+            'status': statuses[i % len(statuses)],
+            'priority': priorities[i % len(priorities)],
+            **fields,
+        })
+        for i in range(count)
+    ], batch_size=1000)
+
+
+def make_habits(user, count, logs=0, **fields):
+    """Habits with ``logs`` daily logs each, ending today"""
+    habits = HabitStreak.objects.bulk_create([
+        HabitStreak(**{
+            'user': user,
+            'name': f'Habit {i}',
+            'current_streak': i,
+            'longest_streak': i * 2,
+            **fields,
+        })
+        for i in range(count)
+    ])
+    if logs:
+        today = date.today()
+        HabitLog.objects.bulk_create([
+            HabitLog(habit=habit, date=today - timedelta(days=day), completed=day % 3 != 0)
+            for habit in habits
+            for day in range(logs)
+        ], batch_size=1000)
+    return habits
+
+
+def make_dashboard(user=None, tasks=200, habits=20, logs=30, interests=10):
+    """A user with a populated dashboard: tasks, logged habits and interests"""
+    user = user or make_user()
+    make_tasks(user, tasks)
+    make_habits(user, habits, logs=logs)
+    add_interests(user, make_interests(interests))
+    return user
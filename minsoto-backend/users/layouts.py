@@ -0,0 +1,131 @@
+import json
+
+from django.conf import settings
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+WIDGET_TYPES = frozenset({'interests', 'tasks', 'habits', 'stats', 'bio'})
+VISIBILITIES = frozenset({'public', 'private'})
+WIDGET_KEYS = frozenset({'id', 'type', 'position', 'size', 'visibility', 'config'})
+REQUIRED_KEYS = frozenset({'id', 'type', 'position', 'size', 'visibility'})
+
+GRID_COLUMNS = 12
+MAX_ROWS = 200
+MAX_WIDGET_HEIGHT = 24
+MAX_ID_LENGTH = 64
+
+
+def compact_size(value):
+    """Length of ``value`` serialized as compact JSON"""
+    if orjson is not None:
+        try:
+            return len(orjson.dumps(value))
+        except TypeError:
+            pass
+    return len(json.dumps(value, separators=(',', ':')))
+
+
+def compile_layout_validator(max_widgets=None, max_bytes=None, max_config_bytes=None):
+    """Build a validator for Profile.layout with every limit bound up front.
+
+    The returned function checks a whole layout in a single pass over the
+    widgets and returns a list of error strings (empty when valid), so the
+    per-call cost is just the walk itself.
+    """
+    max_widgets = max_widgets or settings.LAYOUT_MAX_WIDGETS
+    max_bytes = max_bytes or settings.LAYOUT_MAX_BYTES
+    max_config_bytes = max_config_bytes or settings.WIDGET_CONFIG_MAX_BYTES
+
+    def is_int(value, low, high):
+        return type(value) is int and low <= value <= high
+
+    def validate(layout):
+        if not isinstance(layout, dict):
+            return ["Layout must be a JSON object."]
+        if set(layout) != {'widgets'}:
+            return ["Layout must contain only a 'widgets' key."]
+        widgets = layout['widgets']
+        if not isinstance(widgets, list):
+            return ["'widgets' must be an array."]
+        if len(widgets) > max_widgets:
+            return [f"A layout can have at most {max_widgets} widgets."]
+        total_size = compact_size(layout)
+        if total_size > max_bytes:
+            return [f"Layout cannot exceed {max_bytes} bytes."]
+        # No single config can be over the cap if the whole layout is not
+        check_configs = total_size > max_config_bytes
+
+        errors = []
+        seen_ids = set()
+        for index, widget in enumerate(widgets):
+            if not isinstance(widget, dict):
+                errors.append(f"widgets[{index}] must be an object.")
+                continue
+
+            keys = widget.keys()
+            if not keys <= WIDGET_KEYS:
+                unknown = ', '.join(sorted(keys - WIDGET_KEYS))
+                errors.append(f"widgets[{index}] has unknown keys: {unknown}.")
+            if not keys >= REQUIRED_KEYS:
+                missing = ', '.join(sorted(REQUIRED_KEYS - keys))
+                errors.append(f"widgets[{index}] is missing: {missing}.")
+                continue
+
+            widget_id = widget['id']
+            if not isinstance(widget_id, str) or not 0 < len(widget_id) <= MAX_ID_LENGTH:
+                errors.append(f"widgets[{index}].id must be a non-empty string of at most {MAX_ID_LENGTH} characters.")
+            elif widget_id in seen_ids:
+                errors.append(f"widgets[{index}].id '{widget_id}' is duplicated.")
+            else:
+                seen_ids.add(widget_id)
+
+            # Membership tests on a list or object value would raise TypeError
+            if not isinstance(widget['type'], str) or widget['type'] not in WIDGET_TYPES:
+                errors.append(f"widgets[{index}].type must be one of {', '.join(sorted(WIDGET_TYPES))}.")
+            if not isinstance(widget['visibility'], str) or widget['visibility'] not in VISIBILITIES:
+                errors.append(f"widgets[{index}].visibility must be 'public' or 'private'.")
+
+            position, size = widget['position'], widget['size']
+            if not (isinstance(position, dict) and position.keys() == {'x', 'y'}
+                    and is_int(position['x'], 0, GRID_COLUMNS - 1)
+                    and is_int(position['y'], 0, MAX_ROWS)):
+                errors.append(f"widgets[{index}].position must be {{x: 0-{GRID_COLUMNS - 1}, y: 0-{MAX_ROWS}}}.")
+            elif not (isinstance(size, dict) and size.keys() == {'w', 'h'}
+                      and is_int(size['w'], 1, GRID_COLUMNS - position['x'])
+                      and is_int(size['h'], 1, MAX_WIDGET_HEIGHT)):
+                errors.append(f"widgets[{index}].size must be {{w, h}} and fit within the {GRID_COLUMNS}-column grid.")
+
+            config = widget.get('config', {})
+            if not isinstance(config, dict):
+                errors.append(f"widgets[{index}].config must be an object.")
+            elif check_configs and config and compact_size(config) > max_config_bytes:
+                errors.append(f"widgets[{index}].config cannot exceed {max_config_bytes} bytes.")
+
+        return errors
+
+    return validate
+
+
+def public_projection(layout):
+    """The part of a layout visitors may see: public widgets only"""
+    if not isinstance(layout, dict) or not isinstance(layout.get('widgets'), list):
+        return {}
+    return {
+        'widgets': [
+            widget for widget in layout['widgets']
+            if isinstance(widget, dict) and widget.get('visibility') == 'public'
+        ]
+    }
+
+
+_validator = None
+
+
+def validate_layout(layout):
+    global _validator
+    if _validator is None:
+        _validator = compile_layout_validator()
+    return _validator(layout)
@@ -0,0 +1,246 @@
+import functools
+import importlib.util
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import HabitStreak, UserInterest
+
+GLOBAL_BOARD = 'leaderboard:streaks'
+
+
+def interest_board(interest_id):
+    return f'{GLOBAL_BOARD}:interest:{interest_id}'
+
+
+class DatabaseRanking:
+    """Ranking served by the (is_public, current_streak) index.
+
+    Top-N is an index scan, but a rank counts every habit above the one
+    asked about, which is O(n). Only for development and tests without
+    Redis; production requires Redis (see users.checks).
+    """
+
+    def public_habits(self, interest_id=None):
+        habits = HabitStreak.objects.filter(is_public=True)
+        if interest_id is not None:
+            habits = habits.filter(
+                user__user_interests__interest_id=interest_id,
+                user__user_interests__is_public=True,
+            )
+        return habits
+
+    def top(self, limit, interest_id=None):
+        return list(
+            self.public_habits(interest_id)
+            .order_by('-current_streak', '-id')
+            .values_list('id', 'current_streak')[:limit]
+        )
+
+    def rank(self, habit, interest_id=None):
+        # Same tie-break as Redis: equal scores rank by member, descending
+        ahead = self.public_habits(interest_id).filter(
+            Q(current_streak__gt=habit.current_streak)
+            | Q(current_streak=habit.current_streak, id__gt=habit.id)
+        )
+        return ahead.count() + 1
+
+    def update(self, habit, interest_ids):
+        pass
+
+    def remove(self, habit_id, interest_ids):
+        pass
+
+    def rebuild(self):
+        pass
+
+
+class RedisRanking:
+    """Ranking kept in Redis sorted sets, updated in O(log n) per change.
+
+    One set holds every public habit; one set per interest holds the public
+    habits of users who list that interest publicly.
+    """
+
+    def __init__(self, url):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+
+    def top(self, limit, interest_id=None):
+        board = GLOBAL_BOARD if interest_id is None else interest_board(interest_id)
+        return [
+            (member.decode(), int(score))
+            for member, score in self.client.zrevrange(board, 0, limit - 1, withscores=True)
+        ]
+
+    def rank(self, habit, interest_id=None):
+        board = GLOBAL_BOARD if interest_id is None else interest_board(interest_id)
+        rank = self.client.zrevrank(board, str(habit.id))
+        return None if rank is None else rank + 1
+
+    def update(self, habit, interest_ids):
+        mapping = {str(habit.id): habit.current_streak}
+        with self.client.pipeline() as pipe:
+            pipe.zadd(GLOBAL_BOARD, mapping)
+            for interest_id in interest_ids:
+                pipe.zadd(interest_board(interest_id), mapping)
+            pipe.execute()
+
+    def remove(self, habit_id, interest_ids):
+        with self.client.pipeline() as pipe:
+            pipe.zrem(GLOBAL_BOARD, str(habit_id))
+            for interest_id in interest_ids:
+                pipe.zrem(interest_board(interest_id), str(habit_id))
+            pipe.execute()
+
+    def rebuild(self):
+        boards = {}
+        public = UserInterest.objects.filter(is_public=True).values_list('user_id', 'interest_id')
+        interests_by_user = {}
+        for user_id, interest_id in public:
+            interests_by_user.setdefault(user_id, []).append(interest_id)
+
+        habits = HabitStreak.objects.filter(is_public=True).values_list('id', 'user_id', 'current_streak')
+        for habit_id, user_id, streak in habits.iterator():
+            boards.setdefault(GLOBAL_BOARD, {})[str(habit_id)] = streak
+            for interest_id in interests_by_user.get(user_id, ()):
+                boards.setdefault(interest_board(interest_id), {})[str(habit_id)] = streak
+
+        with self.client.pipeline() as pipe:
+            for key in self.client.scan_iter(f'{GLOBAL_BOARD}*'):
+                pipe.delete(key)
+            for key, mapping in boards.items():
+                pipe.zadd(key, mapping)
+            pipe.execute()
+
+
+_ranking = None
+
+
+def get_ranking():
+    global _ranking
+    if _ranking is None:
+        if settings.LEADERBOARD_REDIS_URL and importlib.util.find_spec('redis'):
+            _ranking = RedisRanking(settings.LEADERBOARD_REDIS_URL)
+        else:
+            _ranking = DatabaseRanking()
+    return _ranking
+
+
+def leaderboard(user, limit, interest_id=None):
+    """Top ``limit`` public habits plus the user's best-ranked public habit"""
+    ranking = get_ranking()
+    top = ranking.top(limit, interest_id)
+
+    habits = HabitStreak.objects.filter(id__in=[habit_id for habit_id, _ in top]).select_related('user')
+    habits = {str(habit.id): habit for habit in habits}
+
+    results = []
+    for position, (habit_id, streak) in enumerate(top, start=1):
+        habit = habits.get(str(habit_id))
+        if habit is None:
+            continue
+        results.append({
+            'rank': position,
+            'habit_id': habit.id,
+            'habit_name': habit.name,
+            'username': habit.user.username,
+            'current_streak': streak,
+        })
+
+    me = None
+    best = HabitStreak.objects.filter(user=user, is_public=True).order_by('-current_streak', '-id').first()
+    on_board = interest_id is None or UserInterest.objects.filter(
+        user=user, interest_id=interest_id, is_public=True
+    ).exists()
+    if best is not None and on_board:
+        rank = ranking.rank(best, interest_id)
+        if rank is not None:
+            me = {
+                'rank': rank,
+                'habit_id': best.id,
+                'habit_name': best.name,
+                'current_streak': best.current_streak,
+            }
+
+    return {'results': results, 'me': me}
+
+
+def public_interest_ids(user_id):
+    return list(
+        UserInterest.objects.filter(user_id=user_id, is_public=True).values_list('interest_id', flat=True)
+    )
+
+
+def remove_habits(habits):
+    """Take (habit id, user id) pairs off every board once the transaction commits"""
+    ranking = get_ranking()
+    if isinstance(ranking, DatabaseRanking) or not habits:
+        return
+    interest_ids = {}
+    rows = UserInterest.objects.filter(user_id__in={user_id for _, user_id in habits})
+    for user_id, interest_id in rows.values_list('user_id', 'interest_id'):
+        interest_ids.setdefault(user_id, []).append(interest_id)
+
+    def remove():
+        for habit_id, user_id in habits:
+            ranking.remove(habit_id, interest_ids.get(user_id, []))
+
+    transaction.on_commit(remove)
+
+
+def sync_habit_rank(habit_id):
+    """Put a habit's committed state on the boards, or take it off them"""
+    ranking = get_ranking()
+    habit = HabitStreak.all_objects.filter(pk=habit_id).first()
+    if habit is not None and habit.is_public and habit.deleted_at is None:
+        ranking.update(habit, public_interest_ids(habit.user_id))
+    else:
+        interest_ids = [] if habit is None else public_interest_ids(habit.user_id)
+        ranking.remove(habit_id, interest_ids)
+
+
+def sync_interest_board(user_id, interest_id):
+    """List or unlist a user's public habits on one interest board"""
+    ranking = get_ranking()
+    listed = UserInterest.objects.filter(user_id=user_id, interest_id=interest_id, is_public=True).exists()
+    board = interest_board(interest_id)
+    habits = HabitStreak.objects.filter(user_id=user_id, is_public=True).values_list('id', 'current_streak')
+    with ranking.client.pipeline() as pipe:
+        for habit_id, streak in habits:
+            if listed:
+                pipe.zadd(board, {str(habit_id): streak})
+            else:
+                pipe.zrem(board, str(habit_id))
+        pipe.execute()
+
+
+# Redis is only written once the change commits, from the committed rows, so
+# a rolled-back transaction leaves no score behind
+
+@receiver(post_save, sender=HabitStreak)
+def update_habit_rank(sender, instance, raw=False, **kwargs):
+    if raw or isinstance(get_ranking(), DatabaseRanking):
+        return
+    transaction.on_commit(functools.partial(sync_habit_rank, instance.pk))
+
+
+@receiver(post_delete, sender=HabitStreak)
+def remove_habit_rank(sender, instance, **kwargs):
+    ranking = get_ranking()
+    if not isinstance(ranking, DatabaseRanking):
+        # Read now: the user's interests may be deleted in the same transaction
+        interest_ids = public_interest_ids(instance.user_id)
+        transaction.on_commit(functools.partial(ranking.remove, instance.pk, interest_ids))
+
+
+@receiver(post_save, sender=UserInterest)
+@receiver(post_delete, sender=UserInterest)
+def update_interest_board(sender, instance, raw=False, **kwargs):
+    if raw or isinstance(get_ranking(), DatabaseRanking):
+        return
+    transaction.on_commit(functools.partial(sync_interest_board, instance.user_id, instance.interest_id))
@@ -0,0 +1,38 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from users.archive import archive_habit_logs, archive_tasks, purge_soft_deleted
+
+
+class Command(BaseCommand):
+    help = 'Move old completed tasks and habit logs to archive storage and purge soft-deleted rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--task-days', type=int, default=settings.ARCHIVE_TASK_DAYS,
+                            help='Archive completed tasks not updated for this many days')
+        parser.add_argument('--log-days', type=int, default=settings.ARCHIVE_LOG_DAYS,
+                            help='Archive habit logs older than this many days')
+        parser.add_argument('--retention-days', type=int, default=settings.SOFT_DELETE_RETENTION_DAYS,
+                            help='Purge rows soft-deleted more than this many days ago')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+
+        tasks = archive_tasks(now - timedelta(days=options['task_days']), options['batch_size'])
+        self.stdout.write(f'Archived {tasks} completed tasks')
+
+        logs = archive_habit_logs(
+            (now - timedelta(days=options['log_days'])).date(), options['batch_size']
+        )
+        self.stdout.write(f'Archived {logs} habit logs')
+
+        purged_tasks, purged_habits = purge_soft_deleted(
+            now - timedelta(days=options['retention_days']), options['batch_size']
+        )
+        self.stdout.write(f'Purged {purged_tasks} tasks (including occurrences) and {purged_habits} habits')
+
+        self.stdout.write(self.style.SUCCESS('Archival complete.'))
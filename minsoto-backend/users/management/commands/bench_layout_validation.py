@@ -0,0 +1,44 @@
+import time
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+
+from users.layouts import GRID_COLUMNS, MAX_ROWS, compile_layout_validator
+
+
+def make_layout(count):
+    return {
+        'widgets': [
+            {
+                'id': str(uuid.uuid4()),
+                'type': ('interests', 'tasks', 'habits', 'stats', 'bio')[i % 5],
+                'position': {'x': (i * 3) % GRID_COLUMNS, 'y': (i // 4) % MAX_ROWS},
+                'size': {'w': 3, 'h': 2},
+                'visibility': 'public' if i % 2 else 'private',
+                'config': {'title': f'Widget {i}', 'limit': 5},
+            }
+            for i in range(count)
+        ]
+    }
+
+
+class Command(BaseCommand):
+    help = 'Report layout validation cost for 1, 50 and 500 widgets'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        # Limits raised so the 500-widget case measures a full pass
+        validate = compile_layout_validator(max_widgets=1000, max_bytes=1024 * 1024)
+        for count in (1, 50, 500):
+            layout = make_layout(count)
+            errors = validate(layout)
+            if errors:
+                raise CommandError(f'Generated layout is invalid: {errors[:3]}')
+            iterations = max(options['iterations'] // max(count // 10, 1), 10)
+            start = time.perf_counter()
+            for _ in range(iterations):
+                validate(layout)
+            elapsed = (time.perf_counter() - start) / iterations
+            self.stdout.write(f'{count:4d} widgets  {elapsed * 1e6:10.1f} us/validation')
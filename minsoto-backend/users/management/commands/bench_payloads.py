@@ -0,0 +1,73 @@
+import gzip
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from users.middleware import brotli
+from users.factories import make_dashboard, make_user
+from users.models import Profile
+from users.renderers import FastJSONRenderer, orjson
+from users.serializers import (
+    HabitStreakSerializer,
+    ProfileDetailSerializer,
+    TaskSerializer,
+    UserInterestSerializer,
+)
+
+
+class Command(BaseCommand):
+    help = 'Report encode time and bytes on the wire for seeded dashboard payloads'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tasks', type=int, default=200)
+        parser.add_argument('--habits', type=int, default=20)
+        parser.add_argument('--interests', type=int, default=10)
+        parser.add_argument('--iterations', type=int, default=50)
+
+    def handle(self, *args, **options):
+        # Seed inside a transaction that is always rolled back
+        with transaction.atomic():
+            user = self.seed(options)
+            payloads = {
+                'widget_data': {
+                    'habits': HabitStreakSerializer(user.habits.all(), many=True).data,
+                    'tasks': TaskSerializer(user.tasks.all(), many=True).data,
+                    'interests': UserInterestSerializer(user.user_interests.all(), many=True).data,
+                },
+                'profile_detail': {
+                    'profile': ProfileDetailSerializer(Profile.objects.get(user=user)).data,
+                    'is_owner': True,
+                },
+            }
+            transaction.set_rollback(True)
+
+        renderers = [('stdlib', JSONRenderer())]
+        if orjson is not None:
+            renderers.append(('orjson', FastJSONRenderer()))
+        else:
+            self.stdout.write('orjson not installed; FastJSONRenderer falls back to stdlib')
+
+        for name, data in payloads.items():
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            for label, renderer in renderers:
+                start = time.perf_counter()
+                for _ in range(options['iterations']):
+                    body = renderer.render(data)
+                elapsed = (time.perf_counter() - start) / options['iterations']
+                self.stdout.write(f'  encode {label:<7} {elapsed * 1000:8.3f} ms')
+
+            self.stdout.write(f'  identity       {len(body):8d} bytes')
+            self.stdout.write(f'  gzip           {len(gzip.compress(body, 6)):8d} bytes')
+            if brotli is not None:
+                self.stdout.write(f'  br             {len(brotli.compress(body, quality=5)):8d} bytes')
+
+    def seed(self, options):
+        return make_dashboard(
+            make_user(prefix='bench'),
+            tasks=options['tasks'],
+            habits=options['habits'],
+            logs=30,
+            interests=options['interests'],
+        )
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from users.account_deletion import run_deletion
+from users.models import AccountDeletion, CustomUser
+
+
+class Command(BaseCommand):
+    help = 'Delete accounts flagged for deletion, resuming interrupted or failed background runs'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--email', help='Delete this account now, flagged or not')
+        parser.add_argument('--batch-size', type=int, default=None)
+
+    def handle(self, *args, **options):
+        if options['email']:
+            users = CustomUser.objects.filter(email=options['email'])
+            if not users.exists():
+                raise CommandError(f"No user with email {options['email']}")
+        else:
+            users = CustomUser.objects.filter(deletion_requested_at__isnull=False)
+
+        for user_id, email in users.values_list('pk', 'email'):
+            job = (
+                AccountDeletion.objects.filter(user_id=user_id).exclude(status=AccountDeletion.DONE).first()
+                or AccountDeletion.objects.create(user_id=user_id)
+            )
+            self.stdout.write(f'Deleting {email}')
+
+            def report(step, deleted):
+                self.stdout.write(f'  {step}: {deleted}')
+
+            deleted = run_deletion(job.pk, options['batch_size'], on_progress=report, retry_failed=True)
+            if deleted is None:
+                self.stdout.write(f'  Skipped: job {job.pk} is running in another process')
+                continue
+            self.stdout.write(self.style.SUCCESS(
+                f'Deleted {email} ({sum(deleted.values())} dependent rows)'
+            ))
@@ -0,0 +1,55 @@
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from users.partitions import (
+    add_months, create_partition, detach_partition, drop_table, is_partitioned,
+    month_start, months_between, partition_rows, partitions,
+)
+
+
+class Command(BaseCommand):
+    help = 'Create upcoming monthly HabitLog partitions and detach ones past the archive cutoff'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ahead', type=int, default=settings.HABITLOG_PARTITIONS_AHEAD,
+                            help='Months of partitions to keep ready beyond the current one')
+        parser.add_argument('--detach-days', type=int, default=settings.ARCHIVE_LOG_DAYS,
+                            help='Detach partitions whose whole month is older than this many days')
+        parser.add_argument('--force', action='store_true',
+                            help='Detach partitions even if archive_data has not emptied them')
+        parser.add_argument('--drop', action='store_true',
+                            help='Drop partitions after detaching them instead of keeping the tables')
+
+    def handle(self, *args, **options):
+        if not is_partitioned():
+            self.stdout.write('HabitLog is not partitioned on this database; nothing to do.')
+            return
+
+        this_month = month_start(date.today())
+        cutoff = month_start(date.today() - timedelta(days=options['detach_days']))
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            for month in months_between(this_month, add_months(this_month, options['ahead'])):
+                if create_partition(cursor, month):
+                    self.stdout.write(f'Created partition for {month:%Y-%m}')
+
+            for name, (start, end) in sorted(partitions(cursor).items(), key=lambda item: item[1]):
+                if end > cutoff:
+                    continue
+                rows = partition_rows(cursor, name)
+                if rows and not options['force']:
+                    self.stdout.write(self.style.WARNING(
+                        f'Kept {name}: {rows} rows not archived yet (run archive_data or pass --force)'
+                    ))
+                    continue
+                detach_partition(cursor, name)
+                if options['drop']:
+                    drop_table(cursor, name)
+                    self.stdout.write(f'Detached and dropped {name} ({rows} rows)')
+                else:
+                    self.stdout.write(f'Detached {name} ({rows} rows)')
+
+        self.stdout.write(self.style.SUCCESS('Partition maintenance complete.'))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from users.leaderboard import DatabaseRanking, get_ranking
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the streak leaderboard sorted sets from the database'
+
+    def handle(self, *args, **options):
+        ranking = get_ranking()
+        if isinstance(ranking, DatabaseRanking):
+            self.stdout.write('Leaderboards are served from the database index; nothing to rebuild.')
+            return
+        ranking.rebuild()
+        self.stdout.write(self.style.SUCCESS('Leaderboards rebuilt.'))
@@ -0,0 +1,85 @@
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_string
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli is optional
+    brotli = None
+
+
+def parse_accept_encoding(header):
+    """Map each acceptable coding to its q-value, dropping q=0 entries"""
+    codings = {}
+    for part in header.split(','):
+        coding, _, params = part.strip().partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if quality > 0:
+            codings[coding] = quality
+    return codings
+
+
+class CompressionMiddleware:
+    """Content-negotiated brotli/gzip compression for API responses.
+
+    Responses below ``COMPRESSION_MIN_SIZE`` bytes, streaming responses
+    (including the server-sent events stream) and already-encoded
+    responses are passed through untouched.
+
+    Against BREACH, which recovers secrets from compressed sizes, paths
+    under ``COMPRESSION_EXCLUDED_PATHS`` (the endpoints that return tokens)
+    are never compressed, and gzip output carries up to
+    ``COMPRESSION_GZIP_MAX_RANDOM_BYTES`` random bytes in its header, as
+    Django's GZipMiddleware does.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+
+        if response.streaming or response.has_header('Content-Encoding'):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+
+        if len(response.content) < settings.COMPRESSION_MIN_SIZE:
+            return response
+        if request.path.startswith(settings.COMPRESSION_EXCLUDED_PATHS):
+            return response
+
+        accepted = parse_accept_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if brotli is not None and 'br' in accepted and accepted['br'] >= accepted.get('gzip', 0):
+            content = brotli.compress(response.content, quality=settings.COMPRESSION_BROTLI_QUALITY)
+            encoding = 'br'
+        elif 'gzip' in accepted:
+            content = compress_string(
+                response.content, max_random_bytes=settings.COMPRESSION_GZIP_MAX_RANDOM_BYTES
+            )
+            encoding = 'gzip'
+        else:
+            return response
+
+        if len(content) >= len(response.content):
+            return response
+
+        response.content = content
+        response['Content-Length'] = str(len(content))
+        response['Content-Encoding'] = encoding
+
+        # Weaken a strong ETag; the compressed bytes differ from the original
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+
+        return response
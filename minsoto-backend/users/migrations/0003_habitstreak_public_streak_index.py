@@ -0,0 +1,17 @@
+# Generated by Django 5.2.6 on 2026-10-19 16:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_changelog'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='habitstreak',
+            index=models.Index(fields=['is_public', '-current_streak'], name='users_habit_is_publ_3c41c3_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.6 on 2026-10-19 16:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_habitstreak_public_streak_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['user', 'status'], name='users_task_user_id_7b9210_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['user', 'due_date'], name='users_task_user_id_448d0e_idx'),
+        ),
+    ]
@@ -0,0 +1,68 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+
+SEARCH_INDEX_NAME = 'users_task_search_idx'
+
+SQLITE_FTS = [
+    "CREATE VIRTUAL TABLE users_task_fts USING fts5("
+    "title, description, content='users_task', content_rowid='rowid')",
+    "CREATE TRIGGER users_task_fts_ai AFTER INSERT ON users_task BEGIN "
+    "INSERT INTO users_task_fts(rowid, title, description) "
+    "VALUES (new.rowid, new.title, new.description); END",
+    "CREATE TRIGGER users_task_fts_ad AFTER DELETE ON users_task BEGIN "
+    "INSERT INTO users_task_fts(users_task_fts, rowid, title, description) "
+    "VALUES ('delete', old.rowid, old.title, old.description); END",
+    "CREATE TRIGGER users_task_fts_au AFTER UPDATE OF title, description ON users_task BEGIN "
+    "INSERT INTO users_task_fts(users_task_fts, rowid, title, description) "
+    "VALUES ('delete', old.rowid, old.title, old.description); "
+    "INSERT INTO users_task_fts(rowid, title, description) "
+    "VALUES (new.rowid, new.title, new.description); END",
+    "INSERT INTO users_task_fts(users_task_fts) VALUES ('rebuild')",
+]
+
+SQLITE_FTS_DROP = [
+    "DROP TRIGGER IF EXISTS users_task_fts_ai",
+    "DROP TRIGGER IF EXISTS users_task_fts_ad",
+    "DROP TRIGGER IF EXISTS users_task_fts_au",
+    "DROP TABLE IF EXISTS users_task_fts",
+]
+
+
+def search_index(Task):
+    # Must match users.task_queries.search_vector() for the planner to use it
+    return GinIndex(
+        SearchVector('title', 'description', config='english'),
+        name=SEARCH_INDEX_NAME,
+    )
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        Task = apps.get_model('users', 'Task')
+        schema_editor.add_index(Task, search_index(Task))
+    elif vendor == 'sqlite':
+        for statement in SQLITE_FTS:
+            schema_editor.execute(statement)
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        Task = apps.get_model('users', 'Task')
+        schema_editor.remove_index(Task, search_index(Task))
+    elif vendor == 'sqlite':
+        for statement in SQLITE_FTS_DROP:
+            schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_task_query_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.6 on 2026-10-19 16:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0005_task_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='occurrence_date',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='recurrence',
+            field=models.CharField(blank=True, max_length=200),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='recurrence_parent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='occurrences', to='users.task'),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='recurrence_timezone',
+            field=models.CharField(default='UTC', max_length=64),
+        ),
+        migrations.AddConstraint(
+            model_name='task',
+            constraint=models.UniqueConstraint(fields=('recurrence_parent', 'occurrence_date'), name='unique_task_occurrence'),
+        ),
+    ]
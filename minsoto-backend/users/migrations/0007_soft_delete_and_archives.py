@@ -0,0 +1,60 @@
+# Generated by Django 5.2.6 on 2026-10-19 16:42
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0006_task_recurrence'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='habitstreak',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='ArchivedTask',
+            fields=[
+                ('id', models.UUIDField(editable=False, primary_key=True, serialize=False)),
+                ('title', models.CharField(max_length=200)),
+                ('description', models.TextField(blank=True)),
+                ('priority', models.CharField(choices=[('low', 'Low'), ('medium', 'Medium'), ('high', 'High')], max_length=10)),
+                ('due_date', models.DateTimeField(blank=True, null=True)),
+                ('is_public', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField()),
+                ('completed_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_tasks', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-completed_at'],
+                'indexes': [models.Index(fields=['user', '-completed_at'], name='users_archi_user_id_20c080_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='HabitLogArchive',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('year', models.IntegerField()),
+                ('entries', models.IntegerField(default=0)),
+                ('data', models.BinaryField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('habit', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='log_archives', to='users.habitstreak')),
+            ],
+            options={
+                'ordering': ['-year'],
+                'unique_together': {('habit', 'year')},
+            },
+        ),
+    ]
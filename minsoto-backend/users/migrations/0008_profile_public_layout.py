@@ -0,0 +1,41 @@
+# Generated by Django 5.2.6 on 2026-10-19 16:47
+
+from django.db import migrations, models
+
+
+def public_projection(layout):
+    # A copy of users.layouts.public_projection as of this migration, so
+    # later changes to that module cannot change what the backfill does
+    if not isinstance(layout, dict) or not isinstance(layout.get('widgets'), list):
+        return {}
+    return {
+        'widgets': [
+            widget for widget in layout['widgets']
+            if isinstance(widget, dict) and widget.get('visibility') == 'public'
+        ]
+    }
+
+
+def backfill_public_layout(apps, schema_editor):
+    # Historical models skip Profile.save(), so project the layouts here
+    Profile = apps.get_model('users', 'Profile')
+    profiles = list(Profile.objects.only('id', 'layout'))
+    for profile in profiles:
+        profile.public_layout = public_projection(profile.layout)
+    Profile.objects.bulk_update(profiles, ['public_layout'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0007_soft_delete_and_archives'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='public_layout',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.RunPython(backfill_public_layout, migrations.RunPython.noop),
+    ]
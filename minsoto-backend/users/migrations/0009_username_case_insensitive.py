@@ -0,0 +1,19 @@
+# Generated by Django 5.2.6 on 2026-10-19 16:49
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('users', '0008_profile_public_layout'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='customuser',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('username'), name='unique_username_ci'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-19 16:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0009_username_case_insensitive'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='deletion_requested_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,99 @@
+"""Range-partition users_habitlog by month on PostgreSQL.
+
+The SQL is written out here rather than built from users.partitions, so
+later changes to that module cannot change what this migration does.
+
+Both directions copy every row into a new table while holding an ACCESS
+EXCLUSIVE lock on users_habitlog, so reads and writes of habit logs wait
+until the migration commits. Expect roughly the time of one
+``INSERT ... SELECT`` of the whole table.
+"""
+from django.db import migrations
+
+PARTITION = [
+    # Deferred foreign-key checks queued earlier in this transaction would
+    # otherwise block dropping the old table
+    'SET CONSTRAINTS ALL IMMEDIATE',
+    'ALTER TABLE users_habitlog RENAME TO users_habitlog_legacy',
+    'CREATE TABLE users_habitlog (LIKE users_habitlog_legacy INCLUDING DEFAULTS INCLUDING STORAGE) '
+    'PARTITION BY RANGE (date)',
+    'CREATE TABLE users_habitlog_default PARTITION OF users_habitlog DEFAULT',
+    # One partition per month from the oldest log (or this month) through
+    # three months ahead; manage_log_partitions keeps the window rolling
+    """
+    DO $$
+    DECLARE
+        month date;
+    BEGIN
+        FOR month IN
+            SELECT generate_series(
+                date_trunc('month', LEAST(COALESCE(min(date), current_date), current_date)),
+                date_trunc('month', GREATEST(COALESCE(max(date), current_date), current_date + interval '3 months')),
+                interval '1 month'
+            )::date
+            FROM users_habitlog_legacy
+        LOOP
+            EXECUTE format(
+                'CREATE TABLE %I PARTITION OF users_habitlog FOR VALUES FROM (%L) TO (%L)',
+                'users_habitlog_' || to_char(month, 'YYYY_MM'),
+                month,
+                (month + interval '1 month')::date
+            );
+        END LOOP;
+    END
+    $$
+    """,
+    'INSERT INTO users_habitlog SELECT * FROM users_habitlog_legacy',
+    'DROP TABLE users_habitlog_legacy',
+    # Unique constraints on a partitioned table must include the partition key
+    'ALTER TABLE users_habitlog ADD CONSTRAINT users_habitlog_pkey PRIMARY KEY (id, date)',
+    'ALTER TABLE users_habitlog ADD CONSTRAINT users_habitlog_habit_id_date_98110f89_uniq '
+    'UNIQUE (habit_id, date)',
+    'ALTER TABLE users_habitlog ADD CONSTRAINT users_habitlog_habit_id_4f02fd1c_fk_users_habitstreak_id '
+    'FOREIGN KEY (habit_id) REFERENCES users_habitstreak (id) DEFERRABLE INITIALLY DEFERRED',
+    'ANALYZE users_habitlog',
+]
+
+# Back to the plain table 0001 created, with the same constraint and index names
+UNPARTITION = [
+    # Deferred foreign-key checks queued earlier in this transaction would
+    # otherwise block dropping the old table
+    'SET CONSTRAINTS ALL IMMEDIATE',
+    'ALTER TABLE users_habitlog RENAME TO users_habitlog_partitioned',
+    'CREATE TABLE users_habitlog (LIKE users_habitlog_partitioned INCLUDING DEFAULTS INCLUDING STORAGE)',
+    'INSERT INTO users_habitlog SELECT * FROM users_habitlog_partitioned',
+    # Drops every monthly partition and the default partition with it
+    'DROP TABLE users_habitlog_partitioned',
+    'ALTER TABLE users_habitlog ADD CONSTRAINT users_habitlog_pkey PRIMARY KEY (id)',
+    'ALTER TABLE users_habitlog ADD CONSTRAINT users_habitlog_habit_id_date_98110f89_uniq '
+    'UNIQUE (habit_id, date)',
+    'ALTER TABLE users_habitlog ADD CONSTRAINT users_habitlog_habit_id_4f02fd1c_fk_users_habitstreak_id '
+    'FOREIGN KEY (habit_id) REFERENCES users_habitstreak (id) DEFERRABLE INITIALLY DEFERRED',
+    'CREATE INDEX users_habitlog_habit_id_4f02fd1c ON users_habitlog (habit_id)',
+    'ANALYZE users_habitlog',
+]
+
+
+def run_on_postgres(statements):
+    def run(apps, schema_editor):
+        # SQLite and others keep the plain table
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        for statement in statements:
+            schema_editor.execute(statement, params=None)
+    return run
+
+
+partition_habitlog = run_on_postgres(PARTITION)
+unpartition_habitlog = run_on_postgres(UNPARTITION)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0010_account_deletion'),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_habitlog, unpartition_habitlog),
+    ]
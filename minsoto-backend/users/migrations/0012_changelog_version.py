@@ -0,0 +1,46 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_versions(apps, schema_editor):
+    # Ids are increasing per user too, so tokens clients already hold stay valid
+    ChangeLog = apps.get_model('users', 'ChangeLog')
+    ChangeCounter = apps.get_model('users', 'ChangeCounter')
+    ChangeLog.objects.update(version=models.F('id'))
+    ChangeCounter.objects.bulk_create(
+        ChangeCounter(user_id=row['user'], value=row['last'])
+        for row in ChangeLog.objects.values('user').annotate(last=models.Max('id')).order_by()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0011_partition_habitlog'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='changelog',
+            name='version',
+            field=models.BigIntegerField(default=0),
+            preserve_default=False,
+        ),
+        migrations.CreateModel(
+            name='ChangeCounter',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='change_counter', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('value', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(backfill_versions, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name='changelog',
+            name='users_chang_user_id_11302b_idx',
+        ),
+        migrations.AddConstraint(
+            model_name='changelog',
+            constraint=models.UniqueConstraint(fields=('user', 'version'), name='unique_change_version'),
+        ),
+    ]
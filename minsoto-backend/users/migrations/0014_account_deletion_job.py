@@ -0,0 +1,41 @@
+# Generated by Django 5.2.6 on 2026-10-19 17:19
+
+import uuid
+from django.db import migrations, models
+
+
+def schedule_flagged_accounts(apps, schema_editor):
+    # Deletions requested before jobs existed are picked up as stalled jobs
+    CustomUser = apps.get_model('users', 'CustomUser')
+    AccountDeletion = apps.get_model('users', 'AccountDeletion')
+    AccountDeletion.objects.bulk_create(
+        AccountDeletion(user_id=user_id)
+        for user_id in CustomUser.objects.filter(deletion_requested_at__isnull=False).values_list('pk', flat=True)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0013_idempotency_key'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AccountDeletion',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('user_id', models.UUIDField(db_index=True)),
+                ('status', models.CharField(choices=[('scheduled', 'Scheduled'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='scheduled', max_length=10)),
+                ('step', models.CharField(blank=True, max_length=30)),
+                ('deleted', models.JSONField(default=dict)),
+                ('heartbeat_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'heartbeat_at'], name='users_accou_status_f294d4_idx')],
+            },
+        ),
+        migrations.RunPython(schedule_flagged_accounts, migrations.RunPython.noop),
+    ]
@@ -1,22 +1,46 @@
 import uuid
 from django.contrib.auth.models import AbstractUser
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
+from django.db.models.functions import Lower
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 
+from .layouts import public_projection
+
+
+class ActiveManager(models.Manager):
+    """Hides soft-deleted rows; ``all_objects`` still reaches them"""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
 class CustomUser(AbstractUser):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     email = models.EmailField(unique=True)
     google_id = models.CharField(max_length=100, unique=True, null=True, blank=True)
     is_setup_complete = models.BooleanField(default=False)
+    # Set when the user asks to delete their account; the data is removed
+    # in the background and `delete_accounts` resumes interrupted runs
+    deletion_requested_at = models.DateTimeField(null=True, blank=True)
     
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username']
 
+    class Meta(AbstractUser.Meta):
+        constraints = [
+            models.UniqueConstraint(Lower('username'), name='unique_username_ci'),
+        ]
+
     def __str__(self):
         return self.email
 
 
+# Enables username__lower lookups, which the unique_username_ci index serves
+CustomUser._meta.get_field('username').register_lookup(Lower)
+
+
 class Interest(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     name = models.CharField(max_length=100, unique=True)
@@ -50,12 +74,24 @@ class Profile(models.Model):
     #     }
     #   ]
     # }
+    # Public widgets only, derived from layout on save so non-owner reads
+    # never load the private layout
+    public_layout = models.JSONField(default=dict, blank=True, editable=False)
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"{self.user.username}'s Profile"
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        layout_saved = update_fields is None or 'layout' in update_fields
+        if layout_saved and 'layout' not in self.get_deferred_fields():
+            self.public_layout = public_projection(self.layout)
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'public_layout'}
+        super().save(*args, **kwargs)
     
     def get_default_layout(self):
         """Return default layout for new profiles"""
@@ -111,15 +147,22 @@ class HabitStreak(models.Model):
     is_public = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    deleted_at = models.DateTimeField(null=True, blank=True)
+
+    objects = ActiveManager()
+    all_objects = models.Manager()
 
     class Meta:
         ordering = ['-current_streak', '-created_at']
+        indexes = [models.Index(fields=['is_public', '-current_streak'])]
 
     def __str__(self):
         return f"{self.user.username} - {self.name}"
 
 
 class HabitLog(models.Model):
+    # On PostgreSQL the table is range-partitioned by month on `date`
+    # (see users/partitions.py); its primary key there is (id, date)
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     habit = models.ForeignKey(HabitStreak, on_delete=models.CASCADE, related_name='logs')
     date = models.DateField()
@@ -156,11 +199,177 @@ class Task(models.Model):
     priority = models.CharField(max_length=10, choices=PRIORITY_CHOICES, default='medium')
     due_date = models.DateTimeField(null=True, blank=True)
     is_public = models.BooleanField(default=False)
+    # Recurring series: an RRULE subset (see users.recurrence) anchored at
+    # due_date and expanded in recurrence_timezone wall-clock time
+    recurrence = models.CharField(max_length=200, blank=True)
+    recurrence_timezone = models.CharField(max_length=64, default='UTC')
+    # Set on occurrences materialized from a series when completed or edited
+    recurrence_parent = models.ForeignKey(
+        'self', on_delete=models.CASCADE, null=True, blank=True, related_name='occurrences'
+    )
+    occurrence_date = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    deleted_at = models.DateTimeField(null=True, blank=True)
+
+    objects = ActiveManager()
+    all_objects = models.Manager()
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', 'status']),
+            models.Index(fields=['user', 'due_date']),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['recurrence_parent', 'occurrence_date'],
+                name='unique_task_occurrence',
+            ),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.title}"
+
+
+class ChangeLog(models.Model):
+    """Append-only log of row changes; its per-user version is the delta sync token."""
+    ACTION_CHOICES = [
+        ('upsert', 'Created or updated'),
+        ('delete', 'Deleted'),
+    ]
+
+    id = models.BigAutoField(primary_key=True)
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='changes')
+    model = models.CharField(max_length=20)
+    object_id = models.UUIDField()
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES)
+    version = models.BigIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'version'], name='unique_change_version'),
+        ]
+
+    def __str__(self):
+        return f"{self.model} {self.object_id} {self.action} (v{self.version})"
+
+
+class ChangeCounter(models.Model):
+    """Last change-log version handed out for a user.
+
+    Ids are assigned at insert, so two transactions can commit them out of
+    order. Versions are claimed by bumping this row, which stays locked until
+    the claiming transaction commits; a version is therefore never visible
+    before every smaller one.
+    """
+    user = models.OneToOneField(
+        CustomUser, on_delete=models.CASCADE, primary_key=True, related_name='change_counter'
+    )
+    value = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.user_id} @ {self.value}"
+
+
+class ArchivedTask(models.Model):
+    """Completed task moved out of the hot Task table by ``archive_data``"""
+    id = models.UUIDField(primary_key=True, editable=False)
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='archived_tasks')
+    title = models.CharField(max_length=200)
+    description = models.TextField(blank=True)
+    priority = models.CharField(max_length=10, choices=Task.PRIORITY_CHOICES)
+    due_date = models.DateTimeField(null=True, blank=True)
+    is_public = models.BooleanField(default=False)
+    created_at = models.DateTimeField()
+    completed_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-completed_at']
+        indexes = [models.Index(fields=['user', '-completed_at'])]
+
+    def __str__(self):
+        return f"{self.user.username} - {self.title} (archived)"
+
+
+class HabitLogArchive(models.Model):
+    """One habit's logs for one year, stored as a zlib-compressed JSON blob"""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    habit = models.ForeignKey(HabitStreak, on_delete=models.CASCADE, related_name='log_archives')
+    year = models.IntegerField()
+    entries = models.IntegerField(default=0)
+    data = models.BinaryField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ['habit', 'year']
+        ordering = ['-year']
+
+    def __str__(self):
+        return f"{self.habit.name} - {self.year} ({self.entries} logs)"
+
+
+class IdempotencyKey(models.Model):
+    """Stored outcome of a mutating request sent with an Idempotency-Key.
+
+    Kept in the database rather than the cache so a retry that lands on
+    another worker still finds it. ``status_code`` stays null while the
+    first attempt runs; ``locked_until`` lets a retry take over a claim
+    whose worker died.
+    """
+    id = models.BigAutoField(primary_key=True)
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='idempotency_keys')
+    key = models.CharField(max_length=255)
+    fingerprint = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    response = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    locked_until = models.DateTimeField()
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'key'], name='unique_idempotency_key'),
+        ]
+        indexes = [models.Index(fields=['user', 'expires_at'])]
+
+    def __str__(self):
+        return f"{self.user_id} {self.key} ({self.status_code or 'in progress'})"
+
+
+class AccountDeletion(models.Model):
+    """A background account deletion and its progress.
+
+    Its id is the opaque handle clients poll, so progress is never looked
+    up by user id. ``user_id`` is a plain column because the job outlives
+    the user row. ``heartbeat_at`` is refreshed after every batch; a
+    running job whose heartbeat goes stale lost its worker and may be
+    resumed by another.
+    """
+    SCHEDULED = 'scheduled'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (SCHEDULED, 'Scheduled'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user_id = models.UUIDField(db_index=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=SCHEDULED)
+    step = models.CharField(max_length=30, blank=True)
+    deleted = models.JSONField(default=dict)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['status', 'heartbeat_at'])]
+
+    def __str__(self):
+        return f"{self.user_id} ({self.status})"
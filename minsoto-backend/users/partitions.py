@@ -0,0 +1,112 @@
+"""Monthly range partitions of the HabitLog table (PostgreSQL only).
+
+Migration 0011 turns ``users_habitlog`` into a table partitioned by
+``date`` with one partition per month plus a default partition. The primary
+key becomes (id, date), because Postgres requires unique constraints on a
+partitioned table to contain the partition key; the model keeps ``id`` as
+its primary key, which is still unique. On other databases the table stays
+a plain table and these helpers do nothing.
+"""
+from datetime import date
+
+from django.db import connection
+
+TABLE = 'users_habitlog'
+DEFAULT_PARTITION = f'{TABLE}_default'
+
+
+def is_partitioned():
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table WHERE partrelid = %s::regclass", [TABLE]
+        )
+        return cursor.fetchone() is not None
+
+
+def month_start(day):
+    return date(day.year, day.month, 1)
+
+
+def add_months(day, months):
+    index = day.year * 12 + day.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month):
+    return f'{TABLE}_{month:%Y_%m}'
+
+
+def months_between(first, last):
+    """Month starts from ``first`` through ``last`` inclusive"""
+    month = month_start(first)
+    while month <= last:
+        yield month
+        month = add_months(month, 1)
+
+
+def partitions(cursor):
+    """{name: (from, to)} of the monthly partitions currently attached"""
+    cursor.execute(
+        "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) "
+        "FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = %s::regclass",
+        [TABLE],
+    )
+    bounds = {}
+    for name, bound in cursor.fetchall():
+        if name == DEFAULT_PARTITION:
+            continue
+        # FOR VALUES FROM ('2024-01-01') TO ('2024-02-01')
+        start, end = [part.split("'")[1] for part in bound.split(' TO ')]
+        bounds[name] = (date.fromisoformat(start), date.fromisoformat(end))
+    return bounds
+
+
+def create_partition(cursor, month):
+    """Attach the partition holding ``month``; returns False if it exists.
+
+    Rows for that month that already landed in the default partition are
+    moved into the new one. Run inside a transaction.
+    """
+    name = partition_name(month)
+    cursor.execute("SELECT to_regclass(%s)", [name])
+    if cursor.fetchone()[0] is not None:
+        return False
+
+    start, end = month.isoformat(), add_months(month, 1).isoformat()
+    cursor.execute(
+        f'SELECT EXISTS (SELECT 1 FROM "{DEFAULT_PARTITION}" WHERE date >= %s AND date < %s)',
+        [start, end],
+    )
+    strays = cursor.fetchone()[0]
+    if strays:
+        # Postgres refuses a new range that the default partition has rows for
+        cursor.execute(f'ALTER TABLE {TABLE} DETACH PARTITION "{DEFAULT_PARTITION}"')
+    cursor.execute(
+        f'CREATE TABLE "{name}" PARTITION OF {TABLE} '
+        f"FOR VALUES FROM ('{start}') TO ('{end}')"
+    )
+    if strays:
+        cursor.execute(
+            f'WITH moved AS (DELETE FROM "{DEFAULT_PARTITION}" '
+            f'WHERE date >= %s AND date < %s RETURNING *) '
+            f'INSERT INTO {TABLE} SELECT * FROM moved',
+            [start, end],
+        )
+        cursor.execute(f'ALTER TABLE {TABLE} ATTACH PARTITION "{DEFAULT_PARTITION}" DEFAULT')
+    return True
+
+
+def partition_rows(cursor, name):
+    cursor.execute(f'SELECT count(*) FROM "{name}"')
+    return cursor.fetchone()[0]
+
+
+def detach_partition(cursor, name):
+    cursor.execute(f'ALTER TABLE {TABLE} DETACH PARTITION "{name}"')
+
+
+def drop_table(cursor, name):
+    cursor.execute(f'DROP TABLE "{name}"')
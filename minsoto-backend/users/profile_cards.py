@@ -0,0 +1,113 @@
+import functools
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Prefetch, Q
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .models import HabitStreak, Profile, Task, UserInterest
+from .serializers import ProfileCardSerializer
+
+User = get_user_model()
+
+
+def card_cache_key(username):
+    return f'profile_card:{username.lower()}'
+
+
+def grouped_counts(queryset, user_ids, **counts):
+    """{user id: {name: count}} from one GROUP BY user pass over ``queryset``"""
+    rows = queryset.filter(user_id__in=user_ids).order_by().values('user').annotate(**counts)
+    return {row.pop('user'): row for row in rows}
+
+
+def fetch_cards(usernames):
+    users = list(
+        User.objects.filter(username__lower__in=[username.lower() for username in usernames])
+        .select_related('profile')
+        .prefetch_related(Prefetch(
+            'user_interests',
+            queryset=UserInterest.objects.filter(is_public=True).select_related('interest'),
+            to_attr='public_interests',
+        ))
+    )
+    if not users:
+        return {}
+
+    # One grouped aggregate per table for the whole batch
+    user_ids = [user.pk for user in users]
+    stats = [
+        grouped_counts(
+            Task.objects, user_ids,
+            total_tasks=Count('pk'),
+            completed_tasks=Count('pk', filter=Q(status='completed')),
+        ),
+        grouped_counts(HabitStreak.objects, user_ids, active_habits=Count('pk')),
+        grouped_counts(UserInterest.objects, user_ids, interests_count=Count('pk', filter=Q(is_public=True))),
+    ]
+    for user in users:
+        user.total_tasks = user.completed_tasks = user.active_habits = user.interests_count = 0
+        for counts in stats:
+            for name, value in counts.get(user.pk, {}).items():
+                setattr(user, name, value)
+
+    return {user.username.lower(): ProfileCardSerializer(user).data for user in users}
+
+
+def get_profile_cards(usernames):
+    """Public profile cards for ``usernames``, served from the per-card cache"""
+    keys = {username: card_cache_key(username) for username in usernames}
+    cached = cache.get_many(keys.values())
+    cards = {username: cached[key] for username, key in keys.items() if key in cached}
+
+    missing = [username for username in usernames if username not in cards]
+    if missing:
+        fetched = fetch_cards(missing)
+        cache.set_many(
+            {card_cache_key(username): card for username, card in fetched.items()},
+            settings.PROFILE_CARD_TTL,
+        )
+        for username in missing:
+            if username.lower() in fetched:
+                cards[username] = fetched[username.lower()]
+
+    return cards
+
+
+def invalidate_card(username):
+    cache.delete(card_cache_key(username))
+
+
+@receiver(pre_save, sender=User)
+def remember_username(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or instance._state.adding:
+        return
+    if update_fields is not None and 'username' not in update_fields:
+        return
+    instance._previous_username = (
+        User.objects.filter(pk=instance.pk).values_list('username', flat=True).first()
+    )
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_card(sender, instance, **kwargs):
+    invalidate_card(instance.username)
+    # A rename leaves the card cached under the old name; drop it once the
+    # new name is visible, so nobody re-caches the old one in between
+    previous = instance.__dict__.pop('_previous_username', None)
+    if previous and previous.lower() != instance.username.lower():
+        transaction.on_commit(functools.partial(invalidate_card, previous))
+
+
+@receiver(post_save, sender=Profile)
+def invalidate_profile_card(sender, instance, **kwargs):
+    invalidate_card(instance.user.username)
+
+
+@receiver(post_save, sender=UserInterest)
+@receiver(post_delete, sender=UserInterest)
+def invalidate_interest_card(sender, instance, **kwargs):
+    invalidate_card(instance.user.username)
@@ -0,0 +1,200 @@
+"""Lazy expansion of recurring tasks.
+
+Supports the RRULE subset the frontend can produce::
+
+    FREQ=DAILY|WEEKLY|MONTHLY|YEARLY;INTERVAL=n;BYDAY=MO,WE;BYMONTHDAY=1,-1;COUNT=n;UNTIL=...
+
+Occurrences are generated in the series' local wall-clock time and only
+then converted to UTC, so a 09:00 chore stays at 09:00 across DST changes.
+Following RFC 5545, a BYMONTHDAY (or start day) a month lacks is skipped
+for that month; use BYMONTHDAY=-1 for "last day of the month".
+"""
+import calendar
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone as dt_timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+FREQUENCIES = ('DAILY', 'WEEKLY', 'MONTHLY', 'YEARLY')
+WEEKDAY_CODES = ('MO', 'TU', 'WE', 'TH', 'FR', 'SA', 'SU')
+
+# Consecutive periods without an occurrence before expansion gives up
+# (e.g. BYMONTHDAY=31 with INTERVAL=12 starting in a 30-day month)
+MAX_EMPTY_PERIODS = 500
+
+
+class RecurrenceError(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class RecurrenceRule:
+    freq: str
+    interval: int = 1
+    byday: tuple = ()
+    bymonthday: tuple = ()
+    count: int = None
+    until: datetime = None
+
+    @classmethod
+    def parse(cls, text):
+        parts = {}
+        for part in text.strip().removeprefix('RRULE:').split(';'):
+            if not part:
+                continue
+            key, sep, value = part.partition('=')
+            if not sep or not value:
+                raise RecurrenceError(f"Malformed rule part '{part}'.")
+            parts[key.upper()] = value.upper()
+
+        freq = parts.pop('FREQ', None)
+        if freq not in FREQUENCIES:
+            raise RecurrenceError(f"FREQ must be one of {', '.join(FREQUENCIES)}.")
+
+        try:
+            interval = int(parts.pop('INTERVAL', 1))
+            count = int(parts['COUNT']) if 'COUNT' in parts else None
+            bymonthday = tuple(int(d) for d in parts.pop('BYMONTHDAY', '').split(',') if d)
+        except ValueError:
+            raise RecurrenceError('INTERVAL, COUNT and BYMONTHDAY must be integers.')
+        parts.pop('COUNT', None)
+        if interval < 1 or (count is not None and count < 1):
+            raise RecurrenceError('INTERVAL and COUNT must be positive.')
+        if any(d == 0 or not -31 <= d <= 31 for d in bymonthday):
+            raise RecurrenceError('BYMONTHDAY values must be between -31 and 31, excluding 0.')
+
+        byday = []
+        for code in filter(None, parts.pop('BYDAY', '').split(',')):
+            if code not in WEEKDAY_CODES:
+                raise RecurrenceError(f"Unknown BYDAY value '{code}'.")
+            byday.append(WEEKDAY_CODES.index(code))
+
+        until = None
+        if 'UNTIL' in parts:
+            until = parse_until(parts.pop('UNTIL'))
+
+        if parts:
+            raise RecurrenceError(f"Unsupported rule parts: {', '.join(sorted(parts))}.")
+        if count is not None and until is not None:
+            raise RecurrenceError('COUNT and UNTIL cannot both be set.')
+        if byday and freq != 'WEEKLY':
+            raise RecurrenceError('BYDAY is only supported with FREQ=WEEKLY.')
+        if bymonthday and freq != 'MONTHLY':
+            raise RecurrenceError('BYMONTHDAY is only supported with FREQ=MONTHLY.')
+
+        return cls(freq, interval, tuple(sorted(set(byday))), tuple(bymonthday), count, until)
+
+
+def parse_until(value):
+    for fmt in ('%Y%m%dT%H%M%SZ', '%Y%m%dT%H%M%S', '%Y%m%d'):
+        try:
+            parsed = datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+        if fmt == '%Y%m%d':
+            parsed = parsed.replace(hour=23, minute=59, second=59)
+        return parsed.replace(tzinfo=dt_timezone.utc)
+    raise RecurrenceError(f"Invalid UNTIL value '{value}'.")
+
+
+def get_zone(name):
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise RecurrenceError(f"Unknown time zone '{name}'.")
+
+
+def add_months(year, month, months):
+    index = year * 12 + (month - 1) + months
+    return index // 12, index % 12 + 1
+
+
+def local_candidates(rule, start, skip_periods=0):
+    """Yield naive local datetimes matching ``rule``, in order, from ``start``"""
+    period = skip_periods
+    empty = 0
+    while empty < MAX_EMPTY_PERIODS:
+        found = False
+        step = period * rule.interval
+        try:
+            candidates = period_candidates(rule, start, step)
+        except (OverflowError, ValueError):
+            # Ran past datetime.max
+            return
+
+        for candidate in candidates:
+            if candidate >= start:
+                found = True
+                yield candidate
+
+        empty = 0 if found else empty + 1
+        period += 1
+
+
+def period_candidates(rule, start, step):
+    """Datetimes of the period ``step`` units after the one containing ``start``"""
+    if rule.freq == 'DAILY':
+        return [start + timedelta(days=step)]
+
+    if rule.freq == 'WEEKLY':
+        week_start = start - timedelta(days=start.weekday()) + timedelta(weeks=step)
+        return [week_start + timedelta(days=day) for day in rule.byday or (start.weekday(),)]
+
+    if rule.freq == 'MONTHLY':
+        year, month = add_months(start.year, start.month, step)
+        last = calendar.monthrange(year, month)[1]
+        days = set()
+        for day in rule.bymonthday or (start.day,):
+            day = last + 1 + day if day < 0 else day
+            if 1 <= day <= last:
+                days.add(day)
+        return [start.replace(year=year, month=month, day=day) for day in sorted(days)]
+
+    year = start.year + step
+    if start.month == 2 and start.day == 29 and not calendar.isleap(year):
+        return []
+    return [start.replace(year=year)]
+
+
+def periods_before(rule, start, window_start):
+    """Whole periods that end before ``window_start``; safe to skip when COUNT is unset"""
+    if rule.freq == 'DAILY':
+        periods = (window_start - start).days // rule.interval
+    elif rule.freq == 'WEEKLY':
+        periods = (window_start - start).days // 7 // rule.interval
+    elif rule.freq == 'MONTHLY':
+        months = (window_start.year - start.year) * 12 + window_start.month - start.month
+        periods = months // rule.interval
+    else:
+        periods = (window_start.year - start.year) // rule.interval
+    return max(periods - 1, 0)
+
+
+def occurrences(rule, dtstart, tz_name='UTC', window_start=None):
+    """Generate UTC occurrence datetimes of a series starting at ``dtstart``"""
+    tz = get_zone(tz_name)
+    local_start = dtstart.astimezone(tz).replace(tzinfo=None)
+
+    skip = 0
+    if rule.count is None and window_start is not None and window_start > dtstart:
+        skip = periods_before(rule, local_start, window_start.astimezone(tz).replace(tzinfo=None))
+
+    emitted = 0
+    for local in local_candidates(rule, local_start, skip):
+        # fold=0: ambiguous times take the first offset, times in a
+        # spring-forward gap are read with the pre-transition offset
+        moment = local.replace(tzinfo=tz).astimezone(dt_timezone.utc)
+        if rule.until is not None and moment > rule.until:
+            return
+        yield moment
+        emitted += 1
+        if rule.count is not None and emitted >= rule.count:
+            return
+
+
+def between(rule, dtstart, tz_name, window_start, window_end):
+    """Occurrences in ``[window_start, window_end)``, expanded lazily"""
+    for moment in occurrences(rule, dtstart, tz_name, window_start):
+        if moment >= window_end:
+            return
+        if moment >= window_start:
+            yield moment
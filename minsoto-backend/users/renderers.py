@@ -0,0 +1,30 @@
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSON renderer that encodes with orjson when it is installed.
+
+    orjson handles UUID, datetime and date natively; anything else (lazy
+    translation strings, Decimal, querysets) goes through DRF's encoder.
+    Without orjson this is the stock ``JSONRenderer``.
+    """
+    _default = encoders.JSONEncoder().default
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        if data is None:
+            return b''
+
+        option = orjson.OPT_NON_STR_KEYS
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            option |= orjson.OPT_INDENT_2
+
+        return orjson.dumps(data, default=self._default, option=option)
@@ -1,6 +1,12 @@
 from rest_framework import serializers
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from .models import Profile, Interest, HabitStreak, Task, UserInterest, HabitLog
+from django.db.models import Prefetch
+from .layouts import validate_layout
+from .models import Profile, Interest, HabitStreak, Task, UserInterest, HabitLog, ArchivedTask
+from .recurrence import RecurrenceError, RecurrenceRule, get_zone
+from .task_queries import ORDERING_FIELDS
+from .usernames import username_taken
 
 User = get_user_model()
 
@@ -36,6 +42,17 @@ class HabitLogSerializer(serializers.ModelSerializer):
         read_only_fields = ('id', 'created_at')
 
 
+# Logs embedded in each serialized habit
+RECENT_LOGS = 30
+
+
+def with_recent_logs(habits):
+    """Prefetch the logs HabitStreakSerializer embeds, at most RECENT_LOGS per habit"""
+    return habits.prefetch_related(Prefetch(
+        'logs', queryset=HabitLog.objects.all()[:RECENT_LOGS], to_attr='prefetched_recent_logs'
+    ))
+
+
 class HabitStreakSerializer(serializers.ModelSerializer):
     recent_logs = serializers.SerializerMethodField()
     
@@ -46,17 +63,106 @@ class HabitStreakSerializer(serializers.ModelSerializer):
         read_only_fields = ('id', 'created_at', 'updated_at')
     
     def get_recent_logs(self, obj):
-        # Get last 30 days of logs
-        recent = obj.logs.all()[:30]
+        # Get last 30 days of logs, unless with_recent_logs() already did
+        recent = getattr(obj, 'prefetched_recent_logs', None)
+        if recent is None:
+            recent = obj.logs.all()[:RECENT_LOGS]
         return HabitLogSerializer(recent, many=True).data
 
 
+class HabitIncrementSerializer(serializers.Serializer):
+    by = serializers.IntegerField(default=1, min_value=0, max_value=1000)
+    longest_streak = serializers.IntegerField(default=0, min_value=0)
+
+    def validate(self, data):
+        if data['by'] == 0 and data['longest_streak'] == 0:
+            raise serializers.ValidationError("Nothing to update: set 'by' or 'longest_streak'.")
+        return data
+
+
+class HabitSyncSerializer(HabitStreakSerializer):
+    """Habit without embedded logs; sync clients receive logs as their own rows"""
+    class Meta(HabitStreakSerializer.Meta):
+        fields = [f for f in HabitStreakSerializer.Meta.fields if f != 'recent_logs']
+
+
+class HabitLogSyncSerializer(HabitLogSerializer):
+    habit_id = serializers.UUIDField(read_only=True)
+
+    class Meta(HabitLogSerializer.Meta):
+        fields = HabitLogSerializer.Meta.fields + ['habit_id']
+
+
 class TaskSerializer(serializers.ModelSerializer):
     class Meta:
         model = Task
         fields = ['id', 'title', 'description', 'status', 'priority', 'due_date', 
-                  'is_public', 'created_at', 'updated_at']
-        read_only_fields = ('id', 'created_at', 'updated_at')
+                  'is_public', 'recurrence', 'recurrence_timezone', 'recurrence_parent',
+                  'occurrence_date', 'created_at', 'updated_at']
+        read_only_fields = ('id', 'recurrence_parent', 'occurrence_date', 'created_at', 'updated_at')
+
+    def validate_recurrence(self, value):
+        if value:
+            try:
+                RecurrenceRule.parse(value)
+            except RecurrenceError as e:
+                raise serializers.ValidationError(str(e))
+        return value
+
+    def validate_recurrence_timezone(self, value):
+        try:
+            get_zone(value)
+        except RecurrenceError as e:
+            raise serializers.ValidationError(str(e))
+        return value
+
+    def validate(self, attrs):
+        recurrence = attrs.get('recurrence', getattr(self.instance, 'recurrence', ''))
+        due_date = attrs.get('due_date', getattr(self.instance, 'due_date', None))
+        if recurrence and due_date is None:
+            raise serializers.ValidationError({'due_date': 'Recurring tasks need a due date to start from.'})
+        if recurrence and getattr(self.instance, 'recurrence_parent_id', None):
+            raise serializers.ValidationError({'recurrence': 'Occurrences cannot recur themselves.'})
+        return attrs
+
+
+class ArchivedTaskSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ArchivedTask
+        fields = ['id', 'title', 'description', 'priority', 'due_date', 'is_public',
+                  'created_at', 'completed_at', 'archived_at']
+        read_only_fields = fields
+
+
+class OccurrenceSerializer(serializers.Serializer):
+    occurrence_date = serializers.DateTimeField()
+
+
+class TaskQuerySerializer(serializers.Serializer):
+    """Query parameters accepted by tasks_list"""
+    status = serializers.ChoiceField(choices=Task.STATUS_CHOICES, required=False)
+    priority = serializers.CharField(required=False)
+    is_public = serializers.BooleanField(required=False, allow_null=True, default=None)
+    overdue = serializers.BooleanField(required=False, allow_null=True, default=None)
+    due_after = serializers.DateTimeField(required=False)
+    due_before = serializers.DateTimeField(required=False)
+    q = serializers.CharField(required=False, max_length=200)
+    ordering = serializers.CharField(required=False)
+
+    def validate_priority(self, value):
+        priorities = [p.strip() for p in value.split(',') if p.strip()]
+        valid = {choice for choice, _ in Task.PRIORITY_CHOICES}
+        invalid = [p for p in priorities if p not in valid]
+        if invalid:
+            raise serializers.ValidationError(f"Unknown priority: {', '.join(invalid)}.")
+        return priorities
+
+    def validate_ordering(self, value):
+        keys = [key.strip() for key in value.split(',') if key.strip()]
+        invalid = [key for key in keys if key.lstrip('-') not in ORDERING_FIELDS]
+        if invalid:
+            raise serializers.ValidationError(f"Cannot order by: {', '.join(invalid)}.")
+        return keys
 
 
 class ProfileSerializer(serializers.ModelSerializer):
@@ -92,6 +198,73 @@ class ProfileDetailSerializer(serializers.ModelSerializer):
         }
 
 
+class PublicProfileDetailSerializer(ProfileDetailSerializer):
+    """Profile as seen by other users; layout holds public widgets only"""
+    layout = serializers.JSONField(source='public_layout', read_only=True)
+
+
+# Columns PublicProfileDetailSerializer reads; the private layout is not one
+PUBLIC_PROFILE_FIELDS = ('id', 'user_id', 'bio', 'profile_picture_url', 'theme',
+                         'public_layout', 'created_at', 'updated_at')
+
+
+class ProfileCardSerializer(serializers.ModelSerializer):
+    """Public summary of a user; expects the stats attributes set by profile_cards"""
+    bio = serializers.SerializerMethodField()
+    profile_picture_url = serializers.SerializerMethodField()
+    interests = serializers.SerializerMethodField()
+    stats = serializers.SerializerMethodField()
+
+    class Meta:
+        model = User
+        fields = ('id', 'username', 'first_name', 'last_name', 'bio',
+                  'profile_picture_url', 'interests', 'stats')
+
+    def get_profile(self, obj):
+        try:
+            return obj.profile
+        except Profile.DoesNotExist:
+            return None
+
+    def get_bio(self, obj):
+        profile = self.get_profile(obj)
+        return profile.bio if profile else ''
+
+    def get_profile_picture_url(self, obj):
+        profile = self.get_profile(obj)
+        return profile.profile_picture_url if profile else ''
+
+    def get_interests(self, obj):
+        return [ui.interest.name for ui in obj.public_interests]
+
+    def get_stats(self, obj):
+        return {
+            'total_tasks': obj.total_tasks,
+            'completed_tasks': obj.completed_tasks,
+            'active_habits': obj.active_habits,
+            'interests_count': obj.interests_count,
+        }
+
+
+class ProfileBatchSerializer(serializers.Serializer):
+    usernames = serializers.ListField(
+        child=serializers.CharField(max_length=150),
+        allow_empty=False,
+    )
+
+    def validate_usernames(self, value):
+        # Usernames are case-insensitive, so 'Alice' and 'alice' are one entry
+        unique = {}
+        for username in value:
+            unique.setdefault(username.lower(), username)
+        value = list(unique.values())
+        if len(value) > settings.PROFILE_BATCH_MAX:
+            raise serializers.ValidationError(
+                f"At most {settings.PROFILE_BATCH_MAX} usernames per request."
+            )
+        return value
+
+
 class GoogleAuthSerializer(serializers.Serializer):
     access_token = serializers.CharField()
 
@@ -100,8 +273,7 @@ class UsernameSetupSerializer(serializers.Serializer):
     username = serializers.CharField(max_length=150)
     
     def validate_username(self, value):
-        User = get_user_model()
-        if User.objects.filter(username=value).exists():
+        if username_taken(value):
             raise serializers.ValidationError("Username already exists.")
         # Add username format validation
         if not value.replace('_', '').replace('-', '').isalnum():
@@ -115,11 +287,8 @@ class LayoutUpdateSerializer(serializers.Serializer):
     layout = serializers.JSONField()
     
     def validate_layout(self, value):
-        """Validate layout structure"""
-        if not isinstance(value, dict):
-            raise serializers.ValidationError("Layout must be a JSON object.")
-        if 'widgets' not in value:
-            raise serializers.ValidationError("Layout must contain 'widgets' key.")
-        if not isinstance(value['widgets'], list):
-            raise serializers.ValidationError("'widgets' must be an array.")
+        """Validate layout structure against the widget schema"""
+        errors = validate_layout(value)
+        if errors:
+            raise serializers.ValidationError(errors)
         return value
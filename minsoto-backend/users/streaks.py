@@ -0,0 +1,50 @@
+from django.db import connection, transaction
+from django.db.models.signals import post_save
+from django.utils import timezone
+
+from .models import HabitStreak
+
+# Columns written by increment_streak; passed on to post_save receivers
+STREAK_FIELDS = frozenset({'current_streak', 'longest_streak', 'updated_at'})
+
+
+def increment_streak(habit_id, user, by=1, longest_at_least=0):
+    """Atomically add ``by`` to a habit's current streak and raise its longest.
+
+    One conditional ``UPDATE ... RETURNING`` computes both columns from the
+    values stored in the row, so concurrent check-ins can neither lose an
+    increment nor lower ``longest_streak``, and no row lock is taken before
+    the write. Returns the updated habit, or None when the user has no live
+    habit with that id.
+    """
+    opts = HabitStreak._meta
+    greatest = 'MAX' if connection.vendor == 'sqlite' else 'GREATEST'
+    params = [
+        by,
+        by,
+        longest_at_least,
+        opts.get_field('updated_at').get_db_prep_value(timezone.now(), connection),
+        opts.pk.get_db_prep_value(habit_id, connection),
+        opts.get_field('user').get_db_prep_value(user.pk, connection),
+    ]
+    sql = (
+        f'UPDATE {opts.db_table} '
+        f'SET current_streak = current_streak + %s, '
+        f'longest_streak = {greatest}(longest_streak, current_streak + %s, %s), '
+        f'updated_at = %s '
+        f'WHERE id = %s AND user_id = %s AND deleted_at IS NULL '
+        f'RETURNING *'
+    )
+    with transaction.atomic():
+        habits = list(HabitStreak.all_objects.raw(sql, params))
+        if not habits:
+            return None
+
+        habit = habits[0]
+        # QuerySet.update() style writes skip signals; the change log, events
+        # and leaderboards still need to hear about this one
+        post_save.send(
+            sender=HabitStreak, instance=habit, created=False,
+            update_fields=STREAK_FIELDS, raw=False, using=habit._state.db,
+        )
+    return habit
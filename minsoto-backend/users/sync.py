@@ -0,0 +1,137 @@
+from django.db import connection, transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .events import owner_id
+from .models import ChangeCounter, ChangeLog, CustomUser, HabitLog, HabitStreak, Task, UserInterest
+from .serializers import (
+    HabitLogSyncSerializer,
+    HabitSyncSerializer,
+    TaskSerializer,
+    UserInterestSerializer,
+)
+
+# Max change-log entries consumed by one sync call; clients loop on has_more
+SYNC_BATCH_SIZE = 500
+
+# Sync collection name -> (model, serializer, queryset of the user's rows)
+SYNC_MODELS = {
+    'tasks': (Task, TaskSerializer, lambda user: Task.objects.filter(user=user)),
+    'habits': (HabitStreak, HabitSyncSerializer, lambda user: HabitStreak.objects.filter(user=user)),
+    'habit_logs': (HabitLog, HabitLogSyncSerializer, lambda user: HabitLog.objects.filter(habit__user=user)),
+    'interests': (
+        UserInterest,
+        UserInterestSerializer,
+        lambda user: UserInterest.objects.filter(user=user).select_related('interest'),
+    ),
+}
+
+COLLECTION_NAMES = {model: name for name, (model, _, _) in SYNC_MODELS.items()}
+
+
+def next_version(user_id):
+    """Claim the user's next change version.
+
+    The counter row stays locked until the surrounding transaction commits,
+    so versions become visible in the order they were handed out.
+    """
+    opts = ChangeCounter._meta
+    table = connection.ops.quote_name(opts.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {table} (user_id, value) VALUES (%s, 1) '
+            f'ON CONFLICT (user_id) DO UPDATE SET value = {table}.value + 1 '
+            f'RETURNING value',
+            [opts.pk.get_db_prep_value(user_id, connection)],
+        )
+        return cursor.fetchone()[0]
+
+
+def record_change(instance, action):
+    user_id = owner_id(instance)
+    if user_id is not None:
+        # The log row commits together with its version, and with the
+        # caller's write when it runs inside the caller's transaction
+        with transaction.atomic():
+            ChangeLog.objects.create(
+                user_id=user_id,
+                model=COLLECTION_NAMES[type(instance)],
+                object_id=instance.pk,
+                action=action,
+                version=next_version(user_id),
+            )
+
+
+@receiver(post_save, sender=Task)
+@receiver(post_save, sender=HabitStreak)
+@receiver(post_save, sender=HabitLog)
+@receiver(post_save, sender=UserInterest)
+def record_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        # A soft delete is a save, but sync clients see it as a delete
+        record_change(instance, 'delete' if getattr(instance, 'deleted_at', None) else 'upsert')
+
+
+@receiver(post_delete, sender=Task)
+@receiver(post_delete, sender=HabitStreak)
+@receiver(post_delete, sender=HabitLog)
+@receiver(post_delete, sender=UserInterest)
+def record_deleted(sender, instance, origin=None, **kwargs):
+    # Rows cascading from an account deletion have nobody left to sync to,
+    # and a log row pointing at the deleted user would fail its foreign key
+    if getattr(origin, 'model', type(origin)) is not CustomUser:
+        record_change(instance, 'delete')
+
+
+def latest_token(user):
+    return ChangeCounter.objects.filter(user=user).values_list('value', flat=True).first() or 0
+
+
+def snapshot(user):
+    """Full state for clients without a token (first sync or after a reset)"""
+    # Read the token first so writes racing the snapshot are replayed next time
+    token = latest_token(user)
+    changes = {
+        name: serializer(queryset(user), many=True).data
+        for name, (model, serializer, queryset) in SYNC_MODELS.items()
+    }
+    return {
+        'token': str(token),
+        'has_more': False,
+        'full': True,
+        'changes': changes,
+        'deleted': {name: [] for name in SYNC_MODELS},
+    }
+
+
+def changes_since(user, since):
+    """Rows touched after ``since``, collapsed to their latest action"""
+    entries = list(
+        ChangeLog.objects.filter(user=user, version__gt=since)
+        .order_by('version')
+        .values_list('version', 'model', 'object_id', 'action')[:SYNC_BATCH_SIZE + 1]
+    )
+    has_more = len(entries) > SYNC_BATCH_SIZE
+    entries = entries[:SYNC_BATCH_SIZE]
+
+    latest = {name: {} for name in SYNC_MODELS}
+    for _, name, object_id, action in entries:
+        latest[name][object_id] = action
+
+    changes = {}
+    deleted = {}
+    for name, (model, serializer, queryset) in SYNC_MODELS.items():
+        upserts = [object_id for object_id, action in latest[name].items() if action == 'upsert']
+        rows = queryset(user).filter(pk__in=upserts) if upserts else model.objects.none()
+        changes[name] = serializer(rows, many=True).data
+        deleted[name] = [
+            str(object_id) for object_id, action in latest[name].items() if action == 'delete'
+        ]
+
+    return {
+        'token': str(entries[-1][0] if entries else since),
+        'has_more': has_more,
+        'full': False,
+        'changes': changes,
+        'deleted': deleted,
+    }
@@ -0,0 +1,166 @@
+from django.db import connection
+from django.db.models import Case, F, IntegerField, Q, Value, When
+from django.db.models.expressions import RawSQL
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework.fields import DateTimeField
+
+from .models import Task
+from .recurrence import RecurrenceRule, between
+
+SEARCH_CONFIG = 'english'
+
+# Sort keys accepted by ?ordering= and the expressions they sort on
+ORDERING_FIELDS = {
+    'priority': 'priority_rank',
+    'due_date': 'due_date',
+    'created_at': 'created_at',
+    'updated_at': 'updated_at',
+    'title': 'title',
+}
+
+PRIORITY_VALUES = {'high': 3, 'medium': 2, 'low': 1}
+
+PRIORITY_RANK = Case(
+    When(priority='high', then=Value(3)),
+    When(priority='medium', then=Value(2)),
+    When(priority='low', then=Value(1)),
+    default=Value(0),
+    output_field=IntegerField(),
+)
+
+
+def search_vector():
+    # Postgres-only; imported on use to keep it out of worker boot
+    from django.contrib.postgres.search import SearchVector
+
+    return SearchVector('title', 'description', config=SEARCH_CONFIG)
+
+
+def fts5_query(text):
+    """Quote every term so user input cannot inject FTS5 query syntax"""
+    terms = text.split()
+    return ' '.join('"{}"'.format(term.replace('"', '""')) for term in terms)
+
+
+def search_tasks(tasks, text):
+    """Full-text filter: tsvector/GIN on Postgres, FTS5 on SQLite"""
+    if connection.vendor == 'postgresql':
+        from django.contrib.postgres.search import SearchQuery
+
+        query = SearchQuery(text, config=SEARCH_CONFIG, search_type='websearch')
+        return tasks.annotate(search=search_vector()).filter(search=query), query
+    if connection.vendor == 'sqlite':
+        matches = RawSQL(
+            'SELECT id FROM users_task WHERE rowid IN '
+            '(SELECT rowid FROM users_task_fts WHERE users_task_fts MATCH %s)',
+            [fts5_query(text)],
+        )
+        return tasks.filter(pk__in=matches), None
+    terms = Q()
+    for term in text.split():
+        terms &= Q(title__icontains=term) | Q(description__icontains=term)
+    return tasks.filter(terms), None
+
+
+def query_tasks(tasks, params):
+    """Apply validated TaskQuerySerializer params to a task queryset"""
+    if params.get('status'):
+        tasks = tasks.filter(status=params['status'])
+    if params.get('priority'):
+        tasks = tasks.filter(priority__in=params['priority'])
+    if params.get('is_public') is not None:
+        tasks = tasks.filter(is_public=params['is_public'])
+    if params.get('due_after'):
+        tasks = tasks.filter(due_date__gte=params['due_after'])
+    if params.get('due_before'):
+        tasks = tasks.filter(due_date__lt=params['due_before'])
+    if params.get('overdue') is True:
+        tasks = tasks.filter(due_date__lt=timezone.now()).exclude(status='completed')
+    elif params.get('overdue') is False:
+        tasks = tasks.filter(Q(due_date__isnull=True) | Q(due_date__gte=timezone.now()) | Q(status='completed'))
+
+    search_query = None
+    if params.get('q'):
+        tasks, search_query = search_tasks(tasks, params['q'])
+
+    ordering = params.get('ordering')
+    if ordering:
+        if any(key.lstrip('-') == 'priority' for key in ordering):
+            tasks = tasks.annotate(priority_rank=PRIORITY_RANK)
+        order_by = []
+        for key in ordering:
+            field = F(ORDERING_FIELDS[key.lstrip('-')])
+            # Tasks without a due date sort last in either direction
+            if key.startswith('-'):
+                order_by.append(field.desc(nulls_last=True))
+            else:
+                order_by.append(field.asc(nulls_last=True))
+        tasks = tasks.order_by(*order_by, '-created_at')
+    elif search_query is not None:
+        from django.contrib.postgres.search import SearchRank
+
+        tasks = tasks.annotate(rank=SearchRank(search_vector(), search_query)).order_by('-rank', '-created_at')
+
+    return tasks
+
+
+def serialized_sort_key(name):
+    """Comparable value of an ordering field in a serialized task, or None"""
+    if name == 'priority':
+        return lambda task: PRIORITY_VALUES.get(task['priority'], 0)
+    if name == 'title':
+        return lambda task: task['title']
+    return lambda task: parse_datetime(task[name]) if task[name] else None
+
+
+def sort_serialized(tasks, ordering):
+    """Sort serialized tasks in place the way ``query_tasks`` orders rows.
+
+    Used where database rows and generated occurrences are merged. Nulls
+    sort last in either direction and ``-created_at`` breaks ties.
+    """
+    # One stable sort per key, least significant first
+    for key in reversed([*ordering, '-created_at']):
+        value = serialized_sort_key(key.lstrip('-'))
+        if key.startswith('-'):
+            tasks.sort(key=lambda task: (value(task) is not None, value(task)), reverse=True)
+        else:
+            tasks.sort(key=lambda task: (value(task) is None, value(task)))
+    return tasks
+
+
+def expand_series(series, window_start, window_end, serializer_class):
+    """Serialized occurrences of recurring ``series`` inside the window.
+
+    Nothing is written: slots that were already materialized (completed or
+    edited) are skipped, since those rows are listed as ordinary tasks.
+    """
+    series = list(series)
+    # Soft-deleted occurrences stay in the set: deleting one skips its slot
+    materialized = set(
+        Task.all_objects.filter(
+            recurrence_parent__in=series,
+            occurrence_date__gte=window_start,
+            occurrence_date__lt=window_end,
+        ).values_list('recurrence_parent_id', 'occurrence_date')
+    )
+
+    as_datetime = DateTimeField().to_representation
+    occurrences = []
+    for task in series:
+        template = serializer_class(task).data
+        rule = RecurrenceRule.parse(task.recurrence)
+        for moment in between(rule, task.due_date, task.recurrence_timezone, window_start, window_end):
+            if (task.id, moment) in materialized:
+                continue
+            occurrences.append({
+                **template,
+                'id': None,
+                'status': 'todo',
+                'due_date': as_datetime(moment),
+                'recurrence': '',
+                'recurrence_parent': str(task.id),
+                'occurrence_date': as_datetime(moment),
+            })
+    return occurrences
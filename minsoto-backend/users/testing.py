@@ -0,0 +1,32 @@
+import importlib
+
+from django.db import connections
+from django.db.models.signals import post_migrate
+from django.test.runner import DiscoverRunner
+
+
+def install_sqlite_search(sender, using='default', **kwargs):
+    """Create the FTS5 task index that migration 0005 would have built"""
+    if sender.name != 'users':
+        return
+    connection = connections[using]
+    if connection.vendor != 'sqlite' or 'users_task_fts' in connection.introspection.table_names():
+        return
+    migration = importlib.import_module('users.migrations.0005_task_search_index')
+    with connection.cursor() as cursor:
+        for statement in migration.SQLITE_FTS:
+            cursor.execute(statement)
+
+
+class FastTestRunner(DiscoverRunner):
+    """Builds test databases from the models instead of replaying migrations.
+
+    The schema comes straight from the current models, so it is the same
+    snapshot the migrations end at. Database objects that only exist in
+    hand-written migrations (the SQLite full-text index) are added once the
+    tables exist, before ``--parallel`` clones the database for its workers.
+    """
+
+    def setup_databases(self, **kwargs):
+        post_migrate.connect(install_sqlite_search, dispatch_uid='install_sqlite_search')
+        return super().setup_databases(**kwargs)
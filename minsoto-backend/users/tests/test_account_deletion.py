@@ -0,0 +1,167 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.apps import apps
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from users.account_deletion import claim, resume_stalled_deletions, run_deletion
+from users.archive import pack_logs
+from users.factories import make_dashboard, make_tasks, make_user
+from users.models import (
+    AccountDeletion, ArchivedTask, CustomUser, HabitLogArchive, HabitStreak, Task,
+)
+
+
+def owned_row_counts(user_id, habit_ids):
+    """Rows in every users table that point at the user or one of their habits"""
+    counts = {}
+    for model in apps.get_app_config('users').get_models():
+        for field in model._meta.concrete_fields:
+            if not field.is_relation:
+                continue
+            if field.related_model is CustomUser:
+                lookup = {field.name: user_id}
+            elif field.related_model is HabitStreak:
+                lookup = {f'{field.name}__in': habit_ids}
+            else:
+                continue
+            counts[f'{model.__name__}.{field.name}'] = model._base_manager.filter(**lookup).count()
+    return counts
+
+
+class AccountDeletionTests(TestCase):
+    def seed_heavy_user(self):
+        user = make_dashboard(tasks=2500, habits=40, logs=60, interests=30)
+        series = Task.objects.create(
+            user=user, title='Daily', due_date=timezone.now(), recurrence='FREQ=DAILY'
+        )
+        make_tasks(user, 300, recurrence_parent=series, status='completed')
+        ArchivedTask.objects.bulk_create([
+            ArchivedTask(id=task.id, user=user, title='Old', priority='low',
+                         created_at=timezone.now(), completed_at=timezone.now())
+            for task in make_tasks(make_user(), 200)
+        ])
+        HabitLogArchive.objects.bulk_create([
+            HabitLogArchive(habit=habit, year=2020, entries=1, data=pack_logs({'2020-01-01': [True, '']}))
+            for habit in user.habits.all()
+        ])
+        # Change log, change counter and idempotency key rows through the API
+        client = APIClient(SERVER_NAME='localhost')
+        client.force_authenticate(user)
+        for i in range(5):
+            client.post('/api/tasks/', {'title': f'Synced {i}'}, format='json', HTTP_IDEMPOTENCY_KEY=f'k{i}')
+        return user
+
+    def test_heavily_seeded_user_leaves_no_rows_behind(self):
+        user = self.seed_heavy_user()
+        bystander = make_dashboard(tasks=50, habits=3, logs=10, interests=3)
+        habit_ids = list(HabitStreak.all_objects.filter(user=user).values_list('pk', flat=True))
+        before = owned_row_counts(user.pk, habit_ids)
+        bystander_before = owned_row_counts(
+            bystander.pk, list(bystander.habits.values_list('pk', flat=True))
+        )
+        self.assertTrue(all(before.values()), before)
+
+        job = AccountDeletion.objects.create(user_id=user.pk)
+        deleted = run_deletion(job.pk, batch_size=500)
+
+        self.assertEqual(owned_row_counts(user.pk, habit_ids), dict.fromkeys(before, 0))
+        self.assertFalse(CustomUser.objects.filter(pk=user.pk).exists())
+        self.assertEqual(deleted['habit_logs'], 40 * 60)
+        self.assertEqual(deleted['tasks'] + deleted['task_occurrences'], 2500 + 1 + 300 + 5)
+        job.refresh_from_db()
+        self.assertEqual(job.status, AccountDeletion.DONE)
+        self.assertIsNotNone(job.finished_at)
+        self.assertEqual(
+            owned_row_counts(bystander.pk, list(bystander.habits.values_list('pk', flat=True))),
+            bystander_before,
+        )
+
+    def test_resumed_run_finishes_a_partial_deletion(self):
+        user = make_dashboard(tasks=30, habits=3, logs=5, interests=2)
+        job = AccountDeletion.objects.create(user_id=user.pk)
+        with mock.patch('users.account_deletion.invalidate_card', side_effect=RuntimeError('worker died')):
+            with self.assertRaises(RuntimeError):
+                run_deletion(job.pk, batch_size=7)
+        job.refresh_from_db()
+        self.assertEqual(job.status, AccountDeletion.FAILED)
+
+        self.assertIsNone(run_deletion(job.pk))
+        deleted = run_deletion(job.pk, retry_failed=True)
+
+        self.assertEqual(deleted['tasks'], 30)
+        self.assertFalse(CustomUser.objects.filter(pk=user.pk).exists())
+
+    def test_live_runner_keeps_its_claim(self):
+        job = AccountDeletion.objects.create(user_id=make_user().pk)
+        self.assertTrue(claim(job.pk))
+        self.assertFalse(claim(job.pk))
+
+        AccountDeletion.objects.filter(pk=job.pk).update(heartbeat_at=timezone.now() - timedelta(hours=1))
+        self.assertTrue(claim(job.pk))
+
+    def test_stalled_jobs_are_resumed(self):
+        old = timezone.now() - timedelta(hours=1)
+        stalled = AccountDeletion.objects.create(user_id=make_user().pk, status=AccountDeletion.RUNNING, heartbeat_at=old)
+        never_started = AccountDeletion.objects.create(user_id=make_user().pk)
+        AccountDeletion.objects.filter(pk=never_started.pk).update(created_at=old)
+        AccountDeletion.objects.create(user_id=make_user().pk, status=AccountDeletion.RUNNING, heartbeat_at=timezone.now())
+        AccountDeletion.objects.create(user_id=make_user().pk)
+
+        with mock.patch('users.account_deletion.start_background_deletion') as start:
+            resume_stalled_deletions()
+
+        self.assertEqual({call.args[0] for call in start.call_args_list}, {stalled.pk, never_started.pk})
+
+
+class AccountDeletionViewTests(TestCase):
+    def setUp(self):
+        self.user = make_dashboard(tasks=20, habits=2, logs=3, interests=2)
+        self.client = APIClient(SERVER_NAME='localhost')
+        self.client.force_authenticate(self.user)
+
+    def test_delete_returns_job_progress_url(self):
+        with mock.patch('users.account_deletion.start_background_deletion', side_effect=run_deletion):
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.delete('/api/user/me/')
+
+        job = AccountDeletion.objects.get(user_id=self.user.pk)
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['progress_url'], f'/api/user/deletion/{job.pk}/')
+
+        progress = APIClient(SERVER_NAME='localhost').get(response.data['progress_url'])
+        self.assertEqual(progress.status_code, 200)
+        self.assertEqual(progress.data['status'], 'done')
+        self.assertEqual(progress.data['deleted']['tasks'], 20)
+
+    def test_progress_is_not_available_by_user_id(self):
+        with mock.patch('users.account_deletion.start_background_deletion'):
+            self.client.delete('/api/user/me/')
+
+        response = APIClient(SERVER_NAME='localhost').get(f'/api/user/deletion/{self.user.pk}/')
+
+        self.assertEqual(response.status_code, 404)
+
+    def test_retried_delete_is_replayed(self):
+        with mock.patch('users.account_deletion.start_background_deletion') as start:
+            with self.captureOnCommitCallbacks(execute=True):
+                first = self.client.delete('/api/user/me/', HTTP_IDEMPOTENCY_KEY='bye')
+                retry = self.client.delete('/api/user/me/', HTTP_IDEMPOTENCY_KEY='bye')
+
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(retry.data, first.data)
+        self.assertEqual(AccountDeletion.objects.filter(user_id=self.user.pk).count(), 1)
+        self.assertEqual(start.call_count, 1)
+
+    def test_polling_resumes_a_stalled_job(self):
+        job = AccountDeletion.objects.create(
+            user_id=self.user.pk, status=AccountDeletion.RUNNING,
+            heartbeat_at=timezone.now() - timedelta(hours=1),
+        )
+
+        with mock.patch('users.account_deletion.start_background_deletion') as start:
+            APIClient(SERVER_NAME='localhost').get(f'/api/user/deletion/{job.pk}/')
+
+        start.assert_called_once_with(job.pk)
@@ -0,0 +1,78 @@
+import random
+from array import array
+from datetime import date, timedelta
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from users.analytics import compute, compute_numpy, compute_python
+
+END = date(2026, 3, 31)
+
+
+def packed(days):
+    """(date, completed) pairs as the ordinal/flag arrays load_logs builds"""
+    days = sorted(days)
+    return array('l', [day.toordinal() for day, _ in days]), array('b', [done for _, done in days])
+
+
+class ComputeTests(SimpleTestCase):
+    def both(self, days, end=END):
+        ordinals, completed = packed(days)
+        result = compute_numpy(ordinals, completed, end.toordinal())
+        self.assertEqual(compute_python(ordinals, completed, end.toordinal()), result)
+        return result
+
+    def test_best_month_tie_goes_to_the_earliest_month(self):
+        days = [(date(2026, 1, d), True) for d in (5, 6, 7)]
+        days += [(date(2026, 2, d), done) for d, done in ((2, True), (3, True), (4, True), (5, False))]
+
+        result = self.both(days)
+
+        self.assertEqual(result['best_month'], {'month': '2026-01', 'completed': 3, 'rate': 1.0})
+
+    def test_rolling_windows_include_today_and_stop_at_their_edge(self):
+        # Inside 7 days: 0 and 6 ago; inside 30 only: 7 and 29 ago; outside both: 30 ago
+        days = [(END - timedelta(days=ago), True) for ago in (0, 6, 7, 29, 30)]
+        days.append((END - timedelta(days=1), False))
+
+        result = self.both(days)
+
+        self.assertEqual(result['rolling_7_day'], round(2 / 7, 4))
+        self.assertEqual(result['rolling_30_day'], round(4 / 30, 4))
+        self.assertEqual(result['completed_logs'], 5)
+        self.assertEqual(result['consistency'], round(5 / 31, 4))
+
+    def test_weekday_breakdown(self):
+        # 2026-03-30 is a Monday
+        days = [(date(2026, 3, 30), True), (date(2026, 3, 23), False), (date(2026, 3, 29), True)]
+
+        weekdays = {row['weekday']: row for row in self.both(days)['weekdays']}
+
+        self.assertEqual(weekdays['Mon'], {'weekday': 'Mon', 'logged': 2, 'completed': 1, 'rate': 0.5})
+        self.assertEqual(weekdays['Sun'], {'weekday': 'Sun', 'logged': 1, 'completed': 1, 'rate': 1.0})
+        self.assertEqual(weekdays['Tue']['rate'], 0.0)
+
+    def test_no_completions_and_no_logs(self):
+        self.assertIsNone(self.both([(date(2026, 3, 1), False)])['best_month'])
+        self.assertEqual(self.both([])['total_logs'], 0)
+
+    def test_implementations_agree_on_a_long_history(self):
+        rng = random.Random(7)
+        start = END - timedelta(days=800)
+        days = [
+            (start + timedelta(days=offset), rng.random() < 0.6)
+            for offset in range(801) if rng.random() < 0.8
+        ]
+
+        self.both(days)
+
+    def test_compute_falls_back_without_numpy(self):
+        ordinals, completed = packed([(END - timedelta(days=ago), ago % 3 == 0) for ago in range(90)])
+
+        with mock.patch('users.analytics.numpy_module', return_value=None), \
+                mock.patch('users.analytics.compute_numpy') as numpy_path:
+            result = compute(ordinals, completed, today=END)
+
+        numpy_path.assert_not_called()
+        self.assertEqual(result, compute_numpy(ordinals, completed, END.toordinal()))
@@ -0,0 +1,165 @@
+from datetime import datetime, timedelta, timezone
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone as django_timezone
+from rest_framework.test import APIClient
+
+from users.analytics import habit_analytics, written_key
+from users.archive import archive_habit_logs, archive_tasks, archived_logs, pack_logs, purge_soft_deleted
+from users.factories import make_habits, make_tasks, make_user
+from users.models import ArchivedTask, ChangeLog, HabitLog, HabitLogArchive, HabitStreak, Task
+from users.serializers import TaskSerializer
+from users.task_queries import expand_series
+
+
+def utc(*args):
+    return datetime(*args, tzinfo=timezone.utc)
+
+
+class ArchiveTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = make_user()
+        self.cutoff = django_timezone.now() - timedelta(days=1)
+
+    def age(self, tasks):
+        Task.all_objects.filter(pk__in=[task.pk for task in tasks]).update(
+            updated_at=self.cutoff - timedelta(days=30)
+        )
+
+    def test_completed_one_off_tasks_are_archived(self):
+        done = make_tasks(self.user, 4, status='completed')
+        open_tasks = make_tasks(self.user, 2, status='todo')
+        self.age(done + open_tasks)
+
+        self.assertEqual(archive_tasks(self.cutoff, batch_size=3), 4)
+
+        self.assertEqual(set(ArchivedTask.objects.values_list('id', flat=True)), {t.id for t in done})
+        self.assertEqual(set(Task.objects.values_list('id', flat=True)), {t.id for t in open_tasks})
+
+    def test_completed_occurrences_stay_completed(self):
+        series = Task.objects.create(
+            user=self.user, title='Stretch', due_date=utc(2026, 3, 1, 7), recurrence='FREQ=DAILY'
+        )
+        slot = utc(2026, 3, 2, 7)
+        occurrence = Task.objects.create(
+            user=self.user, title='Stretch', due_date=slot, status='completed',
+            recurrence_parent=series, occurrence_date=slot,
+        )
+        self.age([series, occurrence])
+
+        self.assertEqual(archive_tasks(self.cutoff, batch_size=10), 0)
+
+        generated = expand_series([series], utc(2026, 3, 1), utc(2026, 3, 4), TaskSerializer)
+        self.assertEqual(len(generated), 2)
+        self.assertTrue(Task.objects.filter(pk=occurrence.pk, status='completed').exists())
+
+    def test_former_series_with_occurrences_is_skipped(self):
+        client = APIClient(SERVER_NAME='localhost')
+        client.force_authenticate(self.user)
+        series = Task.objects.create(
+            user=self.user, title='Stretch', due_date=utc(2026, 3, 1, 7), recurrence='FREQ=DAILY'
+        )
+        response = client.post(
+            f'/api/tasks/{series.id}/occurrences/',
+            {'occurrence_date': '2026-03-02T07:00:00Z', 'status': 'completed'}, format='json',
+        )
+        self.assertEqual(response.status_code, 201, response.data)
+        response = client.patch(
+            f'/api/tasks/{series.id}/', {'recurrence': '', 'status': 'completed'}, format='json'
+        )
+        self.assertEqual(response.status_code, 200, response.data)
+        # Aged first, so a batch ordered by updated_at would hit it every run
+        self.age([series])
+        done = make_tasks(self.user, 2, status='completed')
+        self.age(done)
+
+        self.assertEqual(archive_tasks(self.cutoff, batch_size=1), 2)
+
+        self.assertTrue(Task.objects.filter(pk=series.pk).exists())
+        self.assertEqual(set(ArchivedTask.objects.values_list('id', flat=True)), {t.id for t in done})
+
+    def test_archival_is_not_reported_as_deletion(self):
+        make_habits(self.user, 3, logs=50)
+        tasks = make_tasks(self.user, 40, status='completed')
+        self.age(tasks)
+
+        # A fixed number of queries per batch, none of them per row: the
+        # batch (savepoint, select, insert, delete, release) and the empty
+        # batch that ends the loop
+        with self.assertNumQueries(8):
+            archive_tasks(self.cutoff, batch_size=100)
+        archive_habit_logs(django_timezone.now().date() - timedelta(days=20), batch_size=1000)
+
+        self.assertFalse(ChangeLog.objects.exists())
+
+    def test_archived_logs_leave_analytics_and_history_consistent(self):
+        habit = make_habits(self.user, 1, logs=60)[0]
+        before = habit_analytics(habit, include_archived=True)
+        hot_before = habit_analytics(habit)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            moved = archive_habit_logs(django_timezone.now().date() - timedelta(days=19), batch_size=25)
+
+        self.assertEqual(moved, 40)
+        self.assertEqual(HabitLog.objects.filter(habit=habit).count(), 20)
+        self.assertEqual(len(archived_logs(habit)), 40)
+        # The cached hot-table result was invalidated, not served stale
+        self.assertNotEqual(habit_analytics(habit), hot_before)
+        self.assertEqual(habit_analytics(habit, include_archived=True), before)
+
+
+class PurgeTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = make_user()
+        self.now = django_timezone.now()
+
+    def soft_deleted_data(self, logs):
+        habit = make_habits(self.user, 1, logs=logs)[0]
+        HabitLogArchive.objects.create(habit=habit, year=2020, entries=1, data=pack_logs({'2020-01-01': [True, '']}))
+        series = Task.objects.create(
+            user=self.user, title='Stretch', due_date=utc(2026, 3, 1, 7), recurrence='FREQ=DAILY'
+        )
+        for day in range(1, 4):
+            Task.objects.create(
+                user=self.user, title='Stretch', due_date=utc(2026, 3, day, 7),
+                recurrence_parent=series, occurrence_date=utc(2026, 3, day, 7),
+            )
+        loose = make_tasks(self.user, 3)
+        gone = self.now - timedelta(days=60)
+        HabitStreak.all_objects.filter(pk=habit.pk).update(deleted_at=gone)
+        Task.all_objects.filter(pk__in=[series.pk] + [t.pk for t in loose]).update(deleted_at=gone)
+        habit_analytics(habit)
+        return habit
+
+    def test_purge_removes_children_without_signals(self):
+        kept = make_habits(self.user, 1, logs=5)[0]
+        kept_tasks = make_tasks(self.user, 2)
+        habit = self.soft_deleted_data(logs=30)
+        changes = ChangeLog.objects.count()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            purged = purge_soft_deleted(self.now - timedelta(days=30), batch_size=2)
+
+        self.assertEqual(purged, (1 + 3 + 3, 1))
+        self.assertFalse(HabitStreak.all_objects.filter(pk=habit.pk).exists())
+        self.assertFalse(HabitLog.objects.filter(habit_id=habit.pk).exists())
+        self.assertFalse(HabitLogArchive.objects.filter(habit_id=habit.pk).exists())
+        self.assertEqual(set(Task.all_objects.values_list('pk', flat=True)), {t.pk for t in kept_tasks})
+        self.assertEqual(HabitLog.objects.filter(habit=kept).count(), 5)
+        self.assertEqual(ChangeLog.objects.count(), changes)
+        self.assertIsNone(cache.get(written_key(habit.pk)))
+
+    def test_purge_cost_does_not_grow_with_logs(self):
+        counts = []
+        for logs in (5, 80):
+            self.soft_deleted_data(logs)
+            with CaptureQueriesContext(connection) as queries:
+                purge_soft_deleted(self.now - timedelta(days=30), batch_size=1000)
+            counts.append(len(queries))
+
+        self.assertEqual(counts[0], counts[1])
@@ -0,0 +1,124 @@
+import asyncio
+from unittest import mock
+
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from users.events import CLIENT_QUEUE_SIZE, EventBroker, build_event
+from users.factories import make_habits, make_user
+from users.models import HabitLog, Task
+
+
+def run_broker(scenario):
+    """Run ``scenario(broker)`` on a fresh event loop with NOTIFY disabled"""
+    broker = EventBroker()
+    with mock.patch('users.events.uses_notify', return_value=False):
+        return asyncio.run(scenario(broker))
+
+
+def drain(queue):
+    events = []
+    while not queue.empty():
+        events.append(queue.get_nowait())
+    return events
+
+
+class EventBrokerTests(TestCase):
+    def test_dispatch_reaches_only_the_users_subscribers(self):
+        async def scenario(broker):
+            _, mine = broker.subscribe('alice')
+            _, other = broker.subscribe('bob')
+            broker.dispatch('alice', {'type': 'task.created'})
+            # call_soon_threadsafe delivers on the next loop iteration
+            await asyncio.sleep(0)
+            return drain(mine), drain(other)
+
+        mine, other = run_broker(scenario)
+
+        self.assertEqual(mine, [{'type': 'task.created'}])
+        self.assertEqual(other, [])
+
+    def test_unsubscribed_client_gets_nothing(self):
+        async def scenario(broker):
+            entry = broker.subscribe('alice')
+            broker.unsubscribe('alice', entry)
+            broker.dispatch('alice', {'type': 'task.created'})
+            await asyncio.sleep(0)
+            return drain(entry[1]), dict(broker._subscribers)
+
+        events, subscribers = run_broker(scenario)
+
+        self.assertEqual(events, [])
+        self.assertEqual(subscribers, {})
+
+    def test_full_queue_drops_the_oldest_events(self):
+        async def scenario(broker):
+            _, queue = broker.subscribe('alice')
+            for i in range(CLIENT_QUEUE_SIZE + 5):
+                broker.dispatch('alice', {'n': i})
+            await asyncio.sleep(0)
+            return drain(queue)
+
+        events = run_broker(scenario)
+
+        self.assertEqual(len(events), CLIENT_QUEUE_SIZE)
+        self.assertEqual(events[0], {'n': 5})
+        self.assertEqual(events[-1], {'n': CLIENT_QUEUE_SIZE + 4})
+
+
+class BuildEventTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+        self.client = APIClient(SERVER_NAME='localhost')
+        self.client.force_authenticate(self.user)
+
+    def published(self, method, path, data=None):
+        with mock.patch('users.events.uses_notify', return_value=False), \
+                mock.patch('users.events.broker.dispatch') as dispatch:
+            with self.captureOnCommitCallbacks(execute=True):
+                getattr(self.client, method)(path, data, format='json')
+        return [call.args for call in dispatch.call_args_list]
+
+    def test_created_task_carries_light_fields_only(self):
+        published = self.published('post', '/api/tasks/', {'title': 'Water plants', 'description': 'All of them'})
+
+        [(user_id, event)] = published
+        self.assertEqual(user_id, self.user.pk)
+        self.assertEqual(event['type'], 'task.created')
+        self.assertEqual(event['data']['title'], 'Water plants')
+        self.assertNotIn('description', event['data'])
+
+    def test_soft_delete_is_reported_as_deleted(self):
+        task = Task.objects.create(user=self.user, title='Old')
+
+        [(_, event)] = self.published('delete', f'/api/tasks/{task.pk}/')
+
+        self.assertEqual(event, {'type': 'task.deleted', 'id': str(task.pk)})
+
+    def test_deleted_log_names_its_habit(self):
+        [habit] = make_habits(self.user, 1)
+        log = HabitLog(habit=habit, date=timezone.localdate())
+
+        event = build_event(log, 'deleted')
+
+        self.assertEqual(event['type'], 'habit_log.deleted')
+        self.assertEqual(event['data'], {'habit_id': habit.pk})
+
+
+class EventStreamAuthTests(TestCase):
+    def test_missing_token_is_rejected(self):
+        response = APIClient(SERVER_NAME='localhost').get('/api/events/')
+
+        self.assertEqual(response.status_code, 401)
+
+    def test_invalid_query_token_is_rejected(self):
+        response = APIClient(SERVER_NAME='localhost').get('/api/events/', {'token': 'not-a-jwt'})
+
+        self.assertEqual(response.status_code, 401)
+
+    def test_database_connection_is_released_after_authenticating(self):
+        with mock.patch('users.views.connection') as connection:
+            APIClient(SERVER_NAME='localhost').get('/api/events/', {'token': 'not-a-jwt'})
+
+        connection.close.assert_called_once_with()
@@ -0,0 +1,156 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.decorators import api_view
+from rest_framework.response import Response
+from rest_framework.test import APIClient, APIRequestFactory, force_authenticate
+
+from users.decorators import ClaimHeartbeat, idempotent
+from users.factories import make_user
+from users.models import IdempotencyKey, Task
+
+
+class IdempotencyTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+        self.client = APIClient(SERVER_NAME='localhost')
+        self.client.force_authenticate(self.user)
+
+    def create_task(self, key='key-1', title='Water plants'):
+        return self.client.post('/api/tasks/', {'title': title}, format='json', HTTP_IDEMPOTENCY_KEY=key)
+
+    def test_retry_replays_stored_response(self):
+        first = self.create_task()
+        # The record lives in the database: a retry served by another
+        # worker (another cache) still finds it
+        cache.clear()
+        retry = self.create_task()
+
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(retry.data['id'], first.data['id'])
+        self.assertEqual(Task.objects.filter(user=self.user).count(), 1)
+
+    def test_keys_are_per_user(self):
+        self.create_task()
+        other = APIClient(SERVER_NAME='localhost')
+        other.force_authenticate(make_user())
+
+        response = other.post('/api/tasks/', {'title': 'Water plants'}, format='json', HTTP_IDEMPOTENCY_KEY='key-1')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertNotIn('Idempotent-Replayed', response)
+
+    def test_key_reused_for_different_request(self):
+        self.create_task()
+        response = self.create_task(title='Something else')
+
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(Task.objects.count(), 1)
+
+    def test_validation_errors_are_replayed_too(self):
+        first = self.create_task(title='')
+        retry = self.create_task(title='')
+
+        self.assertEqual(first.status_code, 400)
+        self.assertEqual(retry.status_code, 400)
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+
+    def claim(self, **fields):
+        now = timezone.now()
+        defaults = {'fingerprint': '', 'locked_until': now + timedelta(minutes=1), 'expires_at': now + timedelta(days=1)}
+        return IdempotencyKey.objects.create(user=self.user, key='key-1', **{**defaults, **fields})
+
+    def test_retry_while_first_attempt_runs(self):
+        self.create_task()
+        IdempotencyKey.objects.update(status_code=None, locked_until=timezone.now() + timedelta(minutes=1))
+
+        self.assertEqual(self.create_task().status_code, 409)
+
+    def test_claim_of_dead_worker_is_taken_over(self):
+        self.create_task()
+        Task.objects.all().delete()
+        IdempotencyKey.objects.update(status_code=None, locked_until=timezone.now() - timedelta(seconds=1))
+
+        response = self.create_task()
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Task.objects.count(), 1)
+        self.assertEqual(IdempotencyKey.objects.get().status_code, 201)
+
+    def test_claim_is_refreshed_only_while_the_view_runs(self):
+        with mock.patch('users.decorators.ClaimHeartbeat') as heartbeat:
+            self.create_task()
+
+        heartbeat.assert_called_once_with(IdempotencyKey.objects.get().pk)
+        heartbeat.return_value.start.assert_called_once_with()
+        heartbeat.return_value.stop.assert_called_once_with()
+
+    def test_expired_key_runs_again(self):
+        self.claim(fingerprint='stale', status_code=201, expires_at=timezone.now() - timedelta(seconds=1))
+
+        response = self.create_task()
+
+        self.assertEqual(response.status_code, 201)
+        self.assertNotEqual(IdempotencyKey.objects.get().fingerprint, 'stale')
+
+    def test_server_errors_release_the_key(self):
+        calls = []
+
+        @api_view(['POST'])
+        @idempotent
+        def flaky(request):
+            calls.append(1)
+            if len(calls) == 1:
+                raise RuntimeError('boom')
+            if len(calls) == 2:
+                return Response({'error': 'unavailable'}, status=503)
+            return Response({'ok': True}, status=201)
+
+        def post():
+            request = APIRequestFactory().post('/flaky/', {}, format='json', HTTP_IDEMPOTENCY_KEY='key-1')
+            force_authenticate(request, self.user)
+            return flaky(request)
+
+        with self.assertRaises(RuntimeError):
+            post()
+        self.assertEqual(post().status_code, 503)
+        self.assertEqual(post().status_code, 201)
+        self.assertEqual(post()['Idempotent-Replayed'], 'true')
+        self.assertEqual(len(calls), 3)
+
+
+@override_settings(IDEMPOTENCY_LOCK_TIMEOUT=0.3)
+class ClaimHeartbeatTests(TransactionTestCase):
+    """The heartbeat writes from its own thread and connection"""
+
+    def claim(self, **fields):
+        now = timezone.now()
+        return IdempotencyKey.objects.create(
+            user=make_user(), key='key-1', fingerprint='', locked_until=now - timedelta(seconds=1),
+            expires_at=now + timedelta(days=1), **fields
+        )
+
+    def beat(self, record):
+        heartbeat = ClaimHeartbeat(record.pk)
+        heartbeat.start()
+        heartbeat.stopped.wait(0.25)
+        heartbeat.stop()
+        heartbeat.join(timeout=5)
+        self.assertFalse(heartbeat.is_alive())
+        record.refresh_from_db()
+        return record
+
+    def test_running_claim_is_kept_ahead(self):
+        record = self.beat(self.claim())
+
+        self.assertGreater(record.locked_until, timezone.now())
+
+    def test_finished_claim_is_left_alone(self):
+        record = self.beat(self.claim(status_code=201))
+
+        self.assertLess(record.locked_until, timezone.now())
@@ -0,0 +1,105 @@
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+from rest_framework.test import APIClient
+
+from users.factories import make_user
+from users.layouts import MAX_ID_LENGTH, compile_layout_validator
+
+
+def widget(widget_id='w1', **fields):
+    return {
+        'id': widget_id,
+        'type': 'tasks',
+        'position': {'x': 0, 'y': 0},
+        'size': {'w': 4, 'h': 2},
+        'visibility': 'public',
+        **fields,
+    }
+
+
+class LayoutValidatorTests(SimpleTestCase):
+    validate = staticmethod(compile_layout_validator(max_widgets=5, max_bytes=2000, max_config_bytes=100))
+
+    def assertInvalid(self, layout, message):
+        errors = self.validate(layout)
+        self.assertTrue(any(message in error for error in errors), errors)
+
+    def test_valid_layout(self):
+        layout = {'widgets': [widget('a'), widget('b', type='bio', visibility='private', config={'n': 1})]}
+
+        self.assertEqual(self.validate(layout), [])
+
+    def test_layout_shape(self):
+        self.assertInvalid([], 'must be a JSON object')
+        self.assertInvalid({'widgets': [], 'extra': 1}, "only a 'widgets' key")
+        self.assertInvalid({'widgets': {}}, 'must be an array')
+        self.assertInvalid({'widgets': ['tasks']}, 'widgets[0] must be an object')
+        self.assertInvalid({'widgets': [{**widget(), 'color': 'red'}]}, 'unknown keys: color')
+        self.assertInvalid({'widgets': [{'id': 'a'}]}, 'is missing: position, size, type, visibility')
+
+    def test_bad_type_and_visibility(self):
+        self.assertInvalid({'widgets': [widget(type='clock')]}, '.type must be one of')
+        self.assertInvalid({'widgets': [widget(visibility='friends')]}, ".visibility must be 'public' or 'private'")
+
+    def test_unhashable_values_are_rejected_not_raised(self):
+        for field, value in (('type', []), ('type', {}), ('visibility', ['public']), ('id', {'a': 1})):
+            with self.subTest(field=field, value=value):
+                errors = self.validate({'widgets': [widget(**{field: value})]})
+                self.assertTrue(any(f'.{field}' in error for error in errors), errors)
+        self.assertInvalid({'widgets': [widget(position={'x': [], 'y': 0})]}, '.position must be')
+
+    def test_bounds(self):
+        self.assertInvalid({'widgets': [widget(position={'x': 12, 'y': 0})]}, '.position must be')
+        self.assertInvalid({'widgets': [widget(position={'x': 0, 'y': -1})]}, '.position must be')
+        self.assertInvalid({'widgets': [widget(position={'x': True, 'y': 0})]}, '.position must be')
+        self.assertInvalid({'widgets': [widget(position={'x': 10, 'y': 0})]}, 'fit within the 12-column grid')
+        self.assertInvalid({'widgets': [widget(size={'w': 1, 'h': 25})]}, '.size must be')
+        self.assertInvalid({'widgets': [widget(size={'w': 0, 'h': 1})]}, '.size must be')
+        self.assertInvalid({'widgets': [widget('x' * (MAX_ID_LENGTH + 1))]}, '.id must be a non-empty string')
+        self.assertInvalid({'widgets': [widget('')]}, '.id must be a non-empty string')
+
+    def test_duplicate_ids(self):
+        self.assertInvalid({'widgets': [widget('a'), widget('a')]}, "widgets[1].id 'a' is duplicated")
+
+    def test_config_cap(self):
+        self.assertInvalid({'widgets': [widget(config={'note': 'x' * 100})]}, '.config cannot exceed 100 bytes')
+        self.assertInvalid({'widgets': [widget(config=['x'])]}, '.config must be an object')
+
+    def test_widget_count_and_byte_limits(self):
+        self.assertInvalid({'widgets': [widget(str(i)) for i in range(6)]}, 'at most 5 widgets')
+        self.assertInvalid({'widgets': [widget(config={'note': 'x' * 2000})]}, 'cannot exceed 2000 bytes')
+
+
+class LayoutUpdateTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.owner = make_user()
+
+    def client_for(self, user):
+        client = APIClient(SERVER_NAME='localhost')
+        client.force_authenticate(user)
+        return client
+
+    def test_unhashable_type_is_a_400(self):
+        response = self.client_for(self.owner).patch(
+            '/api/profile/me/layout/', {'layout': {'widgets': [widget(type=[])]}}, format='json'
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('widgets[0].type must be one of', str(response.data))
+
+    def test_visitors_see_public_widgets_only(self):
+        widgets = [widget('shown'), widget('hidden', type='bio', visibility='private')]
+        saved = self.client_for(self.owner).patch(
+            '/api/profile/me/layout/', {'layout': {'widgets': widgets}}, format='json'
+        )
+        self.assertEqual(saved.status_code, 200)
+        path = f'/api/profile/{self.owner.username}/'
+
+        own = self.client_for(self.owner).get(path).data
+        visited = self.client_for(make_user()).get(path).data
+
+        self.assertTrue(own['is_owner'])
+        self.assertEqual([w['id'] for w in own['profile']['layout']['widgets']], ['shown', 'hidden'])
+        self.assertFalse(visited['is_owner'])
+        self.assertEqual(visited['profile']['layout'], {'widgets': [widgets[0]]})
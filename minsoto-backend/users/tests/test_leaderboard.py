@@ -0,0 +1,76 @@
+from unittest import mock
+
+import fakeredis
+from django.db import transaction
+from django.test import TestCase
+
+from users.factories import make_interests, make_user
+from users.leaderboard import GLOBAL_BOARD, DatabaseRanking, RedisRanking, interest_board
+from users.models import HabitStreak, UserInterest
+
+
+class RedisRankingTests(TestCase):
+    def setUp(self):
+        with mock.patch('redis.Redis.from_url', return_value=fakeredis.FakeRedis()):
+            self.ranking = RedisRanking('redis://leaderboard')
+        patcher = mock.patch('users.leaderboard._ranking', self.ranking)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.user = make_user()
+        self.interest = make_interests(1)[0]
+
+    def scores(self, board=GLOBAL_BOARD):
+        return {
+            member.decode(): int(score)
+            for member, score in self.ranking.client.zrange(board, 0, -1, withscores=True)
+        }
+
+    def test_committed_changes_reach_the_boards(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            UserInterest.objects.create(user=self.user, interest=self.interest)
+            habit = HabitStreak.objects.create(user=self.user, name='Run', is_public=True, current_streak=4)
+
+        self.assertEqual(self.scores(), {str(habit.pk): 4})
+        self.assertEqual(self.scores(interest_board(self.interest.pk)), {str(habit.pk): 4})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            habit.is_public = False
+            habit.save()
+
+        self.assertEqual(self.scores(), {})
+        self.assertEqual(self.scores(interest_board(self.interest.pk)), {})
+
+    def test_rolled_back_changes_leave_no_score(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            habit = HabitStreak.objects.create(user=self.user, name='Run', is_public=True, current_streak=4)
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            try:
+                with transaction.atomic():
+                    habit.current_streak = 50
+                    habit.save()
+                    HabitStreak.objects.create(user=self.user, name='Swim', is_public=True, current_streak=9)
+                    UserInterest.objects.create(user=self.user, interest=self.interest)
+                    raise RuntimeError('rolled back')
+            except RuntimeError:
+                pass
+
+        self.assertEqual(callbacks, [])
+        self.assertEqual(self.scores(), {str(habit.pk): 4})
+        self.assertEqual(self.scores(interest_board(self.interest.pk)), {})
+
+    def test_redis_and_database_ranks_agree(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            habits = [
+                HabitStreak.objects.create(user=self.user, name=f'Habit {i}', is_public=True, current_streak=i % 3)
+                for i in range(6)
+            ]
+
+        database = DatabaseRanking()
+        for habit in habits:
+            with self.subTest(habit=habit.pk):
+                self.assertEqual(self.ranking.rank(habit), database.rank(habit))
+        self.assertEqual(
+            self.ranking.top(6),
+            [(str(habit_id), streak) for habit_id, streak in database.top(6)],
+        )
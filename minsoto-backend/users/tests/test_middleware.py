@@ -0,0 +1,45 @@
+import gzip
+from unittest import skipIf
+
+from django.http import HttpResponse
+from django.test import SimpleTestCase
+from django.test.client import RequestFactory
+
+from users.middleware import CompressionMiddleware, brotli
+
+BODY = b'{"access": "secret-token", "items": [' + b'"habit",' * 400 + b'"end"]}'
+
+
+def respond(path, accept_encoding, body=BODY):
+    middleware = CompressionMiddleware(lambda request: HttpResponse(body, content_type='application/json'))
+    return middleware(RequestFactory().get(path, HTTP_ACCEPT_ENCODING=accept_encoding))
+
+
+class CompressionTests(SimpleTestCase):
+    def test_gzip_output_is_padded_with_random_bytes(self):
+        responses = [respond('/api/habits/', 'gzip') for _ in range(10)]
+
+        self.assertTrue(all(response['Content-Encoding'] == 'gzip' for response in responses))
+        self.assertTrue(all(gzip.decompress(response.content) == BODY for response in responses))
+        self.assertGreater(len({len(response.content) for response in responses}), 1)
+
+    @skipIf(brotli is None, 'brotli is not installed')
+    def test_brotli_preferred_when_accepted(self):
+        response = respond('/api/habits/', 'gzip, br')
+
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(brotli.decompress(response.content), BODY)
+
+    def test_token_endpoints_are_never_compressed(self):
+        for path in ('/api/auth/google/', '/api/auth/token/refresh/', '/api/auth/setup-username/'):
+            with self.subTest(path=path):
+                response = respond(path, 'gzip, br')
+
+                self.assertFalse(response.has_header('Content-Encoding'))
+                self.assertEqual(response.content, BODY)
+                self.assertIn('Accept-Encoding', response['Vary'])
+
+    def test_small_responses_pass_through(self):
+        response = respond('/api/habits/', 'gzip', body=b'{}')
+
+        self.assertFalse(response.has_header('Content-Encoding'))
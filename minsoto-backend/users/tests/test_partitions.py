@@ -0,0 +1,66 @@
+import importlib
+from datetime import date, timedelta
+from unittest import skipUnless
+
+from django.apps import apps
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase
+
+from users.factories import make_habits, make_user
+from users.models import HabitLog
+
+migration = importlib.import_module('users.migrations.0011_partition_habitlog')
+
+
+def table_state():
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT relkind FROM pg_class WHERE relname = 'users_habitlog'")
+        kind = cursor.fetchone()[0]
+        cursor.execute(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conrelid = 'users_habitlog'::regclass"
+        )
+        constraints = dict(cursor.fetchall())
+        cursor.execute("SELECT indexname FROM pg_indexes WHERE tablename = 'users_habitlog'")
+        indexes = {name for name, in cursor.fetchall()}
+        cursor.execute("SELECT count(*) FROM pg_inherits WHERE inhparent = 'users_habitlog'::regclass")
+        partitions = cursor.fetchone()[0]
+    return kind, constraints, indexes, partitions
+
+
+def run(operation):
+    with connection.schema_editor() as schema_editor:
+        operation(apps, schema_editor)
+
+
+@skipUnless(connection.vendor == 'postgresql', 'HabitLog is only partitioned on PostgreSQL')
+class PartitionMigrationTests(TestCase):
+    def setUp(self):
+        self.habit = make_habits(make_user(), 1)[0]
+        first = date.today() - timedelta(days=400)
+        HabitLog.objects.bulk_create([
+            HabitLog(habit=self.habit, date=first + timedelta(days=i), completed=i % 2 == 0)
+            for i in range(401)
+        ])
+        self.logs = set(HabitLog.objects.values_list('id', 'date', 'completed'))
+
+    def test_partition_and_reverse_keep_every_row(self):
+        # The test database is built from the models, as 0010 left the table
+        plain = table_state()
+        self.assertEqual(plain[0], 'r')
+
+        run(migration.partition_habitlog)
+
+        kind, constraints, _, partitions = table_state()
+        self.assertEqual(kind, 'p')
+        self.assertEqual(constraints['users_habitlog_pkey'], 'PRIMARY KEY (id, date)')
+        # 14 months of logs, three ahead, and the default partition
+        self.assertEqual(partitions, 14 + 3 + 1)
+        self.assertEqual(set(HabitLog.objects.values_list('id', 'date', 'completed')), self.logs)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            HabitLog.objects.create(habit=self.habit, date=date.today())
+
+        run(migration.unpartition_habitlog)
+
+        self.assertEqual(table_state(), plain)
+        self.assertEqual(set(HabitLog.objects.values_list('id', 'date', 'completed')), self.logs)
@@ -0,0 +1,52 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from users.factories import add_interests, make_habits, make_interests, make_tasks, make_user
+from users.profile_cards import get_profile_cards
+
+
+class ProfileCardTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_stats_for_every_user_in_the_batch(self):
+        busy = make_user()
+        make_tasks(busy, 10, status='completed')
+        make_tasks(busy, 5, status='todo')
+        make_habits(busy, 3)
+        public, private = make_interests(2)
+        add_interests(busy, [public])
+        add_interests(busy, [private], is_public=False)
+        idle = make_user()
+
+        cards = get_profile_cards([busy.username.upper(), idle.username])
+
+        self.assertEqual(cards[busy.username.upper()]['stats'], {
+            'total_tasks': 15, 'completed_tasks': 10, 'active_habits': 3, 'interests_count': 1,
+        })
+        self.assertEqual(cards[busy.username.upper()]['interests'], [public.name])
+        self.assertEqual(cards[idle.username]['stats'], {
+            'total_tasks': 0, 'completed_tasks': 0, 'active_habits': 0, 'interests_count': 0,
+        })
+
+    def test_rename_drops_the_card_cached_under_the_old_name(self):
+        user = make_user()
+        old_name = user.username
+        self.assertIn(old_name, get_profile_cards([old_name]))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            user.username = f'{old_name}-renamed'
+            user.save()
+
+        self.assertEqual(get_profile_cards([old_name]), {})
+        self.assertEqual(get_profile_cards([user.username])[user.username]['username'], user.username)
+
+    def test_saves_that_keep_the_username_skip_the_lookup(self):
+        user = make_user()
+
+        with CaptureQueriesContext(connection) as queries:
+            user.save(update_fields=['last_login'])
+
+        self.assertFalse([query for query in queries if query['sql'].startswith('SELECT')])
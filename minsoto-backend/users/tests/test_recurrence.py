@@ -0,0 +1,128 @@
+from datetime import datetime, timezone
+from itertools import islice
+from zoneinfo import ZoneInfo
+
+from django.test import SimpleTestCase
+
+from users.recurrence import RecurrenceError, RecurrenceRule, between, occurrences
+
+NEW_YORK = ZoneInfo('America/New_York')
+
+
+def utc(*args):
+    return datetime(*args, tzinfo=timezone.utc)
+
+
+def local(moment, zone=NEW_YORK):
+    return moment.astimezone(zone).replace(tzinfo=None)
+
+
+def first(rule, dtstart, tz_name='UTC', n=10):
+    return list(islice(occurrences(RecurrenceRule.parse(rule), dtstart, tz_name), n))
+
+
+class DaylightSavingTests(SimpleTestCase):
+    def test_daily_keeps_wall_clock_across_spring_forward(self):
+        # 09:00 EST is 14:00 UTC; from 2026-03-08 it is 09:00 EDT, 13:00 UTC
+        start = datetime(2026, 3, 6, 9, tzinfo=NEW_YORK)
+        moments = first('FREQ=DAILY', start, 'America/New_York', n=4)
+
+        self.assertEqual([local(m).hour for m in moments], [9, 9, 9, 9])
+        self.assertEqual([m.hour for m in moments], [14, 14, 13, 13])
+
+    def test_daily_keeps_wall_clock_across_fall_back(self):
+        start = datetime(2026, 10, 31, 9, tzinfo=NEW_YORK)
+        moments = first('FREQ=DAILY', start, 'America/New_York', n=3)
+
+        self.assertEqual([local(m).hour for m in moments], [9, 9, 9])
+        self.assertEqual([m.hour for m in moments], [13, 14, 14])
+
+    def test_time_in_spring_forward_gap_is_not_dropped(self):
+        # 02:30 does not exist on 2026-03-08; the slot still occurs that day
+        start = datetime(2026, 3, 7, 2, 30, tzinfo=NEW_YORK)
+        moments = first('FREQ=DAILY', start, 'America/New_York', n=3)
+
+        self.assertEqual([local(m).day for m in moments], [7, 8, 9])
+        self.assertEqual(moments[1], utc(2026, 3, 8, 7, 30))
+
+    def test_ambiguous_fall_back_time_takes_first_offset(self):
+        start = datetime(2026, 10, 31, 1, 30, tzinfo=NEW_YORK)
+        moments = first('FREQ=DAILY', start, 'America/New_York', n=2)
+
+        self.assertEqual(moments[1], utc(2026, 11, 1, 5, 30))
+
+    def test_weekly_window_spanning_transition(self):
+        rule = RecurrenceRule.parse('FREQ=WEEKLY;BYDAY=MO,FR')
+        start = datetime(2026, 2, 2, 18, tzinfo=NEW_YORK)
+        moments = list(between(rule, start, 'America/New_York', utc(2026, 3, 1), utc(2026, 3, 21)))
+
+        self.assertEqual([local(m).day for m in moments], [2, 6, 9, 13, 16, 20])
+        self.assertTrue(all(local(m).hour == 18 for m in moments))
+
+
+class MonthEndTests(SimpleTestCase):
+    def test_start_on_31st_skips_shorter_months(self):
+        moments = first('FREQ=MONTHLY', utc(2026, 1, 31, 8), n=4)
+
+        self.assertEqual([(m.month, m.day) for m in moments], [(1, 31), (3, 31), (5, 31), (7, 31)])
+
+    def test_last_day_of_month(self):
+        moments = first('FREQ=MONTHLY;BYMONTHDAY=-1', utc(2028, 1, 15, 8), n=4)
+
+        self.assertEqual([(m.month, m.day) for m in moments], [(1, 31), (2, 29), (3, 31), (4, 30)])
+
+    def test_last_day_in_a_common_year(self):
+        moments = first('FREQ=MONTHLY;BYMONTHDAY=-1', utc(2027, 2, 1, 8), n=1)
+
+        self.assertEqual((moments[0].month, moments[0].day), (2, 28))
+
+    def test_first_and_last_day_are_not_duplicated(self):
+        # In a 31-day month BYMONTHDAY=31 and -1 are the same day
+        moments = first('FREQ=MONTHLY;BYMONTHDAY=1,31,-1', utc(2026, 1, 1, 8), n=5)
+
+        self.assertEqual([(m.month, m.day) for m in moments], [(1, 1), (1, 31), (2, 1), (2, 28), (3, 1)])
+
+    def test_leap_day_yearly_only_in_leap_years(self):
+        moments = first('FREQ=YEARLY', utc(2024, 2, 29, 8), n=3)
+
+        self.assertEqual([m.year for m in moments], [2024, 2028, 2032])
+
+    def test_rule_that_never_matches_again_ends(self):
+        # Every 12 months from April: the 31st never comes round
+        moments = first('FREQ=MONTHLY;INTERVAL=12;BYMONTHDAY=31', utc(2026, 4, 1, 8))
+
+        self.assertEqual(moments, [])
+
+    def test_month_end_in_local_time_crosses_utc_month(self):
+        # 20:00 in New York on the 31st is already the 1st in UTC
+        start = datetime(2026, 1, 31, 20, tzinfo=NEW_YORK)
+        moments = first('FREQ=MONTHLY;BYMONTHDAY=-1', start, 'America/New_York', n=2)
+
+        self.assertEqual([local(m).date().isoformat() for m in moments], ['2026-01-31', '2026-02-28'])
+        self.assertEqual([(m.month, m.day) for m in moments], [(2, 1), (3, 1)])
+
+
+class WindowTests(SimpleTestCase):
+    def test_window_skip_matches_full_expansion(self):
+        for text in ('FREQ=DAILY;INTERVAL=3', 'FREQ=WEEKLY;INTERVAL=2;BYDAY=TU,SU',
+                     'FREQ=MONTHLY;BYMONTHDAY=-1', 'FREQ=YEARLY'):
+            rule = RecurrenceRule.parse(text)
+            start = datetime(2020, 1, 31, 9, tzinfo=NEW_YORK)
+            window = (utc(2026, 2, 1), utc(2026, 12, 1))
+            expected = [
+                m for m in islice(occurrences(rule, start, 'America/New_York'), 5000)
+                if window[0] <= m < window[1]
+            ]
+            with self.subTest(rule=text):
+                self.assertEqual(list(between(rule, start, 'America/New_York', *window)), expected)
+
+    def test_count_and_until(self):
+        self.assertEqual(len(first('FREQ=DAILY;COUNT=3', utc(2026, 1, 1))), 3)
+        moments = first('FREQ=DAILY;UNTIL=20260103', utc(2026, 1, 1, 8))
+        self.assertEqual([m.day for m in moments], [1, 2, 3])
+
+    def test_invalid_rules(self):
+        for text in ('FREQ=HOURLY', 'FREQ=DAILY;BYDAY=MO', 'FREQ=MONTHLY;BYMONTHDAY=0',
+                     'FREQ=DAILY;COUNT=2;UNTIL=20260101', 'FREQ=DAILY;BYSETPOS=1'):
+            with self.subTest(rule=text), self.assertRaises(RecurrenceError):
+                RecurrenceRule.parse(text)
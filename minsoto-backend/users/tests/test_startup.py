@@ -0,0 +1,53 @@
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.test import SimpleTestCase
+
+# What a worker imports before serving its first request
+BOOT_CODE = (
+    'import django; django.setup(); '
+    'import minsoto_backend.asgi; import minsoto_backend.urls'
+)
+
+# Imported on first use, never while a worker boots
+LAZY_MODULES = ('numpy', 'google.oauth2.id_token', 'google.auth.transport.requests')
+
+
+def parse_importtime(output):
+    """Parse ``-X importtime`` stderr into {module: self microseconds}"""
+    modules = {}
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, _, name = line[len('import time:'):].split('|')
+        modules[name.strip()] = int(self_us)
+    return modules
+
+
+class StartupImportTests(SimpleTestCase):
+    def profile_boot(self):
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', BOOT_CODE],
+            capture_output=True, text=True, cwd=settings.BASE_DIR,
+            env={**os.environ, 'DJANGO_SETTINGS_MODULE': 'minsoto_backend.settings'},
+        )
+        self.assertEqual(result.returncode, 0, result.stderr[-2000:])
+        return parse_importtime(result.stderr)
+
+    def test_boot_stays_within_import_budget(self):
+        # Best of three, like timeit: other processes on a shared machine only
+        # ever make a run slower
+        totals = []
+        for _ in range(3):
+            modules = self.profile_boot()
+            totals.append(sum(modules.values()) / 1000)
+            if totals[-1] <= settings.STARTUP_IMPORT_BUDGET_MS:
+                break
+
+        self.assertLessEqual(
+            min(totals), settings.STARTUP_IMPORT_BUDGET_MS,
+            f'Worker boot imports took {min(totals):.0f} ms',
+        )
+        self.assertEqual([name for name in LAZY_MODULES if name in modules], [])
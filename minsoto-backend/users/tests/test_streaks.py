@@ -0,0 +1,72 @@
+import threading
+import time
+
+from django.db import OperationalError, connection
+from django.test import TransactionTestCase
+
+from users.factories import make_user
+from users.models import HabitStreak
+from users.streaks import increment_streak
+
+
+class ConcurrentIncrementTests(TransactionTestCase):
+    """Threads with their own connections check in on one habit at once"""
+    threads = 8
+    increments = 25
+
+    def hammer(self, habit, user, **kwargs):
+        barrier = threading.Barrier(self.threads)
+        kept = []
+
+        def worker():
+            try:
+                barrier.wait()
+                for _ in range(self.increments):
+                    for _ in range(200):
+                        try:
+                            kept.append(increment_streak(habit.pk, user, **kwargs))
+                            break
+                        except OperationalError:
+                            # The shared in-memory SQLite test database locks
+                            # whole tables instead of waiting; try again
+                            time.sleep(0.001)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(self.threads)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return kept
+
+    def test_no_increment_is_lost(self):
+        user = make_user()
+        habit = HabitStreak.objects.create(user=user, name='Run', longest_streak=5)
+
+        kept = self.hammer(habit, user)
+
+        expected = self.threads * self.increments
+        habit.refresh_from_db()
+        self.assertEqual(len(kept), expected)
+        self.assertEqual(habit.current_streak, expected)
+        self.assertEqual(habit.longest_streak, expected)
+        # Every caller saw its own increment applied
+        self.assertEqual(sorted(h.current_streak for h in kept), list(range(1, expected + 1)))
+
+    def test_longest_streak_never_goes_down(self):
+        user = make_user()
+        habit = HabitStreak.objects.create(user=user, name='Run', longest_streak=1000)
+
+        self.hammer(habit, user, longest_at_least=10)
+
+        habit.refresh_from_db()
+        self.assertEqual(habit.current_streak, self.threads * self.increments)
+        self.assertEqual(habit.longest_streak, 1000)
+
+    def test_other_users_habit_is_untouched(self):
+        habit = HabitStreak.objects.create(user=make_user(), name='Run')
+
+        self.assertIsNone(increment_streak(habit.pk, make_user()))
+        habit.refresh_from_db()
+        self.assertEqual(habit.current_streak, 0)
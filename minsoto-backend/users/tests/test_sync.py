@@ -0,0 +1,64 @@
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from users.factories import make_user
+from users.models import ChangeCounter, ChangeLog
+
+
+class SyncTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+        self.client = APIClient(SERVER_NAME='localhost')
+        self.client.force_authenticate(self.user)
+
+    def sync(self, since=None):
+        response = self.client.get('/api/sync/', {'since': since} if since is not None else {})
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_versions_count_up_per_user(self):
+        other = make_user()
+        task = self.client.post('/api/tasks/', {'title': 'Water plants'}, format='json').data
+        self.client.patch(f"/api/tasks/{task['id']}/", {'status': 'completed'}, format='json')
+
+        self.assertEqual(
+            list(ChangeLog.objects.filter(user=self.user).order_by('version').values_list('version', flat=True)),
+            [1, 2],
+        )
+        self.assertEqual(ChangeCounter.objects.get(user=self.user).value, 2)
+        self.assertFalse(ChangeCounter.objects.filter(user=other).exists())
+
+    def test_delta_after_snapshot(self):
+        self.client.post('/api/tasks/', {'title': 'Before'}, format='json')
+        snapshot = self.sync()
+        self.assertEqual(snapshot['token'], '1')
+        self.assertEqual(len(snapshot['changes']['tasks']), 1)
+
+        habit = self.client.post('/api/habits/', {'name': 'Read'}, format='json').data
+        self.client.post(f"/api/habits/{habit['id']}/increment/", {'by': 2}, format='json')
+        delta = self.sync(snapshot['token'])
+
+        self.assertEqual(delta['token'], '3')
+        self.assertEqual(delta['changes']['tasks'], [])
+        self.assertEqual([h['current_streak'] for h in delta['changes']['habits']], [2])
+        self.assertEqual(self.sync(delta['token'])['changes']['habits'], [])
+
+    def test_deletes_are_reported(self):
+        task = self.client.post('/api/tasks/', {'title': 'Gone soon'}, format='json').data
+        token = self.sync()['token']
+        self.client.delete(f"/api/tasks/{task['id']}/")
+
+        self.assertEqual(self.sync(token)['deleted']['tasks'], [task['id']])
+
+    def test_failed_write_leaves_no_log_row(self):
+        self.client.post('/api/tasks/', {'title': 'Kept'}, format='json')
+        response = self.client.post('/api/tasks/', {'title': ''}, format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(ChangeLog.objects.filter(user=self.user).count(), 1)
+
+    def test_deleting_user_with_synced_rows(self):
+        self.client.post('/api/tasks/', {'title': 'Owned'}, format='json')
+        self.user.delete()
+
+        self.assertFalse(ChangeLog.objects.exists())
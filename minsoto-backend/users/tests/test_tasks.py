@@ -0,0 +1,194 @@
+from datetime import datetime, timedelta, timezone
+
+from django.test import TestCase
+from django.utils import timezone as django_timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework.test import APIClient
+
+from users.factories import make_user
+from users.models import Task
+
+WINDOW = {'due_after': '2026-03-01T00:00:00Z', 'due_before': '2026-03-08T00:00:00Z'}
+
+
+def utc(*args):
+    return datetime(*args, tzinfo=timezone.utc)
+
+
+class TaskWindowTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = make_user()
+        cls.daily = Task.objects.create(
+            user=cls.user, title='Stretch', priority='low',
+            due_date=utc(2026, 2, 1, 7), recurrence='FREQ=DAILY',
+        )
+        cls.one_off = Task.objects.create(
+            user=cls.user, title='Dentist', priority='high', due_date=utc(2026, 3, 4, 15),
+        )
+
+    def setUp(self):
+        self.client = APIClient(SERVER_NAME='localhost')
+        self.client.force_authenticate(self.user)
+
+    def window(self, **params):
+        response = self.client.get('/api/tasks/', {**WINDOW, **params})
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data
+
+    def test_rows_and_occurrences_merge_by_due_date(self):
+        for params in ({}, {'ordering': 'due_date'}):
+            with self.subTest(**params):
+                tasks = self.window(**params)
+                self.assertEqual(len(tasks), 8)
+                self.assertEqual([t['due_date'] for t in tasks], sorted(t['due_date'] for t in tasks))
+                self.assertEqual(tasks[4]['title'], 'Dentist')
+
+    def test_descending_and_multi_key_ordering(self):
+        tasks = self.window(ordering='-due_date')
+        self.assertEqual([t['due_date'] for t in tasks], sorted((t['due_date'] for t in tasks), reverse=True))
+
+        tasks = self.window(ordering='-priority,due_date')
+        self.assertEqual(tasks[0]['title'], 'Dentist')
+        self.assertEqual([t['due_date'] for t in tasks[1:]], sorted(t['due_date'] for t in tasks[1:]))
+
+    def test_pagination_applies_to_merged_list(self):
+        first = self.client.get('/api/tasks/', {**WINDOW, 'ordering': 'due_date', 'limit': 3}).data
+        second = self.client.get('/api/tasks/', {**WINDOW, 'ordering': 'due_date', 'limit': 3, 'offset': 3}).data
+
+        self.assertEqual(first['count'], 8)
+        self.assertEqual(len(first['results']), 3)
+        self.assertIsNotNone(first['next'])
+        self.assertEqual(
+            [t['due_date'] for t in first['results'] + second['results']],
+            [t['due_date'] for t in self.window(ordering='due_date')[:6]],
+        )
+        self.assertEqual(second['results'][1]['title'], 'Dentist')
+
+    def test_materialized_occurrence_replaces_its_slot(self):
+        response = self.client.post(
+            f'/api/tasks/{self.daily.id}/occurrences/',
+            {'occurrence_date': '2026-03-02T07:00:00Z', 'status': 'completed'},
+            format='json',
+        )
+        self.assertEqual(response.status_code, 201, response.data)
+
+        tasks = self.window()
+        slot = [t for t in tasks if parse_datetime(t['due_date']) == utc(2026, 3, 2, 7)]
+        self.assertEqual(len(tasks), 8)
+        self.assertEqual([t['status'] for t in slot], ['completed'])
+
+    def test_occurrence_keeps_the_series_timezone(self):
+        series = Task.objects.create(
+            user=self.user, title='Standup', due_date=utc(2026, 2, 2, 8),
+            recurrence='FREQ=DAILY', recurrence_timezone='Europe/Berlin',
+        )
+
+        response = self.client.post(
+            f'/api/tasks/{series.id}/occurrences/',
+            {'occurrence_date': '2026-03-02T08:00:00Z', 'status': 'completed'},
+            format='json',
+        )
+
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(response.data['recurrence_timezone'], 'Europe/Berlin')
+
+    def test_rejected_occurrence_edit_materializes_nothing(self):
+        response = self.client.post(
+            f'/api/tasks/{self.daily.id}/occurrences/',
+            {'occurrence_date': '2026-03-02T07:00:00Z', 'priority': 'urgent'},
+            format='json',
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Task.all_objects.filter(recurrence_parent=self.daily).exists())
+
+
+class TaskQueryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = make_user()
+        now = django_timezone.now()
+        rows = {
+            'late': {'priority': 'high', 'due_date': now - timedelta(days=2)},
+            'late but done': {'priority': 'low', 'due_date': now - timedelta(days=1), 'status': 'completed'},
+            'upcoming': {'priority': 'medium', 'due_date': now + timedelta(days=3), 'is_public': True},
+            'someday': {'priority': 'low', 'is_public': True},
+        }
+        cls.tasks = {
+            title: Task.objects.create(user=cls.user, title=title, **fields)
+            for title, fields in rows.items()
+        }
+        cls.now = now
+
+    def setUp(self):
+        self.client = APIClient(SERVER_NAME='localhost')
+        self.client.force_authenticate(self.user)
+
+    def titles(self, **params):
+        response = self.client.get('/api/tasks/', params)
+        self.assertEqual(response.status_code, 200, response.data)
+        return sorted(task['title'] for task in response.data)
+
+    def test_filters(self):
+        cases = [
+            ({'priority': 'high,low'}, ['late', 'late but done', 'someday']),
+            ({'is_public': 'true'}, ['someday', 'upcoming']),
+            ({'is_public': 'false'}, ['late', 'late but done']),
+            ({'overdue': 'true'}, ['late']),
+            ({'overdue': 'false'}, ['late but done', 'someday', 'upcoming']),
+            ({'due_after': self.now.isoformat()}, ['upcoming']),
+            ({'due_before': self.now.isoformat()}, ['late', 'late but done']),
+            ({'priority': 'low', 'is_public': 'true'}, ['someday']),
+        ]
+        for params, expected in cases:
+            with self.subTest(**params):
+                self.assertEqual(self.titles(**params), expected)
+
+    def test_ordering_puts_undated_tasks_last(self):
+        by_priority = self.client.get('/api/tasks/', {'ordering': '-priority'}).data
+        by_due = self.client.get('/api/tasks/', {'ordering': '-due_date'}).data
+
+        self.assertEqual([t['priority'] for t in by_priority], ['high', 'medium', 'low', 'low'])
+        self.assertEqual([t['title'] for t in by_due], ['upcoming', 'late but done', 'late', 'someday'])
+
+    def test_invalid_parameters_are_rejected(self):
+        for params, field in [
+            ({'ordering': 'password'}, 'ordering'),
+            ({'ordering': 'due_date,-user'}, 'ordering'),
+            ({'priority': 'urgent'}, 'priority'),
+            ({'due_after': 'tomorrow'}, 'due_after'),
+        ]:
+            with self.subTest(**params):
+                response = self.client.get('/api/tasks/', params)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn(field, response.data)
+
+    def test_search_matches_title_and_description(self):
+        Task.objects.create(user=self.user, title='Groceries', description='Buy oat milk')
+        Task.objects.create(user=make_user(), title='Buy milk')
+
+        self.assertEqual(self.titles(q='milk'), ['Groceries'])
+        self.assertEqual(self.titles(q='oat milk'), ['Groceries'])
+        self.assertEqual(self.titles(q='oat upcoming'), [])
+        # Stray quotes are not a query syntax error
+        self.assertEqual(self.titles(q='milk"'), ['Groceries'])
+
+    def test_search_follows_updates_and_deletes(self):
+        task = Task.objects.create(user=self.user, title='Call plumber')
+        self.client.patch(f'/api/tasks/{task.pk}/', {'title': 'Call electrician'}, format='json')
+
+        self.assertEqual(self.titles(q='plumber'), [])
+        self.assertEqual(self.titles(q='electrician'), ['Call electrician'])
+
+        Task.all_objects.filter(pk=task.pk).delete()
+        # SQLite may hand the deleted rowid to the next row
+        Task.objects.create(user=self.user, title='Water plants')
+
+        self.assertEqual(self.titles(q='electrician'), [])
+        self.assertEqual(self.titles(q='plants'), ['Water plants'])
+
+    def test_soft_deleted_tasks_are_not_found(self):
+        self.client.delete(f"/api/tasks/{self.tasks['upcoming'].pk}/")
+
+        self.assertEqual(self.titles(q='upcoming'), [])
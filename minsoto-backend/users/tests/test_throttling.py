@@ -0,0 +1,151 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+import fakeredis
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.client import RequestFactory
+from rest_framework.response import Response
+from rest_framework.test import APIClient
+
+from users import decorators
+from users.checks import redis_configured
+from users.decorators import coalesce_get
+from users.factories import make_user
+from users.throttling import LocalBuckets, RedisBuckets, TokenBucketThrottle
+
+
+def spend_concurrently(buckets, attempts):
+    barrier = threading.Barrier(attempts)
+
+    def take(_):
+        barrier.wait()
+        return buckets.take('bucket', 10, 0.0, 1000.0, 60)[0]
+
+    with ThreadPoolExecutor(attempts) as pool:
+        return sum(pool.map(take, range(attempts)))
+
+
+class BucketTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_local_bucket_never_overspends(self):
+        self.assertEqual(spend_concurrently(LocalBuckets(), 25), 10)
+
+    def test_bucket_refills_over_time(self):
+        buckets = LocalBuckets()
+        for _ in range(2):
+            buckets.take('bucket', 2, 1.0, 1000.0, 60)
+
+        self.assertEqual(buckets.take('bucket', 2, 1.0, 1000.5, 60), (False, 0.5))
+        self.assertTrue(buckets.take('bucket', 2, 1.0, 1001.0, 60)[0])
+
+    def test_redis_bucket_is_atomic_across_clients(self):
+        server = fakeredis.FakeServer()
+        with mock.patch('redis.Redis.from_url', side_effect=lambda url: fakeredis.FakeRedis(server=server)):
+            workers = [RedisBuckets('redis://shared') for _ in range(3)]
+
+        allowed = [worker.take('bucket', 4, 1.0, 1000.0, 60) for worker in workers * 2]
+        self.assertEqual([ok for ok, _ in allowed], [True] * 4 + [False] * 2)
+        self.assertEqual(allowed[3][1], 0.0)
+        self.assertEqual(workers[0].take('bucket', 4, 1.0, 1001.5, 60), (True, 0.5))
+
+        with mock.patch('redis.Redis.from_url', return_value=fakeredis.FakeRedis()):
+            self.assertEqual(spend_concurrently(RedisBuckets('redis://shared'), 25), 10)
+
+    def test_production_requires_redis(self):
+        with override_settings(REQUIRE_REDIS=True, REDIS_URL=''):
+            self.assertEqual([error.id for error in redis_configured(None)], ['users.E001'])
+        with override_settings(REQUIRE_REDIS=True, REDIS_URL='redis://cache:6379/0'):
+            self.assertEqual(redis_configured(None), [])
+
+
+class ThrottleTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient(SERVER_NAME='localhost')
+        self.client.force_authenticate(make_user())
+
+    def test_endpoint_bucket_runs_dry(self):
+        with mock.patch.dict(TokenBucketThrottle.THROTTLE_RATES, {'widget_data': '2/min'}):
+            statuses = [self.client.get('/api/widgets/data/').status_code for _ in range(2)]
+            blocked = self.client.get('/api/widgets/data/')
+
+        self.assertEqual(statuses, [200, 200])
+        self.assertEqual(blocked.status_code, 429)
+        self.assertIn('Retry-After', blocked)
+        # Other endpoints keep their own bucket
+        self.assertEqual(self.client.get('/api/tasks/').status_code, 200)
+
+    def test_unlisted_endpoints_get_separate_buckets_at_the_user_rate(self):
+        with mock.patch.dict(TokenBucketThrottle.THROTTLE_RATES, {'user': '2/min'}):
+            statuses = [self.client.get('/api/tasks/').status_code for _ in range(3)]
+            other = self.client.get('/api/habits/')
+
+        self.assertEqual(statuses, [200, 200, 429])
+        self.assertEqual(other.status_code, 200)
+
+
+class CoalesceTests(SimpleTestCase):
+    def setUp(self):
+        self.user = mock.Mock(pk=1, is_authenticated=True)
+        self.calls = 0
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.status = 200
+
+        @coalesce_get
+        def view(request):
+            self.calls += 1
+            call = self.calls
+            self.started.set()
+            self.release.wait(5)
+            return Response({'call': call}, status=self.status)
+
+        self.view = view
+
+    def get(self, path='/api/widgets/data/'):
+        request = RequestFactory().get(path)
+        request.user = self.user
+        return self.view(request)
+
+    def run_concurrently(self, waiters):
+        """One leader and ``waiters`` requests that join it before it finishes"""
+        joined = threading.Semaphore(0)
+        wait = decorators.Flight.wait
+
+        def counting_wait(flight, timeout):
+            joined.release()
+            return wait(flight, timeout)
+
+        with mock.patch.object(decorators.Flight, 'wait', counting_wait), ThreadPoolExecutor(waiters + 1) as pool:
+            leader = pool.submit(self.get)
+            self.started.wait(5)
+            followers = [pool.submit(self.get) for _ in range(waiters)]
+            for _ in range(waiters):
+                joined.acquire()
+            self.release.set()
+            return leader.result(), [future.result() for future in followers]
+
+    def test_waiters_share_the_leaders_response(self):
+        leader, followers = self.run_concurrently(4)
+
+        self.assertEqual(self.calls, 1)
+        self.assertEqual([response.data for response in followers], [leader.data] * 4)
+
+    def test_finished_result_is_not_reused(self):
+        self.release.set()
+
+        self.assertEqual(self.get().data, {'call': 1})
+        self.assertEqual(self.get().data, {'call': 2})
+        self.assertEqual(decorators._flights, {})
+
+    def test_failed_leader_is_not_shared(self):
+        self.status = 503
+
+        leader, followers = self.run_concurrently(2)
+
+        self.assertEqual(self.calls, 3)
+        self.assertEqual(leader.status_code, 503)
@@ -0,0 +1,54 @@
+from unittest import mock
+
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from users.factories import make_user
+from users.models import CustomUser
+from users.usernames import username_cache
+
+
+class UsernameTests(TestCase):
+    def setUp(self):
+        username_cache.clear()
+        self.alice = make_user()
+        CustomUser.objects.filter(pk=self.alice.pk).update(username='alice')
+        self.alice.refresh_from_db()
+        self.newcomer = make_user(is_setup_complete=False)
+
+    def client_for(self, user):
+        client = APIClient(SERVER_NAME='localhost')
+        client.force_authenticate(user)
+        return client
+
+    def claim(self, username):
+        return self.client_for(self.newcomer).post(
+            '/api/auth/setup-username/', {'username': username}, format='json'
+        )
+
+    def test_name_differing_only_in_case_is_taken(self):
+        response = self.claim('Alice')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['username'], ['Username already exists.'])
+        self.newcomer.refresh_from_db()
+        self.assertFalse(self.newcomer.is_setup_complete)
+
+    def test_profile_url_resolves_in_any_case(self):
+        visited = self.client_for(self.newcomer).get('/api/profile/ALICE/')
+        own = self.client_for(self.alice).get('/api/profile/ALICE/')
+
+        self.assertEqual(visited.status_code, 200)
+        self.assertEqual(visited.data['profile']['user']['username'], 'alice')
+        self.assertFalse(visited.data['is_owner'])
+        self.assertTrue(own.data['is_owner'])
+
+    def test_lost_race_for_a_name_is_a_400(self):
+        # Both signups passed validation before either saved
+        with mock.patch('users.serializers.username_taken', return_value=False):
+            response = self.claim('ALICE')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data, {'username': ['Username already exists.']})
+        self.newcomer.refresh_from_db()
+        self.assertFalse(self.newcomer.is_setup_complete)
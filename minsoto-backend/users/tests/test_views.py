@@ -0,0 +1,154 @@
+import time
+
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from users.factories import make_dashboard, make_habits, make_user
+from users.models import CustomUser, Profile
+from users.serializers import RECENT_LOGS
+from users.usernames import username_cache
+
+# CPU-time budget for one read of a heavily seeded dashboard. Generous on
+# purpose: it catches accidental per-row queries or serialization, not noise.
+# CPU time of this process (SQLite runs in it too) is not inflated by other
+# --parallel workers competing for the same cores, as wall-clock time is.
+HEAVY_READ_BUDGET = 1.5
+
+
+class ViewTestCase(TestCase):
+    def setUp(self):
+        # Throttle buckets, analytics and usernames are cached; start every test cold
+        cache.clear()
+        username_cache.clear()
+
+    def client_for(self, user):
+        client = APIClient(SERVER_NAME='localhost')
+        client.force_authenticate(user)
+        return client
+
+
+class QueryCountTests(ViewTestCase):
+    """Reads cost a fixed number of queries however much data the user has"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.small = make_dashboard(tasks=5, habits=2, logs=3, interests=2)
+        cls.large = make_dashboard(tasks=300, habits=40, logs=40, interests=25)
+        cls.visited = make_dashboard(tasks=20, habits=5, logs=5, interests=8)
+
+    def assertFlatQueries(self, num, path, method='get', data=None):
+        for user in (self.small, self.large):
+            self.setUp()
+            with self.subTest(user=user.username), self.assertNumQueries(num):
+                response = getattr(self.client_for(user), method)(path, data, format='json')
+            self.assertEqual(response.status_code, 200, response.data)
+
+    def test_widget_data(self):
+        self.assertFlatQueries(4, '/api/widgets/data/')
+
+    def test_habits_list(self):
+        self.assertFlatQueries(2, '/api/habits/')
+
+    def test_tasks_list(self):
+        self.assertFlatQueries(1, '/api/tasks/')
+
+    def test_tasks_list_paginated(self):
+        self.assertFlatQueries(2, '/api/tasks/?limit=20')
+
+    def test_profile_me(self):
+        self.assertFlatQueries(7, '/api/profile/me/')
+
+    def test_visitor_profile(self):
+        self.assertFlatQueries(7, f'/api/profile/{self.visited.username}/')
+
+    def test_profiles_batch(self):
+        usernames = [self.small.username, self.large.username, self.visited.username]
+        self.assertFlatQueries(5, '/api/profiles/batch/', 'post', {'usernames': usernames})
+
+    def test_habits_analytics(self):
+        self.assertFlatQueries(2, '/api/habits/analytics/')
+
+    def test_sync_snapshot(self):
+        self.assertFlatQueries(5, '/api/sync/')
+
+    def test_streak_leaderboard(self):
+        self.assertFlatQueries(2, '/api/leaderboards/streaks/')
+
+
+class RecentLogsTests(ViewTestCase):
+    def test_habits_embed_latest_logs_only(self):
+        user = make_user()
+        make_habits(user, 2, logs=RECENT_LOGS + 10)
+
+        response = self.client_for(user).get('/api/habits/')
+
+        for habit in response.data:
+            dates = [log['date'] for log in habit['recent_logs']]
+            self.assertEqual(len(dates), RECENT_LOGS)
+            self.assertEqual(dates, sorted(dates, reverse=True))
+
+
+class HeavyReadTests(ViewTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = make_dashboard(tasks=3000, habits=60, logs=90, interests=40)
+
+    def assertFast(self, path):
+        client = self.client_for(self.user)
+        started = time.process_time()
+        response = client.get(path)
+        elapsed = time.process_time() - started
+        self.assertEqual(response.status_code, 200)
+        self.assertLess(elapsed, HEAVY_READ_BUDGET, f'{path} took {elapsed:.2f}s')
+
+    def test_widget_data(self):
+        self.assertFast('/api/widgets/data/')
+
+    def test_tasks_page(self):
+        self.assertFast('/api/tasks/?limit=50&ordering=-priority')
+
+    def test_sync_snapshot(self):
+        self.assertFast('/api/sync/')
+
+    def test_habits_analytics(self):
+        self.assertFast('/api/habits/analytics/')
+
+
+class VisitorProfileTests(ViewTestCase):
+    def test_stale_cached_id_of_deleted_user(self):
+        viewer, visited = make_user(), make_user()
+        client = self.client_for(viewer)
+        self.assertEqual(client.get(f'/api/profile/{visited.username}/').status_code, 200)
+
+        # Deleted by another worker: this process still has the id cached
+        CustomUser.objects.filter(pk=visited.pk).delete()
+        username_cache.set(visited.username.lower(), visited.pk)
+
+        response = client.get(f'/api/profile/{visited.username}/')
+
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(Profile.objects.filter(user_id=visited.pk).exists())
+        self.assertIsNone(username_cache.get(visited.username.lower()))
+
+    def test_cached_id_after_rename_elsewhere(self):
+        viewer, visited = make_user(), make_user()
+        old_name = visited.username
+        client = self.client_for(viewer)
+        client.get(f'/api/profile/{old_name}/')
+
+        # QuerySet.update() skips the receiver that clears the cache, like
+        # a rename handled by another worker
+        CustomUser.objects.filter(pk=visited.pk).update(username=f'{old_name}-new')
+
+        self.assertEqual(client.get(f'/api/profile/{old_name}/').status_code, 404)
+        self.assertEqual(client.get(f'/api/profile/{old_name}-new/').status_code, 200)
+
+    def test_user_without_profile_is_not_given_one(self):
+        viewer, visited = make_user(), make_user()
+        Profile.objects.filter(user=visited).delete()
+
+        response = self.client_for(viewer).get(f'/api/profile/{visited.username}/')
+
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(Profile.objects.filter(user=visited).exists())
@@ -0,0 +1,118 @@
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.throttling import SimpleRateThrottle
+
+# Refill, spend and store in one step, so concurrent requests on any worker
+# never spend the same token
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local refill_rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(bucket[1]) or capacity
+local updated = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated) * refill_rate)
+local allowed = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('EXPIRE', KEYS[1], ARGV[4])
+return {allowed, tostring(tokens)}
+"""
+
+
+class RedisBuckets:
+    """Buckets shared by every worker, updated atomically by a Lua script"""
+
+    def __init__(self, url):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self.script = self.client.register_script(TOKEN_BUCKET_SCRIPT)
+
+    def take(self, key, capacity, refill_rate, now, ttl):
+        """Spend one token; returns (allowed, tokens left)"""
+        allowed, tokens = self.script(keys=[key], args=[capacity, refill_rate, now, ttl])
+        return allowed == 1, float(tokens)
+
+
+class LocalBuckets:
+    """Buckets in the default cache, updated under a process-wide lock.
+
+    Only correct for a single process, such as the development server;
+    production requires Redis (see users.checks).
+    """
+    lock = threading.Lock()
+
+    def take(self, key, capacity, refill_rate, now, ttl):
+        with self.lock:
+            tokens, updated = cache.get(key, (capacity, now))
+            tokens = min(capacity, tokens + max(0, now - updated) * refill_rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            cache.set(key, (tokens, now), ttl)
+        return allowed, tokens
+
+
+_buckets = None
+
+
+def get_buckets():
+    global _buckets
+    if _buckets is None:
+        _buckets = RedisBuckets(settings.REDIS_URL) if settings.REDIS_URL else LocalBuckets()
+    return _buckets
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    """Per-user, per-endpoint token bucket stored in Redis.
+
+    The scope is the URL name of the view, so every endpoint gets its own
+    bucket. Rates come from ``DEFAULT_THROTTLE_RATES``, and endpoints not
+    listed there use the ``user`` rate for their own bucket. ``'60/min'`` is
+    a bucket of 60 tokens refilled at one token per second, which allows
+    short bursts without the per-request timestamp history
+    ``SimpleRateThrottle`` keeps.
+    """
+    cache_format = 'throttle_bucket_%(scope)s_%(ident)s'
+
+    def __init__(self):
+        # Rate depends on the endpoint, so it is resolved per request
+        pass
+
+    def get_scope(self, request):
+        match = getattr(request, 'resolver_match', None)
+        if match is not None and match.url_name:
+            return match.url_name
+        return 'user'
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            ident = request.user.pk
+        else:
+            ident = self.get_ident(request)
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
+
+    def allow_request(self, request, view):
+        self.scope = self.get_scope(request)
+        self.rate = self.THROTTLE_RATES.get(self.scope, self.THROTTLE_RATES.get('user'))
+        if self.rate is None:
+            return True
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+
+        self.key = self.get_cache_key(request, view)
+        self.refill_rate = self.num_requests / self.duration
+        allowed, self.tokens = get_buckets().take(
+            self.key, self.num_requests, self.refill_rate, self.timer(), self.duration
+        )
+        if not allowed:
+            return self.throttle_failure()
+        return True
+
+    def wait(self):
+        return (1 - self.tokens) / self.refill_rate
@@ -10,20 +10,39 @@ urlpatterns = [
     path('profile/me/', views.profile_me, name='profile_me'),
     path('profile/<str:username>/', views.profile_detail, name='profile_detail'),
     path('profile/me/layout/', views.update_profile_layout, name='update_layout'),
+    path('profiles/batch/', views.profiles_batch, name='profiles_batch'),
     
     # User
     path('user/me/', views.user_me, name='user_me'),
+    path('user/deletion/<uuid:job_id>/', views.account_deletion_progress, name='account_deletion_progress'),
     
     # Widgets data
     path('widgets/data/', views.widget_data, name='widget_data'),
     
+    # Offline sync
+    path('sync/', views.sync_changes, name='sync_changes'),
+    
+    # Live updates
+    path('events/', views.event_stream, name='event_stream'),
+    
     # Habits
     path('habits/', views.habits_list, name='habits_list'),
+    path('habits/analytics/', views.habits_analytics_list, name='habits_analytics'),
     path('habits/<uuid:habit_id>/', views.habit_detail, name='habit_detail'),
+    path('habits/<uuid:habit_id>/analytics/', views.habit_analytics_detail, name='habit_analytics'),
+    path('habits/<uuid:habit_id>/history/', views.habit_history, name='habit_history'),
+    path('habits/<uuid:habit_id>/increment/', views.habit_increment, name='habit_increment'),
+    path('habits/<uuid:habit_id>/restore/', views.habit_restore, name='habit_restore'),
+    
+    # Leaderboards
+    path('leaderboards/streaks/', views.streak_leaderboard, name='streak_leaderboard'),
     
     # Tasks
     path('tasks/', views.tasks_list, name='tasks_list'),
+    path('tasks/archived/', views.archived_tasks_list, name='archived_tasks'),
     path('tasks/<uuid:task_id>/', views.task_detail, name='task_detail'),
+    path('tasks/<uuid:task_id>/restore/', views.task_restore, name='task_restore'),
+    path('tasks/<uuid:task_id>/occurrences/', views.task_occurrence, name='task_occurrence'),
     
     # Interests
     path('interests/', views.interests_list, name='interests_list'),
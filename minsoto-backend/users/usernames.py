@@ -0,0 +1,95 @@
+"""Case-insensitive username resolution.
+
+Usernames keep the case they were registered with but are unique and looked
+up case-insensitively through ``username__lower``, which matches the
+``Lower(username)`` unique index. ``resolve_user_id`` fronts that lookup with
+a per-process LRU cache so public profile URLs usually skip the users table.
+"""
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+User = get_user_model()
+
+
+class UsernameCache:
+    """Thread-safe LRU map of lowercased username -> user id"""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._ids = OrderedDict()
+        self._names = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            user_id = self._ids.get(key)
+            if user_id is not None:
+                self._ids.move_to_end(key)
+            return user_id
+
+    def set(self, key, user_id):
+        with self._lock:
+            stale = self._names.pop(user_id, None)
+            if stale is not None:
+                self._ids.pop(stale, None)
+            self._ids[key] = user_id
+            self._ids.move_to_end(key)
+            self._names[user_id] = key
+            while len(self._ids) > self.maxsize:
+                _, evicted = self._ids.popitem(last=False)
+                self._names.pop(evicted, None)
+
+    def discard(self, key=None, user_id=None):
+        with self._lock:
+            if user_id is not None:
+                key = self._names.pop(user_id, key)
+            if key is not None:
+                evicted = self._ids.pop(key, None)
+                self._names.pop(evicted, None)
+
+    def clear(self):
+        with self._lock:
+            self._ids.clear()
+            self._names.clear()
+
+
+username_cache = UsernameCache(settings.USERNAME_CACHE_SIZE)
+
+
+def username_taken(username, exclude=None):
+    users = User.objects.filter(username__lower=username.lower())
+    if exclude is not None:
+        users = users.exclude(pk=exclude.pk)
+    return users.exists()
+
+
+def resolve_user_id(username):
+    """User id for ``username`` in any case, or None if nobody has it"""
+    key = username.lower()
+    user_id = username_cache.get(key)
+    if user_id is None:
+        user_id = (
+            User.objects.filter(username__lower=key).values_list('pk', flat=True).first()
+        )
+        if user_id is not None:
+            username_cache.set(key, user_id)
+    return user_id
+
+
+def is_current(username, user):
+    """Guard for cached ids: other workers may have missed a rename"""
+    if user.username.lower() == username.lower():
+        return True
+    username_cache.discard(key=username.lower())
+    return False
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_username(sender, instance, **kwargs):
+    username_cache.discard(user_id=instance.pk)
@@ -1,27 +1,57 @@
+import asyncio
+import json
 import uuid
-from google.oauth2 import id_token
-from google.auth.transport import requests as google_requests
+from datetime import timedelta
+from asgiref.sync import sync_to_async
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
+from rest_framework.pagination import LimitOffsetPagination
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import get_user_model
 from django.conf import settings
-from django.db import transaction
-
-from .models import Profile, HabitStreak, Task, UserInterest, Interest, HabitLog
+from django.db import IntegrityError, connection, transaction
+from django.db.models import prefetch_related_objects
+from django.http import JsonResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.utils import timezone
+
+from . import sync
+from .account_deletion import request_deletion, resume_if_stalled
+from .archive import archived_logs
+from .analytics import habit_analytics, habits_analytics
+from .decorators import coalesce_get, idempotent
+from .leaderboard import leaderboard
+from .profile_cards import get_profile_cards
+from .recurrence import RecurrenceRule, between
+from .streaks import increment_streak
+from .task_queries import expand_series, query_tasks, sort_serialized
+from .usernames import is_current, resolve_user_id, username_cache
+from .events import broker
+from .models import AccountDeletion, Profile, HabitStreak, Task, UserInterest, Interest, HabitLog
 from .serializers import (
     GoogleAuthSerializer,
     UserSerializer,
     ProfileSerializer,
     UsernameSetupSerializer,
     HabitStreakSerializer,
+    HabitIncrementSerializer,
     TaskSerializer,
     UserInterestSerializer,
     ProfileDetailSerializer,
+    PublicProfileDetailSerializer,
+    PUBLIC_PROFILE_FIELDS,
     LayoutUpdateSerializer,
-    InterestSerializer
+    InterestSerializer,
+    ProfileBatchSerializer,
+    TaskQuerySerializer,
+    OccurrenceSerializer,
+    ArchivedTaskSerializer,
+    HabitLogSerializer,
+    with_recent_logs,
 )
 
 User = get_user_model()
@@ -42,6 +72,10 @@ def google_auth(request):
     if serializer.is_valid():
         credential = serializer.validated_data['access_token']
         
+        # The Google auth stack is slow to import and only needed here
+        from google.auth.transport import requests as google_requests
+        from google.oauth2 import id_token
+
         try:
             # Verify the JWT credential with Google
             idinfo = id_token.verify_oauth2_token(
@@ -111,6 +145,7 @@ def google_auth(request):
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@idempotent
 def setup_username(request):
     if request.user.is_setup_complete:
         return Response(
@@ -122,7 +157,15 @@ def setup_username(request):
     if serializer.is_valid():
         request.user.username = serializer.validated_data['username']
         request.user.is_setup_complete = True
-        request.user.save()
+        try:
+            with transaction.atomic():
+                request.user.save()
+        except IntegrityError:
+            # Lost a race with another signup for the same name
+            return Response(
+                {'username': ['Username already exists.']},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
         return Response({
             'user': UserSerializer(request.user).data
@@ -133,9 +176,11 @@ def setup_username(request):
 
 @api_view(['GET', 'PATCH'])
 @permission_classes([IsAuthenticated])
+@idempotent
 def profile_me(request):
     # Ensure profile exists
     profile, created = Profile.objects.get_or_create(user=request.user)
+    with_interests(profile)
     
     if request.method == 'GET':
         serializer = ProfileDetailSerializer(profile)
@@ -149,45 +194,114 @@ def profile_me(request):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-@api_view(['GET'])
+@api_view(['GET', 'DELETE'])
 @permission_classes([IsAuthenticated])
+@idempotent
 def user_me(request):
+    if request.method == 'DELETE':
+        # The account is locked now; its data is deleted in the background
+        job = request_deletion(request.user)
+        return Response({
+            'status': job.status,
+            'progress_url': reverse('account_deletion_progress', args=[job.pk]),
+        }, status=status.HTTP_202_ACCEPTED)
+
     serializer = UserSerializer(request.user)
     return Response(serializer.data)
 
 
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def account_deletion_progress(request, job_id):
+    """Progress of a background account deletion, by the job id DELETE returned"""
+    job = AccountDeletion.objects.filter(pk=job_id).first()
+    if job is None:
+        return Response({'error': 'No deletion in progress'}, status=status.HTTP_404_NOT_FOUND)
+    # A poll is also the cue to pick up a job whose worker died
+    resume_if_stalled(job)
+    return Response({
+        'status': job.status,
+        'step': job.step or None,
+        'deleted': job.deleted,
+    })
+
+
+def with_interests(profile):
+    """Load the interests ProfileDetailSerializer lists in two queries"""
+    prefetch_related_objects([profile], 'user__user_interests__interest')
+    return profile
+
+
+def visitor_profile(username):
+    """Profile with only the columns other users may see, or None"""
+    for _ in range(2):
+        user_id = resolve_user_id(username)
+        if user_id is None:
+            return None
+        profile = (
+            Profile.objects.filter(user_id=user_id)
+            .select_related('user')
+            .only(*PUBLIC_PROFILE_FIELDS, *(f'user__{field}' for field in UserSerializer.Meta.fields))
+            .first()
+        )
+        if profile is None:
+            # Cached id of a user deleted on another worker. A GET never
+            # creates the profile; resolve from the database once more
+            username_cache.discard(key=username.lower())
+            continue
+        if is_current(username, profile.user):
+            return profile
+        # Cached id went stale after a rename elsewhere; resolve once more
+    return None
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@coalesce_get
 def profile_detail(request, username):
     """Get profile with visibility logic"""
-    try:
-        user = User.objects.get(username=username)
-        profile, created = Profile.objects.get_or_create(user=user)
-        
-        is_owner = request.user == user
-        
-        # Create a copy of layout to avoid modifying the original
-        profile_data = ProfileDetailSerializer(profile).data
-        
-        # Filter widgets based on visibility
-        if not is_owner and profile_data.get('layout'):
-            visible_widgets = [
-                w for w in profile_data['layout'].get('widgets', [])
-                if w.get('visibility') == 'public'
-            ]
-            profile_data['layout']['widgets'] = visible_widgets
-        
-        return Response({
-            'profile': profile_data,
-            'is_owner': is_owner
-        })
-        
-    except User.DoesNotExist:
-        return Response({'error': 'User not found'}, status=status.HTTP_404_NOT_FOUND)
+    is_owner = (
+        resolve_user_id(username) == request.user.pk
+        and is_current(username, request.user)
+    )
+
+    if is_owner:
+        profile, created = Profile.objects.get_or_create(user=request.user)
+        profile_data = ProfileDetailSerializer(with_interests(profile)).data
+    else:
+        # Visitors only get the precomputed public projection; the
+        # private layout is never loaded
+        profile = visitor_profile(username)
+        if profile is None:
+            return Response({'error': 'User not found'}, status=status.HTTP_404_NOT_FOUND)
+        profile_data = PublicProfileDetailSerializer(with_interests(profile)).data
+
+    return Response({
+        'profile': profile_data,
+        'is_owner': is_owner
+    })
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def profiles_batch(request):
+    """Public profile cards for a list of usernames"""
+    serializer = ProfileBatchSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    usernames = serializer.validated_data['usernames']
+    cards = get_profile_cards(usernames)
+
+    return Response({
+        'profiles': [cards[username] for username in usernames if username in cards],
+        'not_found': [username for username in usernames if username not in cards],
+    })
 
 
 @api_view(['PATCH'])
 @permission_classes([IsAuthenticated])
+@idempotent
 def update_profile_layout(request):
     """Save widget layout"""
     profile, created = Profile.objects.get_or_create(user=request.user)
@@ -195,7 +309,7 @@ def update_profile_layout(request):
     serializer = LayoutUpdateSerializer(data=request.data)
     if serializer.is_valid():
         profile.layout = serializer.validated_data['layout']
-        profile.save()
+        profile.save(update_fields=['layout', 'updated_at'])
         return Response({
             'message': 'Layout saved successfully',
             'layout': profile.layout
@@ -206,14 +320,15 @@ def update_profile_layout(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@coalesce_get
 def widget_data(request):
     """Get all widget data for current user"""
     user = request.user
     
     data = {
-        'habits': HabitStreakSerializer(user.habits.all(), many=True).data,
+        'habits': HabitStreakSerializer(with_recent_logs(user.habits.all()), many=True).data,
         'tasks': TaskSerializer(user.tasks.all(), many=True).data,
-        'interests': UserInterestSerializer(user.user_interests.all(), many=True).data,
+        'interests': UserInterestSerializer(user.user_interests.select_related('interest'), many=True).data,
     }
     
     return Response(data)
@@ -223,23 +338,26 @@ def widget_data(request):
 
 @api_view(['GET', 'POST'])
 @permission_classes([IsAuthenticated])
+@idempotent
 def habits_list(request):
     """List all habits or create new habit"""
     if request.method == 'GET':
-        habits = request.user.habits.all()
+        habits = with_recent_logs(request.user.habits.all())
         serializer = HabitStreakSerializer(habits, many=True)
         return Response(serializer.data)
     
     elif request.method == 'POST':
         serializer = HabitStreakSerializer(data=request.data)
         if serializer.is_valid():
-            serializer.save(user=request.user)
+            with transaction.atomic():
+                serializer.save(user=request.user)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
 @api_view(['GET', 'PATCH', 'DELETE'])
 @permission_classes([IsAuthenticated])
+@idempotent
 def habit_detail(request, habit_id):
     """Get, update, or delete a specific habit"""
     try:
@@ -254,39 +372,184 @@ def habit_detail(request, habit_id):
     elif request.method == 'PATCH':
         serializer = HabitStreakSerializer(habit, data=request.data, partial=True)
         if serializer.is_valid():
-            serializer.save()
+            with transaction.atomic():
+                serializer.save()
             return Response(serializer.data)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
     elif request.method == 'DELETE':
-        habit.delete()
+        # Soft delete; POST .../restore/ undoes it until archive_data purges it
+        habit.deleted_at = timezone.now()
+        with transaction.atomic():
+            habit.save()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+@idempotent
+def habit_increment(request, habit_id):
+    """Atomically bump a habit's streak without a read-modify-write"""
+    serializer = HabitIncrementSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    habit = increment_streak(
+        habit_id,
+        request.user,
+        by=serializer.validated_data['by'],
+        longest_at_least=serializer.validated_data['longest_streak'],
+    )
+    if habit is None:
+        return Response({'error': 'Habit not found'}, status=status.HTTP_404_NOT_FOUND)
+    return Response(HabitStreakSerializer(habit).data)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+@idempotent
+def habit_restore(request, habit_id):
+    """Undo a habit deletion"""
+    try:
+        habit = HabitStreak.all_objects.get(id=habit_id, user=request.user, deleted_at__isnull=False)
+    except HabitStreak.DoesNotExist:
+        return Response({'error': 'Deleted habit not found'}, status=status.HTTP_404_NOT_FOUND)
+
+    habit.deleted_at = None
+    with transaction.atomic():
+        habit.save()
+    return Response(HabitStreakSerializer(habit).data)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def habit_history(request, habit_id):
+    """Full log history of a habit, including archived years"""
+    try:
+        habit = HabitStreak.objects.only('id').get(id=habit_id, user=request.user)
+    except HabitStreak.DoesNotExist:
+        return Response({'error': 'Habit not found'}, status=status.HTTP_404_NOT_FOUND)
+
+    year = request.query_params.get('year')
+    try:
+        year = int(year) if year else None
+    except ValueError:
+        return Response({'error': 'Invalid year'}, status=status.HTTP_400_BAD_REQUEST)
+
+    logs = habit.logs.all()
+    if year is not None:
+        logs = logs.filter(date__year=year)
+
+    archived = [
+        {'date': day, 'completed': completed, 'notes': notes, 'archived': True}
+        for day, completed, notes in archived_logs(habit, year)
+    ]
+    return Response({
+        'logs': HabitLogSerializer(logs, many=True).data,
+        'archived_logs': archived,
+    })
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def habit_analytics_detail(request, habit_id):
+    """Completion analytics for one habit"""
+    try:
+        habit = HabitStreak.objects.only('id').get(id=habit_id, user=request.user)
+    except HabitStreak.DoesNotExist:
+        return Response({'error': 'Habit not found'}, status=status.HTTP_404_NOT_FOUND)
+
+    include_archived = request.query_params.get('history') in ('1', 'true')
+    return Response(habit_analytics(habit, include_archived))
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def habits_analytics_list(request):
+    """Completion analytics for all of the user's habits"""
+    # user_id too: the related manager reads it back for every row
+    habits = request.user.habits.only('id', 'name', 'user_id')
+    return Response(habits_analytics(habits))
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def streak_leaderboard(request):
+    """Top public habit streaks, optionally limited to one interest"""
+    interest_id = request.query_params.get('interest')
+    if interest_id:
+        try:
+            interest_id = uuid.UUID(interest_id)
+        except ValueError:
+            return Response({'error': 'Invalid interest id'}, status=status.HTTP_400_BAD_REQUEST)
+    else:
+        interest_id = None
+
+    try:
+        limit = int(request.query_params.get('limit', settings.LEADERBOARD_DEFAULT_LIMIT))
+    except ValueError:
+        return Response({'error': 'Invalid limit'}, status=status.HTTP_400_BAD_REQUEST)
+    limit = max(1, min(limit, settings.LEADERBOARD_MAX_LIMIT))
+
+    return Response(leaderboard(request.user, limit, interest_id))
+
+
 @api_view(['GET', 'POST'])
 @permission_classes([IsAuthenticated])
+@idempotent
 def tasks_list(request):
     """List all tasks or create new task"""
     if request.method == 'GET':
-        status_filter = request.query_params.get('status')
-        tasks = request.user.tasks.all()
-        
-        if status_filter:
-            tasks = tasks.filter(status=status_filter)
-        
+        query = TaskQuerySerializer(data=request.query_params)
+        if not query.is_valid():
+            return Response(query.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        params = query.validated_data
+        window_start, window_end = params.get('due_after'), params.get('due_before')
+        if window_start and window_end:
+            # Date window: recurring series are expanded into occurrences
+            if window_end - window_start > timedelta(days=settings.RECURRENCE_MAX_WINDOW_DAYS):
+                return Response(
+                    {'error': f'Date window cannot exceed {settings.RECURRENCE_MAX_WINDOW_DAYS} days'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            tasks = query_tasks(request.user.tasks.filter(recurrence=''), params)
+            series_params = {k: v for k, v in params.items() if k not in ('due_after', 'due_before', 'overdue', 'ordering')}
+            series = query_tasks(request.user.tasks.exclude(recurrence=''), series_params)
+            data = TaskSerializer(tasks, many=True).data
+            data += expand_series(series, window_start, window_end, TaskSerializer)
+            # Rows and generated occurrences are only ordered once merged
+            sort_serialized(data, params.get('ordering') or ['due_date'])
+
+            if 'limit' in request.query_params:
+                paginator = LimitOffsetPagination()
+                page = paginator.paginate_queryset(data, request)
+                return paginator.get_paginated_response(page)
+            return Response(data)
+
+        tasks = query_tasks(request.user.tasks.all(), params)
+
+        # Opt-in pagination keeps large lists in the database
+        if 'limit' in request.query_params:
+            paginator = LimitOffsetPagination()
+            page = paginator.paginate_queryset(tasks, request)
+            return paginator.get_paginated_response(TaskSerializer(page, many=True).data)
+
         serializer = TaskSerializer(tasks, many=True)
         return Response(serializer.data)
     
     elif request.method == 'POST':
         serializer = TaskSerializer(data=request.data)
         if serializer.is_valid():
-            serializer.save(user=request.user)
+            with transaction.atomic():
+                serializer.save(user=request.user)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
 @api_view(['GET', 'PATCH', 'DELETE'])
 @permission_classes([IsAuthenticated])
+@idempotent
 def task_detail(request, task_id):
     """Get, update, or delete a specific task"""
     try:
@@ -301,15 +564,98 @@ def task_detail(request, task_id):
     elif request.method == 'PATCH':
         serializer = TaskSerializer(task, data=request.data, partial=True)
         if serializer.is_valid():
-            serializer.save()
+            with transaction.atomic():
+                serializer.save()
             return Response(serializer.data)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
     elif request.method == 'DELETE':
-        task.delete()
+        # Soft delete; POST .../restore/ undoes it until archive_data purges it
+        task.deleted_at = timezone.now()
+        with transaction.atomic():
+            task.save()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+@idempotent
+def task_restore(request, task_id):
+    """Undo a task deletion"""
+    try:
+        task = Task.all_objects.get(id=task_id, user=request.user, deleted_at__isnull=False)
+    except Task.DoesNotExist:
+        return Response({'error': 'Deleted task not found'}, status=status.HTTP_404_NOT_FOUND)
+
+    task.deleted_at = None
+    with transaction.atomic():
+        task.save()
+    return Response(TaskSerializer(task).data)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def archived_tasks_list(request):
+    """Completed tasks moved to the archive, newest first"""
+    paginator = LimitOffsetPagination()
+    page = paginator.paginate_queryset(request.user.archived_tasks.all(), request)
+    return paginator.get_paginated_response(ArchivedTaskSerializer(page, many=True).data)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+@idempotent
+def task_occurrence(request, task_id):
+    """Materialize one occurrence of a recurring task so it can be completed or edited"""
+    try:
+        series = Task.objects.get(id=task_id, user=request.user)
+    except Task.DoesNotExist:
+        return Response({'error': 'Task not found'}, status=status.HTTP_404_NOT_FOUND)
+
+    if not series.recurrence:
+        return Response({'error': 'Task is not recurring'}, status=status.HTTP_400_BAD_REQUEST)
+
+    occurrence = OccurrenceSerializer(data=request.data)
+    if not occurrence.is_valid():
+        return Response(occurrence.errors, status=status.HTTP_400_BAD_REQUEST)
+    moment = occurrence.validated_data['occurrence_date']
+
+    # The slot must be one the series actually generates
+    rule = RecurrenceRule.parse(series.recurrence)
+    slots = between(rule, series.due_date, series.recurrence_timezone, moment, moment + timedelta(microseconds=1))
+    if next(slots, None) is None:
+        return Response({'error': 'No occurrence at that date'}, status=status.HTTP_400_BAD_REQUEST)
+
+    with transaction.atomic():
+        task, created = Task.all_objects.get_or_create(
+            recurrence_parent=series,
+            occurrence_date=moment,
+            defaults={
+                'user': request.user,
+                'title': series.title,
+                'description': series.description,
+                'priority': series.priority,
+                'is_public': series.is_public,
+                'due_date': moment,
+                'recurrence_timezone': series.recurrence_timezone,
+            }
+        )
+
+        if task.deleted_at is not None:
+            # Re-materializing a skipped slot brings it back
+            task.deleted_at = None
+            task.save()
+
+        changes = {k: v for k, v in request.data.items() if k != 'occurrence_date'}
+        serializer = TaskSerializer(task, data=changes, partial=True)
+        if not serializer.is_valid():
+            # Roll back the materialization along with the rejected edit
+            transaction.set_rollback(True)
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        serializer.save()
+    return Response(serializer.data, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def interests_list(request):
@@ -321,6 +667,7 @@ def interests_list(request):
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@idempotent
 def add_interest(request):
     """Add interest to user profile"""
     interest_id = request.data.get('interest_id')
@@ -328,11 +675,12 @@ def add_interest(request):
     
     try:
         interest = Interest.objects.get(id=interest_id)
-        user_interest, created = UserInterest.objects.get_or_create(
-            user=request.user,
-            interest=interest,
-            defaults={'is_public': is_public}
-        )
+        with transaction.atomic():
+            user_interest, created = UserInterest.objects.get_or_create(
+                user=request.user,
+                interest=interest,
+                defaults={'is_public': is_public}
+            )
         
         if not created:
             return Response(
@@ -352,6 +700,7 @@ def add_interest(request):
 
 @api_view(['DELETE'])
 @permission_classes([IsAuthenticated])
+@idempotent
 def remove_interest(request, interest_id):
     """Remove interest from user profile"""
     try:
@@ -359,7 +708,8 @@ def remove_interest(request, interest_id):
             user=request.user,
             interest_id=interest_id
         )
-        user_interest.delete()
+        with transaction.atomic():
+            user_interest.delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
         
     except UserInterest.DoesNotExist:
@@ -367,3 +717,79 @@ def remove_interest(request, interest_id):
             {'error': 'Interest not found'},
             status=status.HTTP_404_NOT_FOUND
         )
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def sync_changes(request):
+    """Delta sync: rows created, updated or deleted since a change token"""
+    since = request.query_params.get('since')
+    if not since:
+        return Response(sync.snapshot(request.user))
+
+    try:
+        since = int(since)
+    except ValueError:
+        return Response({'error': 'Invalid sync token'}, status=status.HTTP_400_BAD_REQUEST)
+
+    return Response(sync.changes_since(request.user, since))
+
+
+# Live updates
+
+def authenticate_stream(request):
+    """Resolve the JWT from the Authorization header or the ``token`` query param.
+
+    EventSource cannot send custom headers, so browsers pass the access token
+    in the query string instead.
+    """
+    auth = JWTAuthentication()
+    try:
+        result = auth.authenticate(request)
+        if result is not None:
+            return result[0]
+        raw_token = request.GET.get('token')
+        if raw_token:
+            return auth.get_user(auth.get_validated_token(raw_token))
+    except (InvalidToken, TokenError):
+        pass
+    finally:
+        # request_finished only fires when the stream closes, hours later;
+        # don't hold a database connection for the whole of it
+        connection.close()
+    return None
+
+
+async def stream_events(user_id):
+    entry = broker.subscribe(user_id)
+    queue = entry[1]
+    try:
+        yield f"retry: {settings.EVENTS_RETRY_MS}\n\n"
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), settings.EVENTS_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+    finally:
+        broker.unsubscribe(user_id, entry)
+
+
+async def event_stream(request):
+    """Server-sent events with task, habit and log deltas for the current user"""
+    if request.method != 'GET':
+        return JsonResponse({'error': 'Method not allowed'}, status=405)
+
+    # Nothing here needs the request thread; the connection is closed on return
+    user = await sync_to_async(authenticate_stream, thread_sensitive=False)(request)
+    if user is None:
+        return JsonResponse(
+            {'error': 'Authentication credentials were not provided.'},
+            status=status.HTTP_401_UNAUTHORIZED
+        )
+
+    response = StreamingHttpResponse(stream_events(user.id), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response